@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the sidecar checkout pipeline.
+
+Builds synthetic workspaces (ticket directories) and configurations (repo sections),
+times each stage of TicketManager.process_checkout against them and writes the
+results as JSON, so latency growth and regressions can be compared between runs.
+    
+    python benchmarks/bench_checkout.py --output results.json
+    python benchmarks/bench_checkout.py --dirs 10 1000 --repos 1 100 --repeat 20
+    python benchmarks/bench_checkout.py --dirs 10 --repos 1 --patterns 1 10 100
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+
+
+DEFAULT_DIR_COUNTS = [10, 1000, 10000, 100000]
+DEFAULT_REPO_COUNTS = [1, 100, 10000]
+DEFAULT_PATTERN_COUNTS = [1, 5, 20, 50]
+REPO_ID = 'github.com/bench/target'
+BRANCH = 'JIRA-4242-benchmark-branch'
+# Branch names for the pattern benchmark: first pattern, default (last) pattern, no match
+PATTERN_BRANCHES = {'first': 'SYS0-42-fix', 'last': BRANCH, 'none': 'feature/no-ticket'}
+PATTERN_CALLS = 2000
+# Moves fixture mtimes out of the racy windows used by the config snapshot and ticket index
+AGE_NS = 60 * 1_000_000_000
+
+
+def _age(path: Path):
+    """Backdate path's mtime so caches keyed on it are trusted."""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - AGE_NS))
+
+
+def make_git_dir(root: Path) -> Path:
+    """Write a minimal .git directory on BRANCH with an origin remote; git is not required."""
+    git_dir = root / 'repo' / '.git'
+    (git_dir / 'refs' / 'heads').mkdir(parents=True)
+    (git_dir / 'HEAD').write_text(f"ref: refs/heads/{BRANCH}\n")
+    (git_dir / 'refs' / 'heads' / BRANCH).write_text('0' * 40 + '\n')
+    (git_dir / 'config').write_text(
+        '[core]\n\trepositoryformatversion = 0\n\tbare = false\n'
+        '[remote "origin"]\n\turl = git@github.com:bench/target.git\n'
+        '\tfetch = +refs/heads/*:refs/remotes/origin/*\n'
+    )
+    return git_dir
+
+
+def make_workspace(root: Path, dir_count: int) -> Path:
+    """Create dir_count ticket directories; the benchmarked ticket is not among them."""
+    workspace = root / f"workspace-{dir_count}"
+    workspace.mkdir()
+    for i in range(dir_count):
+        (workspace / f"PROJ-{i}-synthetic-ticket").mkdir()
+    _age(workspace)
+    return workspace
+
+
+def make_tools(root: Path) -> Path:
+    """Create a small tools library."""
+    tools = root / 'tools'
+    for name in ('notebooks', 'scripts', 'utils'):
+        (tools / name).mkdir(parents=True)
+    return tools
+
+
+def make_config(root: Path, repo_count: int, workspace: Path, tools: Path) -> Path:
+    """Write a config.ini with repo_count repo sections, one of them for REPO_ID."""
+    config_dir = root / f"config-{workspace.name}-{repo_count}"
+    config_dir.mkdir()
+    lines = [
+        '[default.paths]', f"workspace_base = {root / 'unused'}", f"tools_library_path = {tools}", '',
+        '[default.branches]', 'standard_branches = main, master, develop, stage, production', '',
+        '[default.ticket_pattern]', 'prefix_pattern = [A-Za-z]{1,10}', 'separator = [-_]',
+        r'number_pattern = \d+', 'description_pattern = .*', '',
+        '[default.links]', f"current_ticket_link_locations = {config_dir / 'links'}",
+        'current_ticket_link_filename = CurrentTicket', 'tools_to_link = notebooks, scripts, utils', '',
+    ]
+    for i in range(repo_count - 1):
+        lines += [f"[repo:github.com/bench/other-{i}]", f"paths.workspace_base = {root / 'other' / str(i)}", '']
+    lines += [f"[repo:{REPO_ID}]", f"paths.workspace_base = {workspace}", '']
+    config_file = config_dir / 'config.ini'
+    config_file.write_text('\n'.join(lines))
+    _age(config_file)
+    return config_file
+
+
+def time_stage(func: Callable, repeat: int, setup: Optional[Callable] = None) -> Dict[str, float]:
+    """Run func repeat times (calling setup untimed before each run) and summarize in microseconds."""
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter_ns()
+        func()
+        samples.append((time.perf_counter_ns() - start) / 1000)
+    return {
+        'runs': repeat,
+        'min_us': round(min(samples), 1),
+        'median_us': round(statistics.median(samples), 1),
+        'mean_us': round(statistics.fmean(samples), 1),
+        'max_us': round(max(samples), 1),
+    }
+
+
+def bench_fixture(git_dir: Path, config_file: Path, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Time every pipeline stage against one workspace/config pair."""
+    snapshot = config_file.with_name(config_file.name + main.ConfigManager.SNAPSHOT_SUFFIX)
+    index_dir = config_file.parent / 'index'
+    stages = {}
+    
+    stages['repo_detection'] = time_stage(
+        lambda: main.RepoIdentifier(git_dir).get_repo_identifier(), repeat)
+    stages['config_load_cold'] = time_stage(
+        lambda: main.ConfigManager(config_file), repeat,
+        setup=lambda: snapshot.unlink() if snapshot.exists() else None)
+    main.ConfigManager(config_file)
+    stages['config_load_snapshot'] = time_stage(lambda: main.ConfigManager(config_file), repeat)
+    
+    config = main.ConfigManager(config_file).with_repo(REPO_ID)
+    analyzer = main.BranchAnalyzer(config)
+    stages['current_branch'] = time_stage(lambda: analyzer.get_current_branch(git_dir), repeat)
+    stages['extract_ticket_info'] = time_stage(lambda: analyzer.extract_ticket_info(BRANCH), repeat)
+    
+    dir_manager = main.DirectoryManager(config)
+    workspace = dir_manager.get_workspace_base(REPO_ID)
+    stages['find_existing_ticket_dir_cold'] = time_stage(
+        lambda: main.DirectoryManager(config).find_existing_ticket_dir('JIRA', '4242', REPO_ID), repeat,
+        setup=lambda: shutil.rmtree(index_dir, ignore_errors=True))
+    main.DirectoryManager(config).find_existing_ticket_dir('JIRA', '4242', REPO_ID)
+    stages['find_existing_ticket_dir_indexed'] = time_stage(
+        lambda: main.DirectoryManager(config).find_existing_ticket_dir('JIRA', '4242', REPO_ID), repeat)
+    
+    ticket_dir = workspace / BRANCH
+    ticket_dir.mkdir(exist_ok=True)
+    tools_linker = main.ToolsLinker(config)
+    stages['link_tools_create'] = time_stage(
+        lambda: tools_linker.link_tools(ticket_dir), repeat,
+        setup=lambda: [os.unlink(ticket_dir / name) for name in tools_linker.tools_to_link
+                       if os.path.lexists(ticket_dir / name)])
+    stages['link_tools_unchanged'] = time_stage(lambda: tools_linker.link_tools(ticket_dir), repeat)
+    current_linker = main.CurrentTicketLinker(config)
+    stages['current_ticket_link'] = time_stage(
+        lambda: current_linker.update_current_ticket_link(ticket_dir, REPO_ID), repeat)
+    shutil.rmtree(ticket_dir)
+    _age(workspace)
+    
+    def process():
+        success, message = main.TicketManager(config_file, git_dir=git_dir).process_checkout()
+        if not success:
+            raise RuntimeError(message)
+    
+    def reset():
+        shutil.rmtree(ticket_dir, ignore_errors=True)
+        _age(workspace)
+    
+    stages['process_checkout_new_ticket'] = time_stage(process, repeat, setup=reset)
+    stages['process_checkout_existing_ticket'] = time_stage(process, repeat)
+    return stages
+
+
+def bench_patterns(root: Path, pattern_counts: List[int], repeat: int) -> List[Dict]:
+    """
+    Time the combined BranchAnalyzer.pattern with 1..N ticket patterns against trying
+    each pattern with its own regex, for branches matching the first, the last or no pattern.
+    Both sides only match; building the result dict is timed by the extract_ticket_info stage.
+    """
+    results = []
+    for count in pattern_counts:
+        config_file = root / f"patterns-{count}" / 'config.ini'
+        config_file.parent.mkdir()
+        config = main.ConfigManager(config_file)
+        extra = [rf"(?P<prefix>SYS{i})-(?P<number>\d+)(?:-(?P<description>.*))?" for i in range(count - 1)]
+        config.set('ticket_pattern', 'patterns', '\n'.join(extra), default=True)
+        analyzer = main.BranchAnalyzer(main.ConfigManager(config_file))
+        separate = [re.compile(rf"^(?:{pattern})$") for pattern in analyzer.patterns]
+        
+        def match_separately(branch: str):
+            for pattern in separate:
+                match = pattern.match(branch)
+                if match:
+                    return match
+            return None
+        
+        cases = {}
+        for case, branch in PATTERN_BRANCHES.items():
+            for method, func in (('combined', analyzer.pattern.match), ('separate', match_separately)):
+                timing = time_stage(lambda: [func(branch) for _ in range(PATTERN_CALLS)], repeat)
+                cases[f"{case}_{method}_ns_per_call"] = round(timing['median_us'] * 1000 / PATTERN_CALLS, 1)
+        results.append({'patterns': len(analyzer.patterns), **cases})
+    return results
+
+
+def run_benchmarks(dir_counts: List[int], repo_counts: List[int], repeat: int,
+                   root: Optional[Path] = None, pattern_counts: Optional[List[int]] = None) -> Dict:
+    """Benchmark every combination of workspace size and config size, then ticket pattern counts."""
+    own_root = root is None
+    root = Path(tempfile.mkdtemp(prefix='sidecar-bench-')) if own_root else root
+    results = []
+    try:
+        git_dir = make_git_dir(root)
+        tools = make_tools(root)
+        for dir_count in dir_counts:
+            workspace = make_workspace(root, dir_count)
+            for repo_count in repo_counts:
+                config_file = make_config(root, repo_count, workspace, tools)
+                results.append({
+                    'ticket_dirs': dir_count,
+                    'repo_sections': repo_count,
+                    'stages': bench_fixture(git_dir, config_file, repeat),
+                })
+            shutil.rmtree(workspace)
+        pattern_results = bench_patterns(root, pattern_counts or DEFAULT_PATTERN_COUNTS, repeat)
+    finally:
+        if own_root:
+            shutil.rmtree(root, ignore_errors=True)
+    
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sqlite': sqlite3.sqlite_version,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'repeat': repeat,
+        'results': results,
+        'pattern_scaling': pattern_results,
+    }
+
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description='Benchmark the sidecar checkout pipeline')
+    parser.add_argument('--dirs', type=int, nargs='+', default=DEFAULT_DIR_COUNTS,
+                        help='Ticket directory counts to benchmark')
+    parser.add_argument('--repos', type=int, nargs='+', default=DEFAULT_REPO_COUNTS,
+                        help='Repo section counts to benchmark')
+    parser.add_argument('--patterns', type=int, nargs='+', default=DEFAULT_PATTERN_COUNTS,
+                        help='Ticket pattern counts to benchmark')
+    parser.add_argument('--repeat', type=int, default=10, help='Runs per stage')
+    parser.add_argument('--output', '-o', help='Write JSON results to this file (default: stdout)')
+    args = parser.parse_args(argv)
+    
+    report = run_benchmarks(args.dirs, args.repos, max(1, args.repeat), pattern_counts=args.patterns)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n')
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_cli())
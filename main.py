@@ -5,30 +5,457 @@ Hooks into git checkout to create and link ticket directories.
 """
 
 import argparse
+import collections
 import configparser
+import contextlib
+import copy
+import errno
+import fnmatch
 import hashlib
+import heapq
+import itertools
+import json
+import marshal
 import os
 import platform
 import re
+import select
 import shutil
+import socket
+import socketserver
+import sqlite3
+import stat as stat_module
+import struct
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:  # Unix
+    msvcrt = None
+
+
+class FileLock:
+    """
+    Advisory inter-process lock held on a separate lock file.
+    Uses flock on Unix and msvcrt byte locking on Windows. Waits at most
+    timeout seconds (0 means a single attempt) and raises TimeoutError after that.
+    """
+    
+    def __init__(self, path: Path, timeout: float = 10.0, poll_interval: float = 0.02):
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+    
+    def _try_lock(self, fd: int) -> bool:
+        """Attempt to take the lock without blocking."""
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            elif msvcrt is not None:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+    
+    def acquire(self):
+        """Take the lock, waiting up to timeout seconds."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + self.timeout
+        while not self._try_lock(fd):
+            if time.monotonic() >= deadline:
+                os.close(fd)
+                raise TimeoutError(f"Timed out waiting for lock {self.path}")
+            time.sleep(self.poll_interval)
+        self._fd = fd
+    
+    def release(self):
+        """Release the lock if held."""
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+    
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class Tracer:
+    """
+    Writes one JSON record per timed phase of a checkout (subprocess calls, config
+    load, ticket directory lookup, each link) to stderr or an append-only JSON-lines
+    file. Enabled by 'process --timings' or SIDECAR_TRACE; when disabled, trace_phase()
+    returns a shared no-op context manager.
+    """
+    
+    ENV_VAR = 'SIDECAR_TRACE'
+    TRACE_FILENAME = 'trace.jsonl'
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_settings(cls, env_value: Optional[str], timings: bool = False) -> Optional['Tracer']:
+        """
+        Build the tracer selected by SIDECAR_TRACE and --timings, or None if tracing is off.
+        SIDECAR_TRACE=file appends to ~/.sidecar/trace.jsonl; any other non-empty value
+        except '0' (and --timings) traces to stderr.
+        """
+        env_value = (env_value or '').strip().lower()
+        if env_value == 'file':
+            trace_file = Path.home() / ".sidecar" / cls.TRACE_FILENAME
+            trace_file.parent.mkdir(parents=True, exist_ok=True)
+            return cls(open(trace_file, 'a', buffering=1))
+        if timings or env_value not in ('', '0'):
+            return cls(sys.stderr)
+        return None
+    
+    @contextlib.contextmanager
+    def phase(self, name: str, fields: Dict):
+        """Time the enclosed block and emit its record, noting the exception type on failure."""
+        start = time.perf_counter_ns()
+        try:
+            yield
+        except BaseException as e:
+            fields['error'] = type(e).__name__
+            raise
+        finally:
+            self.emit(name, (time.perf_counter_ns() - start) / 1_000_000, fields)
+    
+    def emit(self, name: str, ms: float, fields: Dict):
+        """Write one record; safe to call from link worker threads."""
+        record = {'phase': name, 'ms': round(ms, 3), 'pid': os.getpid(), 'ts': round(time.time(), 3)}
+        record.update(fields)
+        line = json.dumps(record, default=str) + '\n'
+        with self._lock:
+            self.stream.write(line)
+            self.stream.flush()
+
+
+_tracer: Optional[Tracer] = None
+_NO_TRACE = contextlib.nullcontext()
+
+
+def set_tracer(tracer: Optional[Tracer]) -> Optional[Tracer]:
+    """Install the process-wide tracer (None disables tracing); returns the previous one."""
+    global _tracer
+    previous, _tracer = _tracer, tracer
+    return previous
+
+
+def trace_phase(name: str, **fields):
+    """Context manager timing one phase when tracing is enabled."""
+    if _tracer is None:
+        return _NO_TRACE
+    return _tracer.phase(name, fields)
+
+
+class GitMetadataReader:
+    """
+    Reads repository metadata (HEAD, refs, remotes) straight from the git directory.
+    Every query returns None when the layout is not understood, so callers can
+    fall back to the git CLI.
+    """
+    
+    def __init__(self, git_dir: Path):
+        """
+        Args:
+            git_dir: A .git directory, a .git file pointing elsewhere (worktrees,
+                submodules), or a bare repository directory
+        """
+        self.git_dir = self._resolve_gitfile(Path(git_dir))
+        self.common_dir = self._resolve_common_dir(self.git_dir) if self.git_dir else None
+        self._config: Optional[Dict[str, Dict[str, List[str]]]] = None
+        self._config_loaded = False
+    
+    # (file stamps, result) of the last outer_config_rewrites_urls() scan
+    _outer_config_cache: Optional[Tuple[tuple, bool]] = None
+    
+    @staticmethod
+    def outer_config_files() -> List[Path]:
+        """Global and system config files git reads before the repository config."""
+        files = []
+        if not os.environ.get('GIT_CONFIG_NOSYSTEM'):
+            if os.environ.get('GIT_CONFIG_SYSTEM'):
+                files.append(Path(os.environ['GIT_CONFIG_SYSTEM']))
+            else:
+                files.append(Path('/etc/gitconfig'))
+                git = shutil.which('git')
+                if git:
+                    # Builds with a non-/usr prefix (Homebrew, /usr/local) read <prefix>/etc/gitconfig
+                    files.append(Path(os.path.realpath(git)).parent.parent / 'etc' / 'gitconfig')
+        if os.environ.get('GIT_CONFIG_GLOBAL'):
+            files.append(Path(os.environ['GIT_CONFIG_GLOBAL']))
+        else:
+            xdg = os.environ.get('XDG_CONFIG_HOME') or str(Path.home() / '.config')
+            files.append(Path(xdg) / 'git' / 'config')
+            files.append(Path.home() / '.gitconfig')
+        return files
+    
+    @classmethod
+    def outer_config_rewrites_urls(cls) -> bool:
+        """
+        True when global/system config may rewrite remote URLs (insteadOf, pushInsteadOf)
+        or pulls in other files via include, so remotes must come from git itself.
+        The scan is cached until one of the files changes.
+        """
+        if os.environ.get('GIT_CONFIG_PARAMETERS') or os.environ.get('GIT_CONFIG_COUNT'):
+            return True
+        stamps = []
+        for path in cls.outer_config_files():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            except OSError:
+                return True
+            stamps.append((str(path), stat.st_mtime_ns, stat.st_size, stat.st_ino))
+        stamps = tuple(stamps)
+        cached = cls._outer_config_cache
+        if cached is not None and cached[0] == stamps:
+            return cached[1]
+        
+        rewrites = False
+        for path, *_ in stamps:
+            try:
+                text = Path(path).read_text(errors='replace')
+            except OSError:
+                rewrites = True
+                break
+            if re.search(r'insteadof|^\s*\[\s*include', text, re.IGNORECASE | re.MULTILINE):
+                rewrites = True
+                break
+        cls._outer_config_cache = (stamps, rewrites)
+        return rewrites
+    
+    @staticmethod
+    def _resolve_gitfile(path: Path) -> Optional[Path]:
+        """Follow a 'gitdir: <path>' file to the real git directory."""
+        if path.is_dir():
+            return path
+        try:
+            content = path.read_text().strip()
+        except OSError:
+            return None
+        if not content.startswith('gitdir:'):
+            return None
+        target = Path(content[len('gitdir:'):].strip())
+        return target if target.is_absolute() else path.parent / target
+    
+    @staticmethod
+    def _resolve_common_dir(git_dir: Path) -> Path:
+        """Return the directory holding shared refs and config (differs for linked worktrees)."""
+        try:
+            common = Path((git_dir / 'commondir').read_text().strip())
+        except OSError:
+            return git_dir
+        return common if common.is_absolute() else git_dir / common
+    
+    @property
+    def config_file(self) -> Optional[Path]:
+        """Path of the repository's config file."""
+        return self.common_dir / 'config' if self.common_dir else None
+    
+    def read_head(self) -> Optional[str]:
+        """Raw contents of HEAD: 'ref: refs/heads/<name>' or a commit id."""
+        if not self.git_dir:
+            return None
+        try:
+            return (self.git_dir / 'HEAD').read_text().strip()
+        except OSError:
+            return None
+    
+    def resolve_ref(self, ref: str) -> Optional[str]:
+        """Resolve a full ref name (e.g. 'refs/heads/main') via loose refs, then packed-refs."""
+        if not self.common_dir or (self.common_dir / 'reftable').is_dir():
+            return None
+        try:
+            return (self.common_dir / ref).read_text().strip()
+        except OSError:
+            pass
+        try:
+            with open(self.common_dir / 'packed-refs') as f:
+                for line in f:
+                    if line.startswith(('#', '^')):
+                        continue
+                    parts = line.split()
+                    if len(parts) == 2 and parts[1] == ref:
+                        return parts[0]
+        except OSError:
+            pass
+        return None
+    
+    def get_current_branch(self) -> Optional[str]:
+        """
+        Current branch name, or 'HEAD' when detached (like 'git rev-parse --abbrev-ref HEAD').
+        Returns None for unborn branches and unknown layouts.
+        """
+        head = self.read_head()
+        if not head:
+            return None
+        if not head.startswith('ref:'):
+            return 'HEAD'
+        ref = head[len('ref:'):].strip()
+        if not ref.startswith('refs/heads/') or self.resolve_ref(ref) is None:
+            return None
+        return ref[len('refs/heads/'):]
+    
+    def _load_config(self) -> Optional[Dict[str, Dict[str, List[str]]]]:
+        """
+        Parse the repository config into {section: {key: [values]}}.
+        Section names look like 'remote "origin"'; keys are lower-cased.
+        """
+        if self._config_loaded:
+            return self._config
+        self._config_loaded = True
+        
+        if self.read_head() is None:
+            # Not a repository we understand
+            return None
+        try:
+            with open(self.config_file) as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            lines = []
+        except OSError:
+            return None
+        
+        config: Dict[str, Dict[str, List[str]]] = {}
+        section = None
+        for raw in lines:
+            line = raw.strip()
+            if not line or line.startswith(('#', ';')):
+                continue
+            if line.startswith('['):
+                header = re.match(r'^\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]\s*(?:[#;].*)?$', line)
+                if not header:
+                    return None
+                name = header.group(1).lower()
+                if header.group(2) is not None:
+                    subsection = re.sub(r'\\(.)', r'\1', header.group(2))
+                    section = f'{name} "{subsection}"'
+                else:
+                    section = name
+                config.setdefault(section, {})
+                continue
+            if section is None or line.endswith('\\'):
+                # Keys outside sections and continued lines are left to git
+                return None
+            key, sep, value = line.partition('=')
+            value = self._parse_value(value) if sep else 'true'
+            if value is None:
+                return None
+            config[section].setdefault(key.strip().lower(), []).append(value)
+        
+        # Includes and URL rewriting change what git reports; let git handle those
+        if any(name == 'include' or name.startswith('includeif') for name in config):
+            return None
+        if any(key.endswith('insteadof') for values in config.values() for key in values):
+            return None
+        
+        self._config = config
+        return config
+    
+    @staticmethod
+    def _parse_value(value: str) -> Optional[str]:
+        """Unquote a config value and strip trailing comments."""
+        result = []
+        in_quotes = False
+        i = 0
+        value = value.strip()
+        while i < len(value):
+            char = value[i]
+            if char == '\\':
+                if i + 1 >= len(value):
+                    return None
+                result.append({'n': '\n', 't': '\t', 'b': '\b'}.get(value[i + 1], value[i + 1]))
+                i += 2
+                continue
+            if char == '"':
+                in_quotes = not in_quotes
+            elif char in '#;' and not in_quotes:
+                break
+            else:
+                result.append(char)
+            i += 1
+        if in_quotes:
+            return None
+        return ''.join(result).strip()
+    
+    def get_remotes(self) -> Optional[Dict[str, str]]:
+        """
+        Map remote names to their first URL, sorted by name like 'git remote -v'.
+        Returns None when the config cannot be read reliably, including when
+        global or system config may rewrite the URLs.
+        """
+        config = self._load_config()
+        if config is None or self.outer_config_rewrites_urls():
+            return None
+        remotes = {}
+        for section in sorted(config):
+            if section.startswith('remote "'):
+                urls = config[section].get('url')
+                if urls:
+                    remotes[section[len('remote "'):-1]] = urls[0]
+        return remotes
+    
+    def get_config_value(self, section: str, key: str) -> Optional[str]:
+        """Last value of a plain section's key (e.g. 'core', 'hooksPath'), or None if unset or unreadable."""
+        config = self._load_config()
+        if config is None:
+            return None
+        values = config.get(section.lower(), {}).get(key.lower())
+        return values[-1] if values else None
+
 
 class RepoIdentifier:
     """Extracts and normalizes repository identifiers from git remotes."""
     
-    def __init__(self, git_dir: Optional[Path] = None):
+    def __init__(self, git_dir: Optional[Path] = None, work_tree: Optional[Path] = None):
         """
         Initialize with a git directory path.
         If None, will attempt to find repo from current directory.
+        work_tree overrides the repo root (defaults to the parent of git_dir).
         """
         self.git_dir = git_dir or self._find_git_repo()
-    
-    def _find_git_repo(self, start_path: Optional[Path] = None) -> Optional[Path]:
+        self.work_tree = work_tree
+        self._metadata: Optional[GitMetadataReader] = None
+    
+    @property
+    def metadata(self) -> Optional[GitMetadataReader]:
+        """Subprocess-free reader for this repository's metadata."""
+        if self._metadata is None and self.git_dir:
+            self._metadata = GitMetadataReader(self.git_dir)
+        return self._metadata
+    
+    @staticmethod
+    def _find_git_repo(start_path: Optional[Path] = None) -> Optional[Path]:
         """Find .git directory starting from start_path or current directory."""
         if start_path is None:
             start_path = Path.cwd()
@@ -48,13 +475,19 @@ class RepoIdentifier:
         if not self.git_dir:
             return None
         
+        remotes = self.metadata.get_remotes()
+        if remotes is not None:
+            return remotes.get(remote_name)
+        
+        cmd = ['git', '--git-dir', str(self.git_dir), 'remote', 'get-url', remote_name]
         try:
-            result = subprocess.run(
-                ['git', '--git-dir', str(self.git_dir), 'remote', 'get-url', remote_name],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            with trace_phase('subprocess', cmd=cmd):
+                result = subprocess.run(
+                    cmd,
+                    capture_output=True,
+                    text=True,
+                    check=True
+                )
             return result.stdout.strip()
         except (subprocess.CalledProcessError, FileNotFoundError):
             return None
@@ -64,13 +497,19 @@ class RepoIdentifier:
         if not self.git_dir:
             return {}
         
+        remotes = self.metadata.get_remotes()
+        if remotes is not None:
+            return remotes
+        
+        cmd = ['git', '--git-dir', str(self.git_dir), 'remote', '-v']
         try:
-            result = subprocess.run(
-                ['git', '--git-dir', str(self.git_dir), 'remote', '-v'],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            with trace_phase('subprocess', cmd=cmd):
+                result = subprocess.run(
+                    cmd,
+                    capture_output=True,
+                    text=True,
+                    check=True
+                )
             remotes = {}
             for line in result.stdout.strip().split('\n'):
                 if line:
@@ -155,8 +594,8 @@ class RepoIdentifier:
             # Not in a repo at all
             return 'local/unknown'
         
-        # Get the repo root directory (parent of .git)
-        repo_root = self.git_dir.parent
+        # Get the repo root directory (parent of .git unless the work tree is known)
+        repo_root = self.work_tree or self.git_dir.parent
         
         # Use directory name
         repo_name = repo_root.name
@@ -188,25 +627,148 @@ class RepoIdentifier:
         return identifier
 
 
+@dataclass(frozen=True)
+class RepoSettings:
+    """
+    Fully resolved settings for one repository (repo → default → fallback).
+    Built once per repo id by ConfigManager.get_settings(), with paths expanded
+    and lists split, so hot paths pay one attribute access per setting.
+    """
+    
+    repo_id: Optional[str]
+    workspace_base: Path
+    tools_library_path: Path
+    standard_branches: FrozenSet[str]
+    prefix_pattern: str
+    separator: str
+    number_pattern: str
+    description_pattern: str
+    link_locations: Tuple[Path, ...]
+    link_filename: str
+    tools_to_link: Tuple[str, ...]
+    link_workers: int
+    ticket_patterns: Tuple[str, ...]
+    exclude_branches: Tuple[str, ...]
+    link_mode: str
+    tool_link_modes: Tuple[Tuple[str, str], ...]
+    
+    DEFAULT_LINK_WORKERS = 8
+    
+    @classmethod
+    def from_config(cls, config: 'ConfigManager', repo_id: Optional[str]) -> 'RepoSettings':
+        """Resolve every setting for repo_id through ConfigManager's inheritance rules."""
+        locations = config.get('links', 'current_ticket_link_locations', repo_id=repo_id, fallback='')
+        return cls(
+            repo_id=repo_id,
+            workspace_base=config.get_path('paths', 'workspace_base', repo_id=repo_id),
+            tools_library_path=config.get_path('paths', 'tools_library_path', repo_id=repo_id),
+            standard_branches=frozenset(config.get_list('branches', 'standard_branches', repo_id=repo_id)),
+            prefix_pattern=config.get('ticket_pattern', 'prefix_pattern', repo_id=repo_id),
+            separator=config.get('ticket_pattern', 'separator', repo_id=repo_id),
+            number_pattern=config.get('ticket_pattern', 'number_pattern', repo_id=repo_id),
+            description_pattern=config.get('ticket_pattern', 'description_pattern', repo_id=repo_id),
+            link_locations=tuple(
+                Path(os.path.expanduser(loc.strip()))
+                for loc in locations.split(',')
+                if loc.strip()
+            ),
+            link_filename=config.get('links', 'current_ticket_link_filename', repo_id=repo_id,
+                                     fallback='CurrentTicket') or 'CurrentTicket',
+            tools_to_link=tuple(config.get_list('links', 'tools_to_link', repo_id=repo_id)),
+            link_workers=cls._parse_workers(config.get('links', 'link_workers', repo_id=repo_id, fallback='')),
+            # One regex per line, since patterns may contain commas
+            ticket_patterns=tuple(
+                line.strip()
+                for line in config.get('ticket_pattern', 'patterns', repo_id=repo_id, fallback='').splitlines()
+                if line.strip()
+            ),
+            exclude_branches=tuple(
+                line.strip()
+                for line in config.get('branches', 'exclude_branches', repo_id=repo_id, fallback='').splitlines()
+                if line.strip()
+            ),
+            link_mode=(config.get('links', 'link_mode', repo_id=repo_id, fallback='') or 'symlink').strip().lower(),
+            # 'tool:mode' pairs, e.g. 'venv:copy, scripts:hardlink'
+            tool_link_modes=tuple(
+                (tool.strip(), mode.strip().lower())
+                for tool, _, mode in (
+                    item.rpartition(':') for item in config.get_list('links', 'tool_link_modes', repo_id=repo_id)
+                )
+                if tool.strip()
+            ),
+        )
+    
+    @classmethod
+    def _parse_workers(cls, value: str) -> int:
+        """Worker count for link updates; invalid or missing values use the default."""
+        try:
+            return max(1, int(value))
+        except (TypeError, ValueError):
+            return cls.DEFAULT_LINK_WORKERS
+
+
 class ConfigManager:
-    """Manages configuration file using configparser."""
+    """
+    Manages configuration file using configparser.
+    Reads are served from a marshal snapshot of the parsed sections stored next
+    to config.ini, which is rebuilt whenever the file's mtime, size or inode change.
+    """
     
     DEFAULT_CONFIG_DIR = Path.home() / ".sidecar"
     DEFAULT_CONFIG_FILE = DEFAULT_CONFIG_DIR / "config.ini"
+    SNAPSHOT_SUFFIX = ".snapshot"
+    LOCK_SUFFIX = ".lock"
+    # Longest a writer waits for another process's config write (readers never wait)
+    LOCK_TIMEOUT = 10.0
+    # Bump when the snapshot layout changes; the Python version guards marshal's format
+    SNAPSHOT_VERSION = (1, sys.version_info[:2])
+    # A config.ini rewritten within this window may repeat an earlier (mtime, size, inode)
+    # stamp on coarse-timestamp filesystems, so it is not snapshotted until it ages
+    RACY_SECONDS = 2
     
     def __init__(self, config_file: Optional[Path] = None, repo_id: Optional[str] = None):
         self.config_file = config_file or self.DEFAULT_CONFIG_FILE
-        self.config = configparser.ConfigParser()
+        self._parser: Optional[configparser.ConfigParser] = None
+        self._sections: Dict[str, Dict[str, str]] = {}
+        self._settings: Dict[Optional[str], RepoSettings] = {}
+        self._batch_depth = 0
+        self._batch_dirty = False
+        # Changes made since config.ini was loaded, replayed if another process writes first
+        self._pending: List[Tuple[str, ...]] = []
+        self._loaded_stamp: Optional[Tuple[int, int, int]] = None
         self._repo_id = repo_id
         self._ensure_config_exists()
         self._load_config()
     
-    def get_current_repo_id(self, git_dir: Optional[Path] = None) -> Optional[str]:
+    @property
+    def config(self) -> configparser.ConfigParser:
+        """Full ConfigParser for config.ini, only parsed when first needed (e.g. for writes)."""
+        if self._parser is None:
+            self._parser = configparser.ConfigParser()
+            self._parser.read(self.config_file)
+        return self._parser
+    
+    @property
+    def snapshot_file(self) -> Path:
+        """Path of the compiled snapshot next to config.ini."""
+        return self.config_file.with_name(self.config_file.name + self.SNAPSHOT_SUFFIX)
+    
+    def with_repo(self, repo_id: Optional[str]) -> 'ConfigManager':
+        """
+        Return a ConfigManager for another repo context that shares this instance's
+        loaded snapshot, so no file is read again.
+        """
+        view = copy.copy(self)
+        view._repo_id = repo_id
+        view._pending = list(self._pending)
+        return view
+    
+    def get_current_repo_id(self, git_dir: Optional[Path] = None, work_tree: Optional[Path] = None) -> Optional[str]:
         """
         Detect and return the current repository identifier.
         Uses RepoIdentifier to detect from current directory or provided git_dir.
         """
-        repo_identifier = RepoIdentifier(git_dir)
+        repo_identifier = RepoIdentifier(git_dir, work_tree)
         return repo_identifier.get_repo_identifier()
     
     def get_effective_repo_id(self, git_dir: Optional[Path] = None) -> Optional[str]:
@@ -234,7 +796,8 @@ class ConfigManager:
         }
         
         self.config['default.branches'] = {
-            'standard_branches': 'main, master, develop, stage, production'
+            'standard_branches': 'main, master, develop, stage, production',
+            'exclude_branches': 'release/*\nhotfix/*\ndependabot/*\nrenovate/*'
         }
         
         self.config['default.ticket_pattern'] = {
@@ -252,14 +815,169 @@ class ConfigManager:
         
         self._save_config()
     
+    def _file_stamp(self) -> Optional[Tuple[int, int, int]]:
+        """Identify the current config.ini contents by (mtime_ns, size, inode)."""
+        try:
+            stat = self.config_file.stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    
     def _load_config(self):
-        """Load configuration from file."""
-        self.config.read(self.config_file)
+        """Load configuration from the snapshot, parsing config.ini only when it changed."""
+        self._parser = None
+        # A new dict, so views created by with_repo() keep settings matching their own snapshot
+        self._settings = {}
+        self._pending = []
+        # Stat before parsing, so a concurrent edit leaves a stale stamp rather than stale data
+        with trace_phase('config_load', file=self.config_file):
+            stamp = self._file_stamp()
+            self._loaded_stamp = stamp
+            sections = self._read_snapshot(stamp)
+            if sections is None:
+                with trace_phase('config_parse', file=self.config_file):
+                    sections = self._sections_from_parser(self.config)
+                self._write_snapshot(stamp, sections)
+        self._sections = sections
+    
+    @staticmethod
+    def _section_values(parser: configparser.ConfigParser, section: str) -> Dict[str, str]:
+        """Values of one section with interpolation applied where possible."""
+        values = {}
+        for key in parser.options(section):
+            try:
+                values[key] = parser.get(section, key)
+            except configparser.InterpolationError:
+                values[key] = parser.get(section, key, raw=True)
+        return values
+    
+    @classmethod
+    def _sections_from_parser(cls, parser: configparser.ConfigParser) -> Dict[str, Dict[str, str]]:
+        """Flatten a parser into {section: {key: value}}."""
+        return {section: cls._section_values(parser, section) for section in parser.sections()}
+    
+    def _read_snapshot(self, stamp: Optional[Tuple[int, int, int]]) -> Optional[Dict[str, Dict[str, str]]]:
+        """Return snapshot sections if the snapshot matches stamp, None otherwise."""
+        if stamp is None:
+            return None
+        try:
+            with open(self.snapshot_file, 'rb') as f:
+                data = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if not isinstance(data, dict):
+            return None
+        if data.get('version') != self.SNAPSHOT_VERSION or data.get('stamp') != stamp:
+            return None
+        return data.get('sections')
+    
+    def _write_snapshot(self, stamp: Optional[Tuple[int, int, int]], sections: Dict[str, Dict[str, str]]):
+        """Store sections atomically; failures only cost a re-parse next time."""
+        if stamp is None or time.time_ns() - stamp[0] < self.RACY_SECONDS * 1_000_000_000:
+            return
+        tmp_file = self.snapshot_file.with_name(f"{self.snapshot_file.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_file, 'wb') as f:
+                marshal.dump({'version': self.SNAPSHOT_VERSION, 'stamp': stamp, 'sections': sections}, f)
+            os.replace(tmp_file, self.snapshot_file)
+        except OSError:
+            try:
+                tmp_file.unlink()
+            except OSError:
+                pass
     
     def _save_config(self):
-        """Save configuration to file."""
-        with open(self.config_file, 'w') as f:
-            self.config.write(f)
+        """
+        Save configuration to file atomically (temp file + os.replace) and refresh
+        the in-memory sections and snapshot from the parser, without re-reading the file.
+        """
+        # Write through symlinks (e.g. dotfile managers) instead of replacing them
+        target = Path(os.path.realpath(self.config_file))
+        tmp_file = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        with FileLock(target.with_name(target.name + self.LOCK_SUFFIX), self.LOCK_TIMEOUT):
+            if self._file_stamp() != self._loaded_stamp:
+                # Another process wrote config.ini since we loaded it: replay our changes on top
+                parser = configparser.ConfigParser()
+                parser.read(self.config_file)
+                for change in self._pending:
+                    self._apply_change(parser, change)
+                self._parser = parser
+            try:
+                with open(tmp_file, 'w') as f:
+                    self.config.write(f)
+                try:
+                    os.chmod(tmp_file, stat_module.S_IMODE(os.stat(target).st_mode))
+                except OSError:
+                    pass
+                # os.replace keeps the temp file's inode and mtime, so this is the final stamp
+                stat = os.stat(tmp_file)
+                os.replace(tmp_file, target)
+            except BaseException:
+                try:
+                    tmp_file.unlink()
+                except OSError:
+                    pass
+                raise
+        
+        self._pending = []
+        self._loaded_stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        sections = self._sections_from_parser(self.config)
+        self._write_snapshot((stat.st_mtime_ns, stat.st_size, stat.st_ino), sections)
+        self._sections = sections
+        self._settings = {}
+    
+    @staticmethod
+    def _apply_change(parser: configparser.ConfigParser, change: Tuple[str, ...]):
+        """Apply a recorded ('set', section, key, value) or ('remove', section) change."""
+        if change[0] == 'set':
+            _, section, key, value = change
+            if not parser.has_section(section):
+                parser.add_section(section)
+            parser.set(section, key, value)
+        elif change[0] == 'remove':
+            parser.remove_section(change[1])
+    
+    def _change(self, change: Tuple[str, ...]):
+        """Apply a change to the loaded config and commit it."""
+        self._apply_change(self.config, change)
+        self._pending.append(change)
+        self._commit(change[1])
+    
+    def _commit(self, section: str):
+        """Persist a change to section now, or record it for the enclosing batch()."""
+        if not self._batch_depth:
+            self._save_config()
+            return
+        if self.config.has_section(section):
+            self._sections[section] = self._section_values(self.config, section)
+        else:
+            self._sections.pop(section, None)
+        self._settings = {}
+        self._batch_dirty = True
+    
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Group several set()/remove_repo_config() calls into a single write.
+        Changes are visible to reads right away, written to config.ini once when the
+        outermost batch exits, and discarded if it raises.
+        """
+        if self._batch_depth == 0:
+            # Copy, so views from with_repo() never see uncommitted changes
+            self._sections = dict(self._sections)
+            self._batch_dirty = False
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._load_config()
+            raise
+        self._batch_depth -= 1
+        if self._batch_depth == 0 and self._batch_dirty:
+            self._batch_dirty = False
+            self._save_config()
     
     def get(self, section: str, key: str, fallback: Optional[str] = None, repo_id: Optional[str] = None) -> str:
         """
@@ -277,20 +995,22 @@ class ConfigManager:
         # Use instance repo_id if not provided
         effective_repo_id = repo_id if repo_id is not None else self._repo_id
         
+        # Keys are stored lower-cased, like configparser's optionxform
+        key = key.lower()
+        
         # If repo_id available, try repo-specific first
         if effective_repo_id:
-            repo_section = f"repo:{effective_repo_id}"
-            if self.config.has_section(repo_section):
+            repo_values = self._sections.get(f"repo:{effective_repo_id}")
+            if repo_values is not None:
                 # Try dot notation key (e.g., "paths.workspace_base")
-                dot_key = f"{section}.{key}"
-                if self.config.has_option(repo_section, dot_key):
-                    return self.config.get(repo_section, dot_key)
+                value = repo_values.get(f"{section}.{key}")
+                if value is not None:
+                    return value
         
         # Try default section
-        default_section = f"default.{section}"
-        if self.config.has_section(default_section):
-            if self.config.has_option(default_section, key):
-                return self.config.get(default_section, key)
+        default_values = self._sections.get(f"default.{section}")
+        if default_values is not None and key in default_values:
+            return default_values[key]
         
         return fallback or ''
     
@@ -311,6 +1031,19 @@ class ConfigManager:
             return [item.strip() for item in value.split(',') if item.strip()]
         return fallback or []
     
+    def get_settings(self, repo_id: Optional[str] = None) -> RepoSettings:
+        """
+        Get resolved settings for a repo (uses instance repo_id if not provided).
+        An empty repo_id selects the defaults regardless of the instance repo_id.
+        Cached until the configuration is changed through set() or remove_repo_config().
+        """
+        effective_repo_id = repo_id if repo_id is not None else self._repo_id
+        settings = self._settings.get(effective_repo_id)
+        if settings is None:
+            settings = RepoSettings.from_config(self, effective_repo_id)
+            self._settings[effective_repo_id] = settings
+        return settings
+    
     def set(self, section: str, key: str, value: str, repo_id: Optional[str] = None, default: bool = False):
         """
         Set a configuration value.
@@ -333,28 +1066,20 @@ class ConfigManager:
             target_section = section
             target_key = key
         
-        if not self.config.has_section(target_section):
-            self.config.add_section(target_section)
-        self.config.set(target_section, target_key, value)
-        self._save_config()
-        self._load_config()
+        self._change(('set', target_section, target_key, value))
     
     def get_repo_config(self, repo_id: str) -> Dict[str, str]:
         """Get all configuration for a specific repo."""
-        repo_section = f"repo:{repo_id}"
-        if self.config.has_section(repo_section):
-            return dict(self.config.items(repo_section))
-        return {}
+        return dict(self._sections.get(f"repo:{repo_id}", {}))
     
     def repo_is_configured(self, repo_id: str) -> bool:
         """Check if a repo has a specific configuration section."""
-        repo_section = f"repo:{repo_id}"
-        return self.config.has_section(repo_section) and len(self.config.items(repo_section)) > 0
+        return len(self._sections.get(f"repo:{repo_id}", {})) > 0
     
     def list_configured_repos(self) -> List[str]:
         """List all repo identifiers that have configuration sections."""
         repos = []
-        for section in self.config.sections():
+        for section in self._sections:
             if section.startswith('repo:'):
                 repo_id = section[5:]  # Remove 'repo:' prefix
                 repos.append(repo_id)
@@ -363,10 +1088,8 @@ class ConfigManager:
     def remove_repo_config(self, repo_id: str) -> bool:
         """Remove configuration section for a specific repo."""
         repo_section = f"repo:{repo_id}"
-        if self.config.has_section(repo_section):
-            self.config.remove_section(repo_section)
-            self._save_config()
-            self._load_config()
+        if repo_section in self._sections and self.config.has_section(repo_section):
+            self._change(('remove', repo_section))
             return True
         return False
     
@@ -382,14 +1105,14 @@ class ConfigManager:
         result = []
         
         # Sort sections for consistent output
-        sections = sorted(self.config.sections())
+        sections = sorted(self._sections)
         
         if default_only:
             # Show only default sections
             for section in sections:
                 if section.startswith('default.'):
                     result.append(f"[{section}]")
-                    for key, value in sorted(self.config.items(section)):
+                    for key, value in sorted(self._sections[section].items()):
                         result.append(f"{key} = {value}")
                     result.append("")
         elif repo_id:
@@ -398,21 +1121,21 @@ class ConfigManager:
             for section in sections:
                 if section.startswith('default.'):
                     result.append(f"[{section}]")
-                    for key, value in sorted(self.config.items(section)):
+                    for key, value in sorted(self._sections[section].items()):
                         result.append(f"{key} = {value}")
                     result.append("")
             # Then show repo-specific
             repo_section = f"repo:{repo_id}"
-            if self.config.has_section(repo_section):
+            if repo_section in self._sections:
                 result.append(f"[{repo_section}]")
-                for key, value in sorted(self.config.items(repo_section)):
+                for key, value in sorted(self._sections[repo_section].items()):
                     result.append(f"{key} = {value}")
                 result.append("")
         elif all_repos:
             # Show everything
             for section in sections:
                 result.append(f"[{section}]")
-                for key, value in sorted(self.config.items(section)):
+                for key, value in sorted(self._sections[section].items()):
                     result.append(f"{key} = {value}")
                 result.append("")
         else:
@@ -422,15 +1145,15 @@ class ConfigManager:
             for section in sections:
                 if section.startswith('default.'):
                     result.append(f"[{section}]")
-                    for key, value in sorted(self.config.items(section)):
+                    for key, value in sorted(self._sections[section].items()):
                         result.append(f"{key} = {value}")
                     result.append("")
             # Show current repo if configured
             if current_repo:
                 repo_section = f"repo:{current_repo}"
-                if self.config.has_section(repo_section):
+                if repo_section in self._sections:
                     result.append(f"[{repo_section}]")
-                    for key, value in sorted(self.config.items(repo_section)):
+                    for key, value in sorted(self._sections[repo_section].items()):
                         result.append(f"{key} = {value}")
                     result.append("")
         
@@ -440,15 +1163,20 @@ class ConfigManager:
 class BranchAnalyzer:
     """Analyzes git branch names to extract ticket information."""
     
+    # Numbered backreferences (\1) and conditionals ((?(1)...)); escaped backslashes are skipped
+    NUMBERED_REFERENCE = re.compile(r'(?P<ref>\\[1-9]|\(\?\(\d)|\\.')
+    
     def __init__(self, config: ConfigManager):
         self.config = config
-        self.standard_branches = config.get_list('branches', 'standard_branches')
+        settings = config.get_settings()
+        self.standard_branches = settings.standard_branches
+        self.excluded_names, self.exclude_pattern = self.compile_exclusions(settings.exclude_branches)
         
         # Build regex pattern from config
-        prefix_pattern = config.get('ticket_pattern', 'prefix_pattern')
-        separator = config.get('ticket_pattern', 'separator')
-        number_pattern = config.get('ticket_pattern', 'number_pattern')
-        description_pattern = config.get('ticket_pattern', 'description_pattern')
+        prefix_pattern = settings.prefix_pattern
+        separator = settings.separator
+        number_pattern = settings.number_pattern
+        description_pattern = settings.description_pattern
         
         # Escape separator for regex (except for character class)
         if separator.startswith('[') and separator.endswith(']'):
@@ -456,41 +1184,469 @@ class BranchAnalyzer:
         else:
             sep_pattern = re.escape(separator)
         
-        self.pattern = re.compile(
-            rf"^({prefix_pattern})({sep_pattern})({number_pattern})({sep_pattern})({description_pattern})$"
-        )
+        # Configured patterns are tried in order, then the prefix/separator/number/description one
+        self.patterns = list(settings.ticket_patterns) + [
+            rf"(?P<prefix>{prefix_pattern}){sep_pattern}(?P<number>{number_pattern}){sep_pattern}"
+            rf"(?P<description>{description_pattern})"
+        ]
+        self.pattern = self.compile_patterns(self.patterns)
+    
+    @staticmethod
+    def compile_patterns(patterns: List[str]) -> 're.Pattern':
+        """
+        Compile ticket patterns into one anchored alternation. Each pattern must define
+        the named groups 'prefix' and 'number' ('description' is optional); they are
+        renamed to t<i>_<group> and each alternative is wrapped in a group t<i>,
+        so match.lastgroup tells which pattern matched. Wrapping renumbers unnamed
+        groups, so numbered backreferences are rejected; (?P=name) still works.
+        """
+        alternatives = []
+        for index, pattern in enumerate(patterns):
+            groups = re.compile(pattern).groupindex
+            if 'prefix' not in groups or 'number' not in groups:
+                raise ValueError(f"Ticket pattern must define (?P<prefix>...) and (?P<number>...): {pattern}")
+            if any(match.group('ref') for match in BranchAnalyzer.NUMBERED_REFERENCE.finditer(pattern)):
+                raise ValueError(f"Ticket pattern must use named backreferences (?P=name), not numbered ones: {pattern}")
+            renamed = re.sub(r'\(\?P([<=])(\w+)', rf'(?P\1t{index}_\2', pattern)
+            alternatives.append(f"(?P<t{index}>{renamed})")
+        return re.compile(rf"^(?:{'|'.join(alternatives)})$")
+    
+    @staticmethod
+    def compile_exclusions(rules: Iterable[str]) -> Tuple[FrozenSet[str], Optional['re.Pattern']]:
+        """
+        Split branch exclusion rules into a set of exact names and one compiled regex.
+        Rules starting with 're:' are regexes matched from the start of the name;
+        rules with glob characters (*, ?, [) are fnmatch globs; anything else is exact.
+        """
+        names = set()
+        alternatives = []
+        for rule in rules:
+            if rule.startswith('re:'):
+                regex = rule[3:]
+                re.compile(regex)
+                alternatives.append(f"(?:{regex})")
+            elif any(char in rule for char in '*?['):
+                alternatives.append(fnmatch.translate(rule))
+            else:
+                names.add(rule)
+        pattern = re.compile('|'.join(alternatives)) if alternatives else None
+        return frozenset(names), pattern
     
     def is_standard_branch(self, branch_name: str) -> bool:
         """Check if branch is a standard branch (main, master, etc.)."""
         return branch_name in self.standard_branches
     
+    def is_excluded_branch(self, branch_name: str) -> bool:
+        """Check if branch matches an exclusion rule (release/*, dependabot/*, etc.)."""
+        if branch_name in self.excluded_names:
+            return True
+        return self.exclude_pattern is not None and self.exclude_pattern.match(branch_name) is not None
+    
     def extract_ticket_info(self, branch_name: str) -> Optional[Dict[str, str]]:
         """
         Extract ticket information from branch name.
-        Returns dict with 'prefix', 'number', 'description' or None if not a ticket.
+        Returns dict with 'prefix', 'number', 'description' and 'pattern' (index of the
+        matching entry in self.patterns) or None if not a ticket.
         """
         match = self.pattern.match(branch_name)
         if match:
+            # The alternative's wrapping group closes last
+            name = match.lastgroup
+            description = f"{name}_description"
             return {
-                'prefix': match.group(1),
-                'number': match.group(3),
-                'description': match.group(5),
-                'full': branch_name
+                'prefix': match.group(f"{name}_prefix"),
+                'number': match.group(f"{name}_number"),
+                'description': (match.group(description) or '') if description in self.pattern.groupindex else '',
+                'full': branch_name,
+                'pattern': int(name[1:])
             }
         return None
     
-    def get_current_branch(self) -> Optional[str]:
-        """Get current git branch name."""
+    def get_current_branch(self, git_dir: Optional[Path] = None) -> Optional[str]:
+        """
+        Get current git branch name.
+        Uses the repository of the current directory unless git_dir is given.
+        Reads HEAD directly and only runs git for layouts the reader cannot handle.
+        """
+        metadata_dir = git_dir or RepoIdentifier._find_git_repo()
+        if metadata_dir:
+            branch = GitMetadataReader(metadata_dir).get_current_branch()
+            if branch:
+                return branch
+        
+        cmd = ['git', 'rev-parse', '--abbrev-ref', 'HEAD']
+        if git_dir:
+            cmd[1:1] = ['--git-dir', str(git_dir)]
         try:
-            result = subprocess.run(
-                ['git', 'rev-parse', '--abbrev-ref', 'HEAD'],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            with trace_phase('subprocess', cmd=cmd):
+                result = subprocess.run(
+                    cmd,
+                    capture_output=True,
+                    text=True,
+                    check=True
+                )
             return result.stdout.strip()
         except (subprocess.CalledProcessError, FileNotFoundError):
             return None
+    
+    def list_local_branches(self, git_dir: Optional[Path] = None) -> Optional[List[str]]:
+        """
+        List every local branch with a single 'git for-each-ref' call.
+        Uses the repository of the current directory unless git_dir is given.
+        Returns None if git fails.
+        """
+        cmd = ['git', 'for-each-ref', '--format=%(refname:short)', 'refs/heads/']
+        if git_dir:
+            cmd[1:1] = ['--git-dir', str(git_dir)]
+        try:
+            with trace_phase('subprocess', cmd=cmd):
+                result = subprocess.run(
+                    cmd,
+                    capture_output=True,
+                    text=True,
+                    check=True
+                )
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            return None
+        return [line for line in result.stdout.splitlines() if line]
+
+
+class TicketIndex:
+    """
+    On-disk index of a workspace's ticket directories keyed by normalized (prefix, number).
+    Stored in SQLite under the config directory and reconciled against the workspace
+    directory's mtime, so a lookup does not scan the workspace unless it changed.
+    """
+    
+    SEPARATORS = '-_'
+    # Longest a checkout waits for another one resolving a ticket in the same workspace
+    LOCK_TIMEOUT = 10.0
+    # With whole-second timestamps, a change later in the same tick keeps the mtime
+    RACY_SECONDS = 2
+    # Readers wait this long for a concurrent index write to commit
+    BUSY_TIMEOUT = 1.0
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS tickets (key TEXT PRIMARY KEY, name TEXT NOT NULL) WITHOUT ROWID",
+        "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID",
+    )
+    
+    def __init__(self, workspace_base: Path, index_dir: Path):
+        self.workspace_base = workspace_base
+        digest = hashlib.sha1(str(workspace_base).encode()).hexdigest()
+        self.index_file = index_dir / f"{digest}.sqlite"
+        self.lock_file = index_dir / f"{digest}.lock"
+        # Stamp of the workspace the index was last confirmed to match
+        self._known_stamp: Optional[str] = None
+        self._lock_held = False
+    
+    @contextlib.contextmanager
+    def lock(self, timeout: Optional[float] = None):
+        """
+        Hold the workspace lock, serializing ticket directory resolution and index
+        writes across processes. Lookups without the lock never wait for it.
+        """
+        if self._lock_held:
+            yield
+            return
+        with FileLock(self.lock_file, self.LOCK_TIMEOUT if timeout is None else timeout):
+            self._lock_held = True
+            try:
+                yield
+            finally:
+                self._lock_held = False
+    
+    @contextlib.contextmanager
+    def _write_lock(self):
+        """Yield True if the index may be written: the lock is held or free right now."""
+        if self._lock_held:
+            yield True
+            return
+        try:
+            with self.lock(timeout=0):
+                yield True
+        except TimeoutError:
+            # Another process is resolving a ticket and will update the index itself
+            yield False
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the index database; each call is one short-lived connection."""
+        return sqlite3.connect(str(self.index_file), timeout=self.BUSY_TIMEOUT, isolation_level=None)
+    
+    @staticmethod
+    def make_key(prefix: str, number: str) -> str:
+        """Normalized key; '/' cannot appear in directory names, so keys never collide."""
+        return f"{prefix.lower()}/{number.lower()}"
+    
+    @classmethod
+    def key_for_name(cls, name: str) -> Optional[str]:
+        """
+        The key a directory name is indexed under: its first two '-'/'_'-separated
+        segments, e.g. 'jira/123' for 'JIRA-123-fix_bug'. For a prefix and number
+        without separators this is exactly the (prefix, number) the name matches as
+        '<prefix>[-_]<number>([-_].*)?' (case-insensitive).
+        """
+        segments = re.split(r'[-_]', name, maxsplit=2)
+        if len(segments) < 2 or not segments[0] or not segments[1]:
+            return None
+        return cls.make_key(segments[0], segments[1])
+    
+    def scan(self, prefix: str, number: str) -> Optional[str]:
+        """Find a matching directory by scanning the workspace, without the index."""
+        pattern = re.compile(rf"^{re.escape(prefix)}[-_]{re.escape(number)}([-_].*)?$", re.IGNORECASE)
+        try:
+            with os.scandir(self.workspace_base) as it:
+                names = sorted(entry.name for entry in it if entry.is_dir() and pattern.match(entry.name))
+        except OSError:
+            return None
+        return names[0] if names else None
+    
+    def _workspace_stamp(self) -> Optional[str]:
+        """Identify the workspace contents by mtime and inode, or None if it cannot be trusted."""
+        try:
+            stat = os.stat(self.workspace_base)
+        except OSError:
+            return None
+        if stat.st_mtime_ns % 1_000_000_000 == 0 and time.time() - stat.st_mtime < self.RACY_SECONDS:
+            return None
+        return f"{stat.st_mtime_ns}:{stat.st_ino}"
+    
+    def lookup(self, prefix: str, number: str) -> Optional[str]:
+        """Return the name of the directory for prefix and number, or None."""
+        if any(char in self.SEPARATORS for char in prefix + number):
+            # Only the first two segments are indexed
+            return self.scan(prefix, number)
+        key = self.make_key(prefix, number)
+        stamp = self._workspace_stamp()
+        if stamp is not None and self.index_file.exists():
+            try:
+                with contextlib.closing(self._connect()) as db:
+                    row = db.execute("SELECT value FROM meta WHERE name = 'stamp'").fetchone()
+                    if row is not None and row[0] == stamp:
+                        self._known_stamp = stamp
+                        row = db.execute("SELECT name FROM tickets WHERE key = ?", (key,)).fetchone()
+                        return row[0] if row is not None else None
+            except sqlite3.Error:
+                pass
+        return self.rebuild(stamp).get(key)
+    
+    def rebuild(self, stamp: Optional[str] = None) -> Dict[str, str]:
+        """
+        Rescan the workspace and rewrite the index.
+        stamp must be taken before the scan, so concurrent changes leave it stale.
+        """
+        try:
+            with os.scandir(self.workspace_base) as it:
+                names = sorted(entry.name for entry in it if entry.is_dir())
+        except OSError:
+            return {}
+        
+        entries: Dict[str, str] = {}
+        for name in names:
+            key = self.key_for_name(name)
+            if key is not None:
+                entries.setdefault(key, name)
+        
+        with self._write_lock() as writable:
+            if not writable:
+                return entries
+            try:
+                self.index_file.parent.mkdir(parents=True, exist_ok=True)
+                with contextlib.closing(self._connect()) as db:
+                    for statement in self.SCHEMA:
+                        db.execute(statement)
+                    # One transaction, so a reader never trusts a half-written index
+                    db.execute("BEGIN IMMEDIATE")
+                    try:
+                        db.execute("DELETE FROM tickets")
+                        db.execute("DELETE FROM meta")
+                        db.executemany("INSERT INTO tickets (key, name) VALUES (?, ?)", entries.items())
+                        if stamp is not None:
+                            db.execute("INSERT INTO meta (name, value) VALUES ('stamp', ?)", (stamp,))
+                        db.execute("COMMIT")
+                    except BaseException:
+                        db.execute("ROLLBACK")
+                        raise
+                self._known_stamp = stamp
+            except (sqlite3.Error, OSError):
+                self._known_stamp = None
+        return entries
+    
+    def add(self, name: str):
+        """
+        Record a directory just created in the workspace.
+        Only applied if the index was current at the last lookup; otherwise the
+        next lookup rebuilds it.
+        """
+        if self._known_stamp is None:
+            return
+        key = self.key_for_name(name)
+        new_stamp = self._workspace_stamp()
+        with self._write_lock() as writable:
+            if not writable:
+                return
+            try:
+                with contextlib.closing(self._connect()) as db:
+                    db.execute("BEGIN IMMEDIATE")
+                    try:
+                        row = db.execute("SELECT value FROM meta WHERE name = 'stamp'").fetchone()
+                        if row is None or row[0] != self._known_stamp:
+                            db.execute("ROLLBACK")
+                            return
+                        if key is not None:
+                            db.execute("INSERT OR IGNORE INTO tickets (key, name) VALUES (?, ?)", (key, name))
+                        if new_stamp is not None:
+                            db.execute("UPDATE meta SET value = ? WHERE name = 'stamp'", (new_stamp,))
+                        else:
+                            db.execute("DELETE FROM meta WHERE name = 'stamp'")
+                        db.execute("COMMIT")
+                    except BaseException:
+                        db.execute("ROLLBACK")
+                        raise
+                self._known_stamp = new_stamp
+            except (sqlite3.Error, OSError):
+                self._known_stamp = None
+
+
+class TemplateMaterializer:
+    """
+    Fills a new ticket directory from a template tree, or a tool into a ticket
+    directory. Files are cloned with copy-on-write reflinks where the filesystem
+    supports them, else hardlinked (by default only read-only files, since a hardlink
+    shares in-place edits with its source), else copied. With variables, small UTF-8
+    files containing {{variable}} placeholders are rendered instead; file and
+    directory names may use them too.
+    """
+    
+    # Linux FICLONE ioctl: share the source's extents (btrfs, XFS, bcachefs, ...)
+    FICLONE = 0x40049409
+    # Larger files (data fixtures) are never scanned for placeholders
+    RENDER_MAX_BYTES = 1024 * 1024
+    VARIABLE_PATTERN = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+    
+    def __init__(self, variables: Optional[Dict[str, str]] = None, reflink: bool = True,
+                 hardlink: bool = True, hardlink_writable: bool = False):
+        """
+        Args:
+            variables: Placeholder values; None copies file contents and names verbatim
+            reflink: Try copy-on-write clones first
+            hardlink: Try hardlinks before copying
+            hardlink_writable: Also hardlink files that have write permission
+        """
+        self.variables = variables
+        self.hardlink_writable = hardlink_writable
+        self.counts = {'reflink': 0, 'hardlink': 0, 'copy': 0, 'rendered': 0, 'symlink': 0}
+        # A method the filesystem rejected once is not retried for every file
+        self._reflink_supported = reflink and fcntl is not None and sys.platform.startswith('linux')
+        self._hardlink_supported = hardlink
+    
+    def render(self, text: str) -> str:
+        """Replace known {{variable}} placeholders, leaving unknown ones as they are."""
+        if self.variables is None or '{{' not in text:
+            return text
+        return self.VARIABLE_PATTERN.sub(lambda match: self.variables.get(match.group(1), match.group(0)), text)
+    
+    def render_name(self, name: str) -> str:
+        """
+        Render a file or directory name as a single path component. Separators in
+        values (e.g. 'feat/sub') become underscores; a name rendering to '', '.'
+        or '..' keeps its template spelling.
+        """
+        rendered = self.render(name)
+        if rendered == name:
+            return name
+        for sep in (os.sep, os.altsep):
+            if sep:
+                rendered = rendered.replace(sep, '_')
+        return name if rendered in ('', '.', '..') else rendered
+    
+    def materialize(self, template: Path, target: Path) -> Dict[str, int]:
+        """Recreate template under target. Returns how many entries each method produced."""
+        target.mkdir(parents=True, exist_ok=True)
+        out_dirs = {str(template): target}
+        for root, dirs, files in os.walk(template):
+            out_dir = out_dirs.pop(root)
+            for name in list(dirs):
+                src = Path(root) / name
+                dst = out_dir / self.render_name(name)
+                if src.is_symlink():
+                    # os.walk does not descend into symlinked directories; keep them as links
+                    dirs.remove(name)
+                    self._copy_symlink(src, dst)
+                    continue
+                dst.mkdir(exist_ok=True)
+                shutil.copymode(src, dst)
+                out_dirs[str(src)] = dst
+            for name in files:
+                self.materialize_file(Path(root) / name, out_dir / self.render_name(name))
+        return self.counts
+    
+    def _copy_symlink(self, src: Path, dst: Path):
+        """Recreate a symlink with the same target."""
+        os.symlink(os.readlink(src), dst)
+        self.counts['symlink'] += 1
+    
+    def materialize_file(self, src: Path, dst: Path):
+        """Render, clone, hardlink or copy one file."""
+        src_stat = os.lstat(src)
+        if stat_module.S_ISLNK(src_stat.st_mode):
+            self._copy_symlink(src, dst)
+            return
+        if not stat_module.S_ISREG(src_stat.st_mode):
+            return
+        
+        writable = src_stat.st_mode & 0o222
+        if self.variables is not None and src_stat.st_size <= self.RENDER_MAX_BYTES and self._render_file(src, dst):
+            self.counts['rendered'] += 1
+        elif self._reflink_supported and self._reflink(src, dst):
+            self.counts['reflink'] += 1
+        elif self._hardlink_supported and (self.hardlink_writable or not writable) and self._hardlink(src, dst):
+            self.counts['hardlink'] += 1
+        else:
+            shutil.copyfile(src, dst)
+            shutil.copymode(src, dst)
+            self.counts['copy'] += 1
+    
+    def _render_file(self, src: Path, dst: Path) -> bool:
+        """Write src with its placeholders filled in. Returns False if it has none."""
+        data = src.read_bytes()
+        if b'{{' not in data:
+            return False
+        try:
+            text = data.decode('utf-8')
+        except UnicodeDecodeError:
+            return False
+        rendered = self.render(text)
+        if rendered == text:
+            return False
+        dst.write_bytes(rendered.encode('utf-8'))
+        shutil.copymode(src, dst)
+        return True
+    
+    def _reflink(self, src: Path, dst: Path) -> bool:
+        """Clone src to dst sharing its data blocks. Returns False if unsupported."""
+        try:
+            with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+                fcntl.ioctl(dst_file.fileno(), self.FICLONE, src_file.fileno())
+        except OSError as e:
+            try:
+                dst.unlink()
+            except OSError:
+                pass
+            if e.errno in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS):
+                self._reflink_supported = False
+            return False
+        shutil.copymode(src, dst)
+        return True
+    
+    def _hardlink(self, src: Path, dst: Path) -> bool:
+        """Hardlink dst to src. Returns False if the filesystems do not allow it."""
+        try:
+            os.link(src, dst)
+        except OSError as e:
+            if e.errno in (errno.EXDEV, errno.EPERM, errno.EOPNOTSUPP):
+                self._hardlink_supported = False
+            return False
+        return True
 
 
 class DirectoryManager:
@@ -498,20 +1654,36 @@ class DirectoryManager:
     
     def __init__(self, config: ConfigManager):
         self.config = config
-    
-    def get_workspace_base(self, repo_id: Optional[str] = None) -> Path:
+        self._indexes: Dict[Path, TicketIndex] = {}
+        self._workspace_bases: Dict[Optional[str], Tuple[RepoSettings, Path]] = {}
+    
+    def get_ticket_index(self, workspace_base: Path) -> TicketIndex:
+        """Return the ticket directory index for a workspace base."""
+        index = self._indexes.get(workspace_base)
+        if index is None:
+            index = TicketIndex(workspace_base, self.config.config_file.parent / 'index')
+            self._indexes[workspace_base] = index
+        return index
+    
+    def get_workspace_base(self, repo_id: Optional[str] = None, create: bool = True) -> Path:
         """
         Get workspace base directory for repo-scoped workspaces.
         Returns ~/tickets/<repo_name> if repo is configured, or default workspace_base.
+        The directory is created unless create is False (e.g. when only listing).
+        Memoized per repo until the configuration changes.
         """
         # Get workspace_base from config (repo-specific or default)
-        workspace_base = self.config.get_path('paths', 'workspace_base', repo_id=repo_id)
+        settings = self.config.get_settings(repo_id)
+        cached = self._workspace_bases.get(repo_id)
+        if cached and cached[0] is settings:
+            return cached[1]
+        
+        workspace_base = settings.workspace_base
         
         # Get the global default workspace_base without repo context.
-        # Use a fresh ConfigManager to avoid this instance's repo_id leaking into the lookup
+        # An empty repo_id keeps this instance's repo_id from leaking into the lookup
         # (ConfigManager.get() falls back to self._repo_id when repo_id=None is passed).
-        global_config = ConfigManager(self.config.config_file)
-        default_workspace_base = global_config.get_path('paths', 'workspace_base', fallback='~/tickets')
+        default_workspace_base = self.config.get_settings('').workspace_base
         
         # If repo_id provided and workspace_base matches default (repo not specifically configured),
         # append repo name to make it repo-scoped
@@ -519,7 +1691,10 @@ class DirectoryManager:
             repo_name = self._sanitize_repo_name(repo_id)
             workspace_base = workspace_base / repo_name
         
+        if not create:
+            return workspace_base
         workspace_base.mkdir(parents=True, exist_ok=True)
+        self._workspace_bases[repo_id] = (settings, workspace_base)
         return workspace_base
     
     def _sanitize_repo_name(self, repo_id: str) -> str:
@@ -550,17 +1725,9 @@ class DirectoryManager:
         if not workspace_base.exists():
             return None
         
-        # Build pattern to match: prefix-separator-number (with optional separator and more)
-        # This matches directories like JIRA-123, JIRA-123-desc, JIRA_123-feature, etc.
-        pattern = re.compile(rf"^{re.escape(prefix)}[-_]{re.escape(number)}([-_].*)?$", re.IGNORECASE)
-        
-        for item in workspace_base.iterdir():
-            if item.is_dir():
-                dir_name = item.name
-                # Check if directory matches prefix-separator-number pattern
-                if pattern.match(dir_name):
-                    return item
-        return None
+        # The index matches directories like JIRA-123, JIRA-123-desc, JIRA_123-feature, etc.
+        name = self.get_ticket_index(workspace_base).lookup(prefix, number)
+        return workspace_base / name if name else None
     
     def create_ticket_directory(self, branch_name: str, ticket_info: Dict[str, str], repo_id: Optional[str] = None) -> Path:
         """
@@ -568,19 +1735,66 @@ class DirectoryManager:
         First searches for existing dir with same prefix+number, otherwise creates new one.
         """
         workspace_base = self.get_workspace_base(repo_id)
-        
-        # First, try to find existing directory
-        existing = self.find_existing_ticket_dir(ticket_info['prefix'], ticket_info['number'], repo_id)
-        if existing:
-            return existing
-        
-        # Create new directory with sanitized branch name
-        sanitized_name = self.sanitize_directory_name(branch_name)
-        ticket_dir = workspace_base / sanitized_name
-        
-        ticket_dir.mkdir(parents=True, exist_ok=True)
+        index = self.get_ticket_index(workspace_base)
+        
+        # Lock so concurrent checkouts of the same ticket cannot both create a directory
+        with index.lock():
+            # First, try to find existing directory
+            existing = self.find_existing_ticket_dir(ticket_info['prefix'], ticket_info['number'], repo_id)
+            if existing:
+                return existing
+            
+            # Create new directory with sanitized branch name
+            sanitized_name = self.sanitize_directory_name(branch_name)
+            ticket_dir = workspace_base / sanitized_name
+            
+            template = self.get_template_dir(ticket_info['prefix'], repo_id)
+            if template is None or ticket_dir.exists():
+                ticket_dir.mkdir(parents=True, exist_ok=True)
+            else:
+                with trace_phase('template', template=str(template)):
+                    self.materialize_template(template, ticket_dir, branch_name, ticket_info, repo_id)
+            index.add(ticket_dir.name)
         return ticket_dir
     
+    def get_template_dir(self, prefix: str, repo_id: Optional[str] = None) -> Optional[Path]:
+        """
+        Template tree for new ticket directories with this prefix: templates.<prefix>
+        (case-insensitive), else templates.default, each resolved repo → default.
+        """
+        for key in (prefix.lower(), 'default'):
+            value = self.config.get('templates', key, repo_id=repo_id)
+            if value:
+                return Path(os.path.expanduser(value))
+        return None
+    
+    def materialize_template(self, template: Path, ticket_dir: Path, branch_name: str,
+                             ticket_info: Dict[str, str], repo_id: Optional[str] = None) -> Dict[str, int]:
+        """
+        Build ticket_dir from template in a temporary sibling and rename it into place,
+        so an interrupted copy never leaves a half-filled ticket directory.
+        Returns the per-method counts from TemplateMaterializer.
+        """
+        if not template.is_dir():
+            raise FileNotFoundError(f"Template directory not found: {template}")
+        variables = {
+            'ticket': f"{ticket_info['prefix']}-{ticket_info['number']}",
+            'prefix': ticket_info['prefix'],
+            'number': ticket_info['number'],
+            'description': ticket_info.get('description') or '',
+            'branch': branch_name,
+            'ticket_dir': ticket_dir.name,
+            'repo': repo_id or '',
+        }
+        tmp_dir = ticket_dir.with_name(f".{ticket_dir.name}.{os.getpid()}.tmp")
+        try:
+            counts = TemplateMaterializer(variables).materialize(template, tmp_dir)
+            os.rename(tmp_dir, ticket_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        return counts
+    
     def sanitize_directory_name(self, name: str) -> str:
         """
         Create OS-safe directory name from branch name.
@@ -627,116 +1841,458 @@ class DirectoryManager:
         return sanitized
 
 
+def _map_bounded(func: Callable, items: Iterable, workers: int) -> List:
+    """
+    Return [func(item) for item in items], running calls on at most workers threads.
+    Results keep the order of items; a single item or worker runs inline.
+    """
+    items = list(items)
+    workers = min(workers, len(items))
+    if workers <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(func, items))
+
+
 class ToolsLinker:
-    """Links tools library items into ticket directories."""
+    """
+    Links tools library items into ticket directories. Each tool uses its link mode:
+    'symlink' (default), 'hardlink' (a tree of hardlinks), 'copy' (copy-on-write
+    where supported) or 'aggregate', where all aggregate tools share one 'tools'
+    link to a prebuilt directory of symlinks.
+    """
+    
+    LINK_MODES = ('symlink', 'hardlink', 'copy', 'aggregate')
+    AGGREGATE_LINK_NAME = 'tools'
     
     def __init__(self, config: ConfigManager):
         self.config = config
-        self.tools_library_path = config.get_path('paths', 'tools_library_path')
-        self.tools_to_link = config.get_list('links', 'tools_to_link')
+        settings = config.get_settings()
+        self.tools_library_path = settings.tools_library_path
+        self.tools_to_link = list(settings.tools_to_link)
+        self.link_workers = settings.link_workers
+        self.link_mode = settings.link_mode
+        self.tool_link_modes = dict(settings.tool_link_modes)
+        self.aggregate_base = config.config_file.parent / 'tool-links'
+        # Aggregate directories known to exist, so warm callers skip even the stat
+        self._aggregate_dirs = set()
+        self.counts = {'created': 0, 'kept': 0, 'replaced': 0}
+    
+    def get_link_mode(self, tool_name: str) -> str:
+        """Link mode for a tool: its tool_link_modes entry, else link_mode."""
+        return self.tool_link_modes.get(tool_name, self.link_mode)
     
     def link_tools(self, ticket_dir: Path) -> List[str]:
         """
         Link tools library items into ticket directory.
+        Links already pointing at their source are kept; missing ones are created,
+        other links and files in the way are replaced and real directories are
+        reported, never deleted. Hardlink trees and copies that
+        already exist are kept. The outcome is counted in self.counts.
+        Items are linked concurrently on up to link_workers threads.
         Returns list of errors (empty if successful).
         """
         errors = []
+        self.counts = {'created': 0, 'kept': 0, 'replaced': 0}
         
         if not self.tools_library_path.exists():
             errors.append(f"Tools library path does not exist: {self.tools_library_path}")
             return errors
         
+        individual = []
+        aggregated = []
         for tool_name in self.tools_to_link:
-            source = self.tools_library_path / tool_name
-            target = ticket_dir / tool_name
-            
-            if not source.exists():
-                errors.append(f"Tool item not found: {source}")
-                continue
-            
-            try:
-                # Remove existing symlink or file if exists
-                if target.exists() or target.is_symlink():
-                    if target.is_symlink():
-                        target.unlink()
-                    elif target.is_dir():
-                        shutil.rmtree(target)
-                    else:
-                        target.unlink()
-                
-                # Create symlink
-                target.symlink_to(source, target_is_directory=source.is_dir())
-            except OSError as e:
-                errors.append(f"Failed to link {tool_name}: {e}")
+            mode = self.get_link_mode(tool_name)
+            if mode not in self.LINK_MODES:
+                errors.append(f"Unknown link mode '{mode}' for {tool_name}")
+            elif mode == 'aggregate':
+                aggregated.append(tool_name)
+            else:
+                individual.append(tool_name)
+        
+        results = _map_bounded(lambda tool_name: self._traced_link_tool(ticket_dir, tool_name),
+                               individual, self.link_workers)
+        if aggregated:
+            with trace_phase('link_tool', tool=self.AGGREGATE_LINK_NAME, tools=len(aggregated)):
+                results.append(self._link_aggregate(ticket_dir, aggregated))
+        for action, error in results:
+            if error:
+                errors.append(error)
+            else:
+                self.counts[action] += 1
         
         return errors
-
-
-class CurrentTicketLinker:
-    """Creates configurable symlinks in configured locations."""
+    
+    def _traced_link_tool(self, ticket_dir: Path, tool_name: str) -> Tuple[Optional[str], Optional[str]]:
+        """_link_tool() timed as a 'link_tool' phase."""
+        with trace_phase('link_tool', tool=tool_name):
+            return self._link_tool(ticket_dir, tool_name)
+    
+    def _link_tool(self, ticket_dir: Path, tool_name: str) -> Tuple[Optional[str], Optional[str]]:
+        """Reconcile one tool. Returns (action, error); exactly one of them is set."""
+        source = self.tools_library_path / tool_name
+        target = ticket_dir / tool_name
+        
+        try:
+            source_is_dir = stat_module.S_ISDIR(os.stat(source).st_mode)
+        except OSError:
+            return None, f"Tool item not found: {source}"
+        
+        try:
+            mode = self.get_link_mode(tool_name)
+            if mode in ('hardlink', 'copy'):
+                return self._materialize_tool(source, target, source_is_dir, mode), None
+            return self._reconcile_symlink(source, target, source_is_dir), None
+        except OSError as e:
+            return None, f"Failed to link {tool_name}: {e}"
+    
+    @staticmethod
+    def _reconcile_symlink(source: Path, target: Path, source_is_dir: bool) -> str:
+        """
+        Point target at source with as few filesystem calls as possible. Returns the action.
+        A real directory in the way may hold work, so it is reported (IsADirectoryError)
+        instead of being replaced.
+        """
+        try:
+            target_mode = os.lstat(target).st_mode
+        except FileNotFoundError:
+            target_mode = None
+        
+        if target_mode is None:
+            os.symlink(source, target, target_is_directory=source_is_dir)
+            return 'created'
+        
+        if stat_module.S_ISLNK(target_mode):
+            if os.readlink(target) == str(source):
+                return 'kept'
+        elif stat_module.S_ISDIR(target_mode):
+            raise IsADirectoryError(errno.EISDIR, "Directory exists and is not a link", str(target))
+        
+        # Swap links and files with a single rename
+        tmp_link = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        try:
+            os.symlink(source, tmp_link, target_is_directory=source_is_dir)
+            os.replace(tmp_link, target)
+        except OSError:
+            try:
+                tmp_link.unlink()
+            except OSError:
+                pass
+            raise
+        return 'replaced'
+    
+    @staticmethod
+    def _materialize_tool(source: Path, target: Path, source_is_dir: bool, mode: str) -> str:
+        """
+        Build a hardlink tree or copy-on-write copy of source at target, replacing a
+        symlink left by another mode. An existing tree or copy is kept; delete it to refresh.
+        """
+        try:
+            target_mode = os.lstat(target).st_mode
+        except FileNotFoundError:
+            target_mode = None
+        if target_mode is not None and not stat_module.S_ISLNK(target_mode):
+            return 'kept'
+        
+        if mode == 'hardlink':
+            # Falls back to copies across filesystems
+            materializer = TemplateMaterializer(reflink=False, hardlink_writable=True)
+        else:
+            materializer = TemplateMaterializer(hardlink=False)
+        tmp_target = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        try:
+            if source_is_dir:
+                materializer.materialize(source, tmp_target)
+            else:
+                materializer.materialize_file(source, tmp_target)
+            if target_mode is not None:
+                # rename() cannot put a directory over a symlink
+                os.unlink(target)
+            os.rename(tmp_target, target)
+        except BaseException:
+            if source_is_dir:
+                shutil.rmtree(tmp_target, ignore_errors=True)
+            else:
+                with contextlib.suppress(OSError):
+                    os.unlink(tmp_target)
+            raise
+        return 'created' if target_mode is None else 'replaced'
+    
+    def get_aggregate_dir(self, tool_names: List[str]) -> Path:
+        """
+        Directory of symlinks to the given tools, built once per tools library and
+        tool list under the config directory and shared by every ticket directory.
+        """
+        digest = hashlib.sha1("\0".join([str(self.tools_library_path), *tool_names]).encode()).hexdigest()
+        aggregate_dir = self.aggregate_base / digest[:16]
+        if aggregate_dir in self._aggregate_dirs or aggregate_dir.is_dir():
+            self._aggregate_dirs.add(aggregate_dir)
+            return aggregate_dir
+        
+        for tool_name in tool_names:
+            if not os.path.lexists(self.tools_library_path / tool_name):
+                raise FileNotFoundError(errno.ENOENT, "Tool item not found", str(self.tools_library_path / tool_name))
+        tmp_dir = aggregate_dir.with_name(f".{aggregate_dir.name}.{os.getpid()}.tmp")
+        try:
+            tmp_dir.mkdir(parents=True)
+            for tool_name in tool_names:
+                source = self.tools_library_path / tool_name
+                os.symlink(source, tmp_dir / tool_name, target_is_directory=source.is_dir())
+            os.rename(tmp_dir, aggregate_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            # Another process may have built the same directory first
+            if not aggregate_dir.is_dir():
+                raise
+        self._aggregate_dirs.add(aggregate_dir)
+        return aggregate_dir
+    
+    def _link_aggregate(self, ticket_dir: Path, tool_names: List[str]) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Reconcile the single aggregate link. Returns (action, error).
+        Tools are only checked for existence when the aggregate directory is built.
+        """
+        try:
+            aggregate_dir = self.get_aggregate_dir(tool_names)
+            target = ticket_dir / self.AGGREGATE_LINK_NAME
+            return self._reconcile_symlink(aggregate_dir, target, True), None
+        except FileNotFoundError as e:
+            return None, f"Tool item not found: {e.filename}"
+        except OSError as e:
+            return None, f"Failed to link {self.AGGREGATE_LINK_NAME}: {e}"
+    
+    def describe_counts(self) -> str:
+        """Summarize the last link_tools() run, e.g. '1 created, 2 kept, 0 replaced'."""
+        return ", ".join(f"{count} {action}" for action, count in self.counts.items())
+
+
+class CurrentTicketLinker:
+    """Creates configurable symlinks in configured locations."""
     
     def __init__(self, config: ConfigManager):
         self.config = config
     
     def get_link_locations(self, repo_id: Optional[str] = None) -> List[Path]:
         """Get link locations from config with repo context."""
-        locations_str = self.config.get('links', 'current_ticket_link_locations', repo_id=repo_id, fallback='')
-        return [
-            Path(os.path.expanduser(loc.strip()))
-            for loc in locations_str.split(',')
-            if loc.strip()
-        ]
+        return list(self.config.get_settings(repo_id).link_locations)
     
     def get_link_filename(self, repo_id: Optional[str] = None) -> str:
         """Get symlink filename from config with repo context."""
-        filename = self.config.get('links', 'current_ticket_link_filename', repo_id=repo_id, fallback='CurrentTicket')
-        return filename if filename else 'CurrentTicket'
+        return self.config.get_settings(repo_id).link_filename
     
     def update_current_ticket_link(self, ticket_dir: Path, repo_id: Optional[str] = None) -> List[str]:
         """
         Create or update symlink in configured locations.
+        Links already pointing at ticket_dir are left untouched; others are swapped
+        in with a single rename, so readers never see the link missing.
+        Locations are updated concurrently on up to link_workers threads.
         Returns list of errors (empty if successful).
         """
-        errors = []
-        link_name = self.get_link_filename(repo_id)
-        link_locations = self.get_link_locations(repo_id)
+        settings = self.config.get_settings(repo_id)
+        link_name = settings.link_filename
         
-        for location in link_locations:
-            # location is the directory where we want to create the symlink
-            if not location.exists():
-                # Try to create the directory if it doesn't exist
-                try:
-                    location.mkdir(parents=True, exist_ok=True)
-                except OSError as e:
-                    errors.append(f"Directory does not exist and cannot be created: {location} ({e})")
-                    continue
-            
-            if not location.is_dir():
-                errors.append(f"Location is not a directory: {location}")
-                continue
-            
-            target = location / link_name
-            
+        def update(location: Path) -> Optional[str]:
+            with trace_phase('current_ticket_link', location=location):
+                return self._update_location(location, link_name, ticket_dir)
+        
+        results = _map_bounded(update, settings.link_locations, settings.link_workers)
+        return [error for error in results if error]
+    
+    @staticmethod
+    def _update_location(location: Path, link_name: str, ticket_dir: Path) -> Optional[str]:
+        """Point location/link_name at ticket_dir. Returns an error message or None."""
+        target = location / link_name
+        link_value = str(ticket_dir)
+        
+        # Common case: the link is already correct, one readlink and nothing else
+        try:
+            if os.readlink(target) == link_value:
+                return None
+        except OSError:
+            pass
+        
+        # location is the directory where we want to create the symlink
+        if not location.is_dir():
+            if location.exists():
+                return f"Location is not a directory: {location}"
+            # Try to create the directory if it doesn't exist
             try:
-                # Remove existing symlink or file/dir if exists
-                if target.exists() or target.is_symlink():
-                    if target.is_symlink():
-                        target.unlink()
-                    elif target.is_dir():
-                        # On Windows, might need to remove directory first
-                        try:
-                            target.rmdir()
-                        except OSError:
-                            shutil.rmtree(target)
-                    else:
-                        target.unlink()
-                
-                # Create symlink
-                target.symlink_to(ticket_dir, target_is_directory=True)
+                location.mkdir(parents=True, exist_ok=True)
             except OSError as e:
-                errors.append(f"Failed to create {link_name} link in {location}: {e}")
+                return f"Directory does not exist and cannot be created: {location} ({e})"
         
-        return errors
+        # Thread id too, in case the same location is configured twice
+        tmp_link = location / f".{link_name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            try:
+                tmp_link.unlink()
+            except FileNotFoundError:
+                pass
+            os.symlink(link_value, tmp_link, target_is_directory=True)
+            try:
+                os.replace(tmp_link, target)
+            except OSError:
+                # A real directory cannot be renamed over; remove it and retry
+                if target.is_symlink() or not target.is_dir():
+                    raise
+                try:
+                    target.rmdir()
+                except OSError:
+                    shutil.rmtree(target)
+                os.replace(tmp_link, target)
+        except OSError as e:
+            try:
+                tmp_link.unlink()
+            except OSError:
+                pass
+            return f"Failed to create {link_name} link in {location}: {e}"
+        return None
+
+
+class CheckoutContext:
+    """
+    Arguments and environment git passes to the post-checkout hook.
+    Lets 'sidecar process' skip checkouts that cannot change the ticket
+    before any configuration is loaded or git is spawned.
+    """
+    
+    MARKER_FILE = 'sidecar-head'
+    # Files git keeps in the git directory while an operation checks out commit after commit.
+    # They only count while HEAD is detached: 'git rebase --abort' and 'git bisect reset'
+    # reattach HEAD to a branch before git removes them.
+    OPERATION_MARKERS = (
+        ('rebase-merge', 'Rebase'),
+        ('rebase-apply', 'Rebase'),
+        ('BISECT_LOG', 'Bisect'),
+        ('sequencer', 'Cherry-pick'),
+        ('CHERRY_PICK_HEAD', 'Cherry-pick'),
+        ('REVERT_HEAD', 'Revert'),
+        ('MERGE_HEAD', 'Merge'),
+    )
+    
+    def __init__(self, hook_args: Optional[List[str]] = None, environ: Optional[Dict[str, str]] = None,
+                 cwd: Optional[Path] = None):
+        """
+        Args:
+            hook_args: post-checkout arguments: previous HEAD, new HEAD, branch checkout flag
+            environ: Environment to read GIT_DIR / GIT_WORK_TREE from (defaults to os.environ)
+            cwd: Directory relative GIT_DIR / GIT_WORK_TREE are resolved against
+        """
+        environ = os.environ if environ is None else environ
+        cwd = cwd or Path.cwd()
+        hook_args = list(hook_args or [])
+        
+        self.prev_head = hook_args[0] if len(hook_args) > 0 else None
+        self.new_head = hook_args[1] if len(hook_args) > 1 else None
+        self.branch_checkout = hook_args[2] != '0' if len(hook_args) > 2 else None
+        self.git_dir = self._resolve(cwd, environ.get('GIT_DIR'))
+        self.work_tree = self._resolve(cwd, environ.get('GIT_WORK_TREE'))
+        if self.git_dir is None and hook_args and (cwd / '.git').exists():
+            # Git runs post-checkout from the top of the work tree, so no upward search is needed
+            self.git_dir = cwd / '.git'
+        if self.work_tree is None and hook_args:
+            # Linked worktrees get GIT_DIR=<repo>/.git/worktrees/<name> but no GIT_WORK_TREE
+            self.work_tree = cwd
+    
+    @staticmethod
+    def _resolve(cwd: Path, value: Optional[str]) -> Optional[Path]:
+        """Resolve a possibly relative path from the hook environment."""
+        if not value:
+            return None
+        path = Path(value)
+        return path if path.is_absolute() else cwd / path
+    
+    def read_head(self) -> Optional[str]:
+        """Raw contents of HEAD (a symbolic ref or a detached commit)."""
+        if not self.git_dir:
+            return None
+        return GitMetadataReader(self.git_dir).read_head()
+    
+    def _marker_path(self) -> Optional[Path]:
+        """Marker file inside the real git directory (following .git files)."""
+        git_dir = GitMetadataReader(self.git_dir).git_dir if self.git_dir else None
+        return git_dir / self.MARKER_FILE if git_dir else None
+    
+    def operation_in_progress(self) -> Optional[str]:
+        """
+        Name of the rebase, bisect, cherry-pick, revert or merge that detached HEAD, if any.
+        A checkout back onto a branch (abort, bisect reset) is not part of the operation.
+        """
+        reader = GitMetadataReader(self.git_dir) if self.git_dir else None
+        git_dir = reader.git_dir if reader else None
+        if git_dir is None:
+            return None
+        head = reader.read_head()
+        if head is None or head.startswith('ref:'):
+            return None
+        for marker, operation in self.OPERATION_MARKERS:
+            if os.path.lexists(git_dir / marker):
+                return operation
+        return None
+    
+    def skip_reason(self) -> Optional[str]:
+        """
+        Return a message if this checkout needs no processing, None otherwise.
+        Detached checkouts made by a rebase, bisect or similar operation are skipped;
+        the post-rewrite hook processes the branch a rebase ends on, and aborting
+        reattaches HEAD with a checkout that is processed normally. A same-HEAD
+        checkout is only skipped when HEAD still names the branch processed
+        last time, since 'git checkout -b' also keeps the commit.
+        """
+        if self.branch_checkout is False:
+            return "File checkout - no action taken"
+        if self.prev_head is not None:
+            operation = self.operation_in_progress()
+            if operation:
+                return f"{operation} in progress - no action taken"
+        if self.prev_head and self.prev_head == self.new_head:
+            head = self.read_head()
+            marker = self._marker_path()
+            if head is not None and marker is not None:
+                try:
+                    processed = marker.read_text().strip()
+                except OSError:
+                    processed = None
+                if head == processed:
+                    return "HEAD unchanged - no action taken"
+        return None
+    
+    def record_processed(self, head: Optional[str]):
+        """
+        Remember the HEAD that was just processed, for later same-HEAD checkouts.
+        head must be read before processing: git may move HEAD while a background
+        worker runs, and that newer HEAD has not been processed.
+        """
+        marker = self._marker_path()
+        if head is None or marker is None:
+            return
+        try:
+            marker.write_text(head + "\n")
+        except OSError:
+            pass
+
+
+# Minimal daemon client embedded in the post-checkout hook. It only imports
+# stdlib modules (run with -S), so a checkout costs one socket round-trip
+# instead of importing sidecar. Only a failed connect exits non-zero and makes
+# the hook fall back to 'sidecar process': once connected, the daemon owns the
+# checkout and the reply is awaited however long processing takes (e.g. waiting
+# for the workspace lock), so the work is never done twice. Must not contain
+# single quotes.
+HOOK_CLIENT_SOURCE = (
+    "import json,os,socket,sys\n"
+    "s=socket.socket(socket.AF_UNIX,socket.SOCK_STREAM)\n"
+    "s.settimeout(5)\n"
+    "s.connect(sys.argv[1])\n"
+    "s.settimeout(None)\n"
+    "e=os.environ.get\n"
+    "req={\"cwd\":os.getcwd(),\"git_dir\":e(\"GIT_DIR\",\"\"),\"work_tree\":e(\"GIT_WORK_TREE\",\"\"),\"args\":sys.argv[2:]}\n"
+    "try:\n"
+    "    s.sendall((json.dumps(req)+\"\\n\").encode())\n"
+    "    print(json.loads(s.makefile().readline())[\"message\"])\n"
+    "except (OSError,ValueError):\n"
+    "    print(\"sidecar daemon did not reply\")\n"
+)
 
 
 class GitHookManager:
@@ -765,35 +2321,77 @@ class GitHookManager:
         
         return None
     
-    def install_hook(self) -> Tuple[bool, str]:
-        """Install post-checkout hook."""
-        git_dir = self.find_git_repo()
-        if not git_dir:
-            return False, "Not in a git repository"
-        
-        hooks_dir = git_dir / 'hooks'
-        hooks_dir.mkdir(exist_ok=True)
-        
-        hook_file = hooks_dir / 'post-checkout'
-        
+    def _get_process_command(self) -> Optional[str]:
+        """Shell command that runs 'sidecar process', or None if sidecar cannot be located."""
         # Determine how to call sidecar: use command if available, else use script path
         if self.use_command:
             # Installed as package - use 'sidecar' command directly
-            hook_content = """#!/bin/sh
-# sidecar post-checkout hook
-sidecar process
-"""
+            return "sidecar process"
         elif self.script_path:
             # Direct execution - use Python with script path
             python_exec = sys.executable
             script_path_str = str(self.script_path.resolve())
             # Escape quotes for shell script
             script_path_escaped = script_path_str.replace('"', '\\"')
-            hook_content = f"""#!/bin/sh
-# sidecar post-checkout hook
-"{python_exec}" "{script_path_escaped}" process
-"""
+            return f'"{python_exec}" "{script_path_escaped}" process'
+        return None
+    
+    def _build_hook_content(self, hook_name: str = 'post-checkout') -> Optional[str]:
+        """
+        Build the post-checkout or post-rewrite hook script.
+        The hook first hands the checkout to a running 'sidecar daemon' over its
+        socket, and only falls back to a full 'sidecar process' run when no daemon accepts
+        the connection.
+        The post-checkout hook returns before starting Python while a rebase, bisect or
+        similar operation has HEAD detached; the post-rewrite hook runs once a rebase
+        finishes instead.
+        """
+        process_command = self._get_process_command()
+        if process_command is None:
+            return None
+        
+        if hook_name == 'post-rewrite':
+            # Only rebases; 'git commit --amend' does not change the branch
+            guard = '[ "$1" = "rebase" ] || exit 0\n'
+            hook_args = ''
         else:
+            markers = ' '.join(marker for marker, _ in CheckoutContext.OPERATION_MARKERS)
+            guard = (
+                'gd="${GIT_DIR:-.git}"\n'
+                '[ -f "$gd" ] && gd=$(sed -n "s/^gitdir: //p" "$gd")\n'
+                'head=""\n'
+                'read -r head 2>/dev/null < "$gd/HEAD"\n'
+                'case "$head" in\n'
+                '    "ref: "*) ;;\n'
+                f'    *) for f in {markers}; do\n'
+                '           [ -e "$gd/$f" ] && exit 0\n'
+                '       done ;;\n'
+                'esac\n'
+            )
+            hook_args = ' "$@"'
+        socket_path = str(SidecarDaemon.DEFAULT_SOCKET_PATH).replace('"', '\\"')
+        return f"""#!/bin/sh
+# sidecar {hook_name} hook
+{guard}sock="{socket_path}"
+if [ -S "$sock" ] && "{sys.executable}" -S -c '{HOOK_CLIENT_SOURCE}' "$sock"{hook_args} 2>/dev/null; then
+    exit 0
+fi
+{process_command}{hook_args}
+"""
+    
+    def install_hook(self) -> Tuple[bool, str]:
+        """Install post-checkout hook, and post-rewrite hook unless another tool owns it."""
+        git_dir = self.find_git_repo()
+        if not git_dir:
+            return False, "Not in a git repository"
+        
+        hooks_dir = git_dir / 'hooks'
+        hooks_dir.mkdir(exist_ok=True)
+        
+        hook_file = hooks_dir / 'post-checkout'
+        
+        hook_content = self._build_hook_content()
+        if hook_content is None:
             return False, "Cannot determine how to run sidecar. Please install via pipx/uvx or provide script path."
         
         try:
@@ -802,9 +2400,73 @@ sidecar process
             
             # Make executable
             os.chmod(hook_file, 0o755)
-            return True, f"Hook installed at {hook_file}"
         except Exception as e:
             return False, f"Failed to install hook: {e}"
+        
+        status, detail = self._write_hook(hooks_dir / 'post-rewrite', self._build_hook_content('post-rewrite'))
+        if status in ('skipped', 'failed'):
+            return True, f"Hook installed at {hook_file} (post-rewrite hook not installed: {detail})"
+        return True, f"Hook installed at {hook_file}"
+    
+    @staticmethod
+    def _write_hook(hook_file: Path, hook_content: str) -> Tuple[str, str]:
+        """
+        Atomically write hook_content to hook_file unless it already matches or
+        holds a hook sidecar did not write. Returns (status, detail) like sync_hook().
+        """
+        try:
+            existing = hook_file.read_text()
+        except FileNotFoundError:
+            existing = None
+        except OSError as e:
+            return 'failed', f"Cannot read {hook_file}: {e}"
+        if existing == hook_content:
+            return 'unchanged', str(hook_file)
+        if existing is not None and 'sidecar' not in existing:
+            return 'skipped', f"{hook_file} is not a sidecar hook"
+        
+        tmp_file = hook_file.with_name(f".{hook_file.name}.{os.getpid()}.tmp")
+        try:
+            hook_file.parent.mkdir(exist_ok=True)
+            with open(tmp_file, 'w') as f:
+                f.write(hook_content)
+            os.chmod(tmp_file, 0o755)
+            os.replace(tmp_file, hook_file)
+        except OSError as e:
+            try:
+                tmp_file.unlink()
+            except OSError:
+                pass
+            return 'failed', f"Failed to install hook: {e}"
+        return ('installed' if existing is None else 'upgraded'), str(hook_file)
+    
+    def sync_hook(self, git_dir: Path) -> Tuple[str, str]:
+        """
+        Install or upgrade the post-checkout and post-rewrite hooks in git_dir, leaving
+        hooks sidecar did not write alone. Returns (status, detail) for post-checkout with
+        status 'installed', 'upgraded', 'unchanged', 'skipped' or 'failed'.
+        """
+        reader = GitMetadataReader(git_dir)
+        if reader.common_dir is None:
+            return 'failed', f"Cannot resolve git directory {git_dir}"
+        if reader.get_config_value('core', 'hooksPath'):
+            return 'skipped', "core.hooksPath is set"
+        
+        hook_content = self._build_hook_content()
+        if hook_content is None:
+            return 'failed', "Cannot determine how to run sidecar"
+        
+        # Linked worktrees share the hooks of their main repository
+        hooks_dir = reader.common_dir / 'hooks'
+        status, detail = self._write_hook(hooks_dir / 'post-checkout', hook_content)
+        if status in ('skipped', 'failed'):
+            return status, detail
+        # A foreign post-rewrite hook is left alone without failing the sync; rebases then
+        # end without a run, as before post-rewrite support
+        rewrite_status, _ = self._write_hook(hooks_dir / 'post-rewrite', self._build_hook_content('post-rewrite'))
+        if status == 'unchanged' and rewrite_status in ('installed', 'upgraded'):
+            status = 'upgraded'
+        return status, detail
     
     def uninstall_hook(self) -> Tuple[bool, str]:
         """Remove post-checkout hook."""
@@ -828,45 +2490,172 @@ sidecar process
         
         try:
             hook_file.unlink()
-            return True, "Hook uninstalled"
         except Exception as e:
             return False, f"Failed to uninstall hook: {e}"
+        
+        rewrite_hook = git_dir / 'hooks' / 'post-rewrite'
+        try:
+            if 'sidecar' in rewrite_hook.read_text():
+                rewrite_hook.unlink()
+        except OSError:
+            pass
+        return True, "Hook uninstalled"
+
+
+class RepoScanner:
+    """
+    Finds git repositories below a root directory, registers unconfigured ones with
+    default settings in a single config write, and optionally installs or upgrades
+    their hooks on a bounded thread pool.
+    """
+    
+    DEFAULT_WORKERS = 8
+    HOOK_STATUSES = ('installed', 'upgraded', 'unchanged', 'skipped', 'failed')
+    
+    def __init__(self, config: ConfigManager, hook_manager: Optional[GitHookManager] = None,
+                 workers: int = DEFAULT_WORKERS):
+        self.config = config
+        self.hook_manager = hook_manager
+        self.workers = max(1, workers)
+    
+    @staticmethod
+    def find_repos(root: Path) -> List[Path]:
+        """
+        Return the work tree roots under root (root included), sorted.
+        The walk does not descend into a repository once its .git entry is seen,
+        and does not follow symlinks.
+        """
+        repos = []
+        stack = [str(root)]
+        while stack:
+            directory = stack.pop()
+            subdirs = []
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.name == '.git':
+                            repos.append(Path(directory))
+                            subdirs = []
+                            break
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+            except OSError:
+                continue
+            stack.extend(subdirs)
+        return sorted(repos)
+    
+    @staticmethod
+    def _identify(work_tree: Path) -> Tuple[Path, str, str]:
+        """Return (work_tree, repo_id, repo_name) for one repository."""
+        identifier = RepoIdentifier(work_tree / '.git', work_tree)
+        return work_tree, identifier.get_repo_identifier(), identifier.get_repo_name_for_path()
+    
+    def scan(self, root: Path, install_hooks: bool = False) -> Tuple[bool, str]:
+        """Discover, register and optionally hook every repository under root. Returns (success, summary)."""
+        root = Path(root).expanduser().resolve()
+        if not root.is_dir():
+            return False, f"Not a directory: {root}"
+        
+        with trace_phase('scan_walk', root=root):
+            work_trees = self.find_repos(root)
+        with trace_phase('scan_identify', repos=len(work_trees)):
+            repos = _map_bounded(self._identify, work_trees, self.workers)
+        
+        # Register every new repository with one config write
+        newly_configured = set()
+        default_workspace_base = self.config.get_settings('').workspace_base
+        with self.config.batch():
+            for _, repo_id, repo_name in repos:
+                if repo_id in newly_configured or self.config.repo_is_configured(repo_id):
+                    continue
+                self.config.set('paths', 'workspace_base', str(default_workspace_base / repo_name), repo_id=repo_id)
+                newly_configured.add(repo_id)
+        
+        hook_results = {}
+        if install_hooks and self.hook_manager is not None:
+            with trace_phase('scan_hooks', repos=len(work_trees)):
+                results = _map_bounded(lambda work_tree: self.hook_manager.sync_hook(work_tree / '.git'),
+                                       work_trees, self.workers)
+            hook_results = dict(zip(work_trees, results))
+        
+        lines = [f"Found {len(repos)} repositories under {root}"]
+        reported = set()
+        for work_tree, repo_id, _ in repos:
+            changes = []
+            if repo_id in newly_configured and repo_id not in reported:
+                changes.append("configured")
+                reported.add(repo_id)
+            status, detail = hook_results.get(work_tree, ('unchanged', ''))
+            if status in ('installed', 'upgraded'):
+                changes.append(f"hook {status}")
+            elif status in ('skipped', 'failed'):
+                changes.append(f"hook {status}: {detail}")
+            if changes:
+                lines.append(f"  {repo_id}  {work_tree}  {', '.join(changes)}")
+        
+        lines.append(f"Repositories: {len(newly_configured)} newly configured, "
+                     f"{len({repo_id for _, repo_id, _ in repos}) - len(newly_configured)} already configured")
+        if install_hooks:
+            counts = {status: 0 for status in self.HOOK_STATUSES}
+            for status, _ in hook_results.values():
+                counts[status] += 1
+            lines.append("Hooks: " + ", ".join(f"{count} {status}" for status, count in counts.items()))
+        
+        failed = any(status == 'failed' for status, _ in hook_results.values())
+        return not failed, "\n".join(lines)
 
 
 class TicketManager:
     """Main manager that orchestrates ticket directory creation and linking."""
     
-    def __init__(self, config_file: Optional[Path] = None, repo_id: Optional[str] = None):
+    def __init__(self, config_file: Optional[Path] = None, repo_id: Optional[str] = None,
+                 git_dir: Optional[Path] = None, work_tree: Optional[Path] = None,
+                 config: Optional[ConfigManager] = None):
         """
         Initialize TicketManager with repo context.
         
         Args:
             config_file: Optional custom config file path
             repo_id: Optional repo identifier (auto-detected if not provided)
+            git_dir: Optional git directory (current directory's repo if not provided)
+            work_tree: Optional work tree root, e.g. from GIT_WORK_TREE
+            config: Optional already loaded configuration (config_file is then ignored)
         """
+        # Load the configuration once; every component shares this snapshot
+        config = config or ConfigManager(config_file)
+        
         # Detect repo_id if not provided
         if repo_id is None:
-            repo_id = ConfigManager(config_file).get_current_repo_id()
+            with trace_phase('repo_detection'):
+                repo_id = config.get_current_repo_id(git_dir, work_tree)
         
         self.repo_id = repo_id
-        self.config = ConfigManager(config_file, repo_id=repo_id)
+        self.git_dir = git_dir
+        self.config = config.with_repo(repo_id)
         self.branch_analyzer = BranchAnalyzer(self.config)
         self.dir_manager = DirectoryManager(self.config)
         self.tools_linker = ToolsLinker(self.config)
         self.current_ticket_linker = CurrentTicketLinker(self.config)
+        # Ticket directory resolved by the last process_checkout() call
+        self.last_ticket_dir: Optional[Path] = None
     
     def process_checkout(self) -> Tuple[bool, str]:
         """
         Process current git checkout.
-        Returns (success, message).
+        Returns (success, message). last_ticket_dir is the ticket directory the
+        checkout resolved to, even when linking tools or CurrentTicket failed.
         """
-        branch_name = self.branch_analyzer.get_current_branch()
+        self.last_ticket_dir = None
+        with trace_phase('current_branch'):
+            branch_name = self.branch_analyzer.get_current_branch(self.git_dir)
         if not branch_name:
             return False, "Not in a git repository or cannot get current branch"
         
         # Check if standard branch
         if self.branch_analyzer.is_standard_branch(branch_name):
             return True, f"Standard branch '{branch_name}' - no action taken"
+        if self.branch_analyzer.is_excluded_branch(branch_name):
+            return True, f"Excluded branch '{branch_name}' - no action taken"
         
         # Extract ticket info
         ticket_info = self.branch_analyzer.extract_ticket_info(branch_name)
@@ -875,21 +2664,71 @@ class TicketManager:
         
         # Create or get ticket directory (with repo context)
         try:
-            ticket_dir = self.dir_manager.create_ticket_directory(branch_name, ticket_info, self.repo_id)
+            with trace_phase('ticket_dir', branch=branch_name):
+                ticket_dir = self.dir_manager.create_ticket_directory(branch_name, ticket_info, self.repo_id)
         except Exception as e:
             return False, f"Failed to create ticket directory: {e}"
+        self.last_ticket_dir = ticket_dir
         
         # Link tools
-        tool_errors = self.tools_linker.link_tools(ticket_dir)
+        with trace_phase('link_tools'):
+            tool_errors = self.tools_linker.link_tools(ticket_dir)
         
         # Update CurrentTicket links (with repo context)
-        link_errors = self.current_ticket_linker.update_current_ticket_link(ticket_dir, self.repo_id)
+        with trace_phase('current_ticket_links'):
+            link_errors = self.current_ticket_linker.update_current_ticket_link(ticket_dir, self.repo_id)
         
         all_errors = tool_errors + link_errors
         if all_errors:
             return False, f"Ticket directory created at {ticket_dir}, but errors occurred:\n" + "\n".join(all_errors)
         
-        return True, f"Ticket directory set up at {ticket_dir}"
+        return True, f"Ticket directory set up at {ticket_dir} (tools: {self.tools_linker.describe_counts()})"
+    
+    def process_all_branches(self) -> Tuple[bool, str]:
+        """
+        Create or resolve ticket directories and tool links for every local branch
+        in one pass, sharing this manager's config snapshot and ticket index.
+        CurrentTicket links are left alone. Returns (success, message).
+        """
+        with trace_phase('list_branches'):
+            branches = self.branch_analyzer.list_local_branches(self.git_dir)
+        if branches is None:
+            return False, "Not in a git repository or cannot list branches"
+        
+        # Several branches of one ticket share its directory, so resolve each ticket once
+        tickets: Dict[Tuple[str, str], Tuple[str, Dict[str, str]]] = {}
+        skipped = 0
+        for branch_name in branches:
+            ticket_info = None
+            if not (self.branch_analyzer.is_standard_branch(branch_name)
+                    or self.branch_analyzer.is_excluded_branch(branch_name)):
+                ticket_info = self.branch_analyzer.extract_ticket_info(branch_name)
+            if not ticket_info:
+                skipped += 1
+                continue
+            key = TicketIndex.make_key(ticket_info['prefix'], ticket_info['number'])
+            tickets.setdefault(key, (branch_name, ticket_info))
+        
+        lines = []
+        errors = []
+        for branch_name, ticket_info in tickets.values():
+            try:
+                with trace_phase('ticket_dir', branch=branch_name):
+                    ticket_dir = self.dir_manager.create_ticket_directory(branch_name, ticket_info, self.repo_id)
+            except Exception as e:
+                errors.append(f"{branch_name}: failed to create ticket directory: {e}")
+                continue
+            with trace_phase('link_tools'):
+                tool_errors = self.tools_linker.link_tools(ticket_dir)
+            errors.extend(f"{branch_name}: {error}" for error in tool_errors)
+            lines.append(f"  {branch_name} -> {ticket_dir}")
+        
+        summary = (f"Processed {len(branches)} branches: {len(lines)} ticket directories set up, "
+                   f"{skipped} branches without a ticket skipped")
+        message = "\n".join([summary] + lines)
+        if errors:
+            return False, message + "\nErrors:\n" + "\n".join(f"  {error}" for error in errors)
+        return True, message
     
     def list_ticket_directories(self, repo_id: Optional[str] = None) -> List[Path]:
         """
@@ -898,12 +2737,600 @@ class TicketManager:
         Args:
             repo_id: Optional repo identifier (uses instance repo_id if not provided)
         """
+        return [Path(entry.path) for entry in self.iter_ticket_directories(repo_id, sort='none')]
+    
+    def iter_ticket_directories(self, repo_id: Optional[str] = None, prefix: Optional[str] = None,
+                                number: Optional[str] = None, pattern: Optional[str] = None,
+                                sort: str = 'name', limit: Optional[int] = None) -> Iterator[os.DirEntry]:
+        """
+        Yield the ticket directories of a repo's workspace as os.DirEntry objects.
+        Entries come straight from os.scandir and directories are recognized by d_type,
+        so nothing is stat'ed unless sorting by mtime.
+        
+        Args:
+            repo_id: Optional repo identifier (uses instance repo_id if not provided)
+            prefix: Only tickets with this prefix (case-insensitive)
+            number: Only tickets with this number
+            pattern: Only names matching this regular expression (re.error if invalid)
+            sort: 'name', 'mtime' (newest first) or 'none' (directory order, no buffering)
+            limit: Yield at most this many entries
+        """
         effective_repo_id = repo_id if repo_id is not None else self.repo_id
-        workspace_base = self.dir_manager.get_workspace_base(effective_repo_id)
-        if not workspace_base.exists():
-            return []
+        workspace_base = self.dir_manager.get_workspace_base(effective_repo_id, create=False)
+        regex = re.compile(pattern) if pattern else None
+        prefix = prefix.lower() if prefix else None
+        number = number.lower() if number else None
+        
+        def matches(name: str) -> bool:
+            if regex and not regex.search(name):
+                return False
+            if prefix is None and number is None:
+                return True
+            key = TicketIndex.key_for_name(name)
+            if key is None:
+                return False
+            key_prefix, _, key_number = key.partition('/')
+            return (prefix is None or key_prefix == prefix) and (number is None or key_number == number)
+        
+        def entries() -> Iterator[os.DirEntry]:
+            try:
+                with os.scandir(workspace_base) as scan:
+                    for entry in scan:
+                        try:
+                            if entry.is_dir() and matches(entry.name):
+                                yield entry
+                        except OSError:
+                            continue
+            except OSError:
+                return
+        
+        if sort == 'name':
+            key = lambda entry: entry.name
+            ordered = sorted(entries(), key=key) if limit is None else heapq.nsmallest(limit, entries(), key=key)
+            return iter(ordered)
+        if sort == 'mtime':
+            def stamped() -> Iterator[Tuple[int, os.DirEntry]]:
+                for entry in entries():
+                    try:
+                        yield entry.stat().st_mtime_ns, entry
+                    except OSError:
+                        # Removed while listing
+                        continue
+            
+            key = lambda item: item[0]
+            ordered = (sorted(stamped(), key=key, reverse=True) if limit is None
+                       else heapq.nlargest(limit, stamped(), key=key))
+            return (entry for _, entry in ordered)
+        if limit is not None:
+            return itertools.islice(entries(), limit)
+        return entries()
+    
+    def list_all_repos(self, workers: int = RepoScanner.DEFAULT_WORKERS,
+                       **filters) -> List[Tuple[str, Path, List[os.DirEntry]]]:
+        """
+        List the ticket directories of every configured repo, scanning workspaces
+        concurrently on up to workers threads.
+        filters are passed to iter_ticket_directories (prefix, number, pattern, sort, limit).
+        Returns (repo_id, workspace_base, entries) per repo, in repo id order.
+        """
+        if filters.get('pattern'):
+            re.compile(filters['pattern'])
         
-        return [d for d in workspace_base.iterdir() if d.is_dir()]
+        def list_repo(repo_id: str) -> Tuple[str, Path, List[os.DirEntry]]:
+            with trace_phase('list_repo', repo=repo_id):
+                workspace_base = self.dir_manager.get_workspace_base(repo_id, create=False)
+                return repo_id, workspace_base, list(self.iter_ticket_directories(repo_id, **filters))
+        
+        return _map_bounded(list_repo, sorted(self.config.list_configured_repos()), workers)
+
+
+class SidecarDaemon:
+    """
+    Long-lived sidecar process serving post-checkout hooks over a Unix socket.
+    Keeps repo identifiers and per-repo TicketManagers (parsed config, compiled
+    branch patterns) warm between checkouts.
+    """
+    
+    DEFAULT_SOCKET_PATH = ConfigManager.DEFAULT_CONFIG_DIR / "sidecar.sock"
+    
+    def __init__(self, config_file: Optional[Path] = None, socket_path: Optional[Path] = None):
+        self.config_file = config_file or ConfigManager.DEFAULT_CONFIG_FILE
+        self.socket_path = socket_path or self.DEFAULT_SOCKET_PATH
+        self._config_stamp: Optional[Tuple[int, int]] = None
+        self._repo_ids: Dict[Path, Tuple[Optional[int], str]] = {}
+        self._managers: Dict[Path, TicketManager] = {}
+        self._server: Optional[socketserver.UnixStreamServer] = None
+    
+    def _refresh_config(self):
+        """Drop cached managers when config.ini changed on disk since the last request."""
+        try:
+            stat = self.config_file.stat()
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamp = None
+        if stamp != self._config_stamp:
+            self._config_stamp = stamp
+            self._managers.clear()
+    
+    def _get_repo_id(self, git_dir: Path, work_tree: Optional[Path] = None) -> str:
+        """Return the cached repo identifier, re-detecting when the repo's config changed."""
+        try:
+            stamp = GitMetadataReader(git_dir).config_file.stat().st_mtime_ns
+        except (OSError, AttributeError):
+            stamp = None
+        cached = self._repo_ids.get(git_dir)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        repo_id = RepoIdentifier(git_dir, work_tree).get_repo_identifier()
+        self._repo_ids[git_dir] = (stamp, repo_id)
+        return repo_id
+    
+    def get_manager(self, git_dir: Path, work_tree: Optional[Path] = None) -> TicketManager:
+        """Return a warm TicketManager for git_dir, building it on first use."""
+        self._refresh_config()
+        repo_id = self._get_repo_id(git_dir, work_tree)
+        manager = self._managers.get(git_dir)
+        if manager is None or manager.repo_id != repo_id:
+            manager = TicketManager(self.config_file, repo_id=repo_id, git_dir=git_dir, work_tree=work_tree)
+            self._managers[git_dir] = manager
+        return manager
+    
+    def handle_request(self, request: Dict) -> Dict:
+        """
+        Process one hook request.
+        Returns dict with 'success' and 'message', mirroring 'sidecar process'.
+        """
+        if request.get('command') == 'stop':
+            if self._server is not None:
+                # shutdown() blocks until serve_forever returns, so it must not run on the serving thread
+                threading.Thread(target=self._server.shutdown, daemon=True).start()
+            return {'success': True, 'message': 'Daemon stopping'}
+        
+        cwd = Path(request.get('cwd') or '.')
+        context = CheckoutContext(
+            request.get('args'),
+            environ={'GIT_DIR': request.get('git_dir', ''), 'GIT_WORK_TREE': request.get('work_tree', '')},
+            cwd=cwd,
+        )
+        if context.git_dir is None:
+            context.git_dir = RepoIdentifier._find_git_repo(cwd)
+        if not context.git_dir:
+            return {'success': False, 'message': 'Not in a git repository or cannot get current branch'}
+        
+        skip_reason = context.skip_reason()
+        if skip_reason:
+            return {'success': True, 'message': skip_reason}
+        
+        head = context.read_head()
+        manager = None
+        try:
+            manager = self.get_manager(context.git_dir, context.work_tree)
+            with trace_phase('total', command='daemon'):
+                success, message = manager.process_checkout()
+        except Exception as e:
+            success, message = False, f"Daemon failed to process checkout: {e}"
+        if success or (manager is not None and manager.last_ticket_dir is not None):
+            context.record_processed(head)
+        return {'success': success, 'message': message}
+    
+    def is_running(self) -> bool:
+        """Check whether a daemon is accepting connections on the socket."""
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.settimeout(1)
+                client.connect(str(self.socket_path))
+            return True
+        except OSError:
+            return False
+    
+    def send(self, request: Dict, timeout: float = 5) -> Optional[Dict]:
+        """Send a request to a running daemon. Returns its reply, or None if unreachable."""
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.settimeout(timeout)
+                client.connect(str(self.socket_path))
+                client.sendall((json.dumps(request) + "\n").encode())
+                reply = client.makefile().readline()
+            return json.loads(reply) if reply else None
+        except (OSError, ValueError):
+            return None
+    
+    def serve_forever(self) -> Tuple[bool, str]:
+        """Listen on the socket and serve hook requests until stopped."""
+        if not hasattr(socket, 'AF_UNIX'):
+            return False, "The sidecar daemon requires Unix domain socket support"
+        if self.is_running():
+            return False, f"Daemon already running on {self.socket_path}"
+        
+        # Remove a stale socket left by a daemon that did not shut down cleanly
+        if self.socket_path.exists() or self.socket_path.is_symlink():
+            self.socket_path.unlink()
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        daemon = self
+        
+        class _Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline()
+                if not line:
+                    # Bare connect, e.g. an is_running() probe
+                    return
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    reply = {'success': False, 'message': 'Malformed request'}
+                else:
+                    reply = daemon.handle_request(request)
+                try:
+                    self.wfile.write((json.dumps(reply) + "\n").encode())
+                except OSError:
+                    # Client gave up waiting; the checkout was still processed
+                    pass
+        
+        # Requests are handled one at a time, which also serializes filesystem updates
+        self._server = socketserver.UnixStreamServer(str(self.socket_path), _Handler)
+        try:
+            os.chmod(self.socket_path, 0o600)
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            self._server = None
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+        return True, "Daemon stopped"
+
+
+class HookQueue:
+    """
+    Post-checkout events waiting for the background worker in asynchronous hook mode.
+    The hook appends each event to a JSON-lines queue file and returns; a single
+    detached worker drains the queue, processing only the latest event per repository,
+    and logs failures for 'sidecar status'.
+    """
+    
+    QUEUE_FILENAME = "hook-queue.jsonl"
+    WORKER_LOCK_FILENAME = "hook-worker.lock"
+    LOG_FILENAME = "hook.log"
+    # Longest the hook waits to append while the worker takes the queue
+    LOCK_TIMEOUT = 5.0
+    # The log is cut to its newer half when it grows past this size
+    MAX_LOG_BYTES = 256 * 1024
+    
+    def __init__(self, directory: Optional[Path] = None):
+        directory = directory or ConfigManager.DEFAULT_CONFIG_DIR
+        self.queue_file = directory / self.QUEUE_FILENAME
+        self.queue_lock_file = directory / (self.QUEUE_FILENAME + ".lock")
+        self.worker_lock_file = directory / self.WORKER_LOCK_FILENAME
+        self.log_file = directory / self.LOG_FILENAME
+    
+    @staticmethod
+    def is_enabled(config: ConfigManager) -> bool:
+        """Whether hooks.async_hooks is on; read from the defaults so no repo detection is needed."""
+        value = config.get('hooks', 'async_hooks', repo_id='', fallback='false')
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    
+    def enqueue(self, event: Dict):
+        """Append an event (the same fields as a daemon request) to the queue."""
+        line = json.dumps(dict(event, time=time.time())) + "\n"
+        with FileLock(self.queue_lock_file, timeout=self.LOCK_TIMEOUT):
+            with open(self.queue_file, 'a') as f:
+                f.write(line)
+    
+    def pending(self) -> int:
+        """Number of queued events."""
+        try:
+            with open(self.queue_file) as f:
+                return sum(1 for line in f if line.strip())
+        except OSError:
+            return 0
+    
+    def take(self) -> List[Dict]:
+        """Remove and return every queued event, skipping malformed lines."""
+        with FileLock(self.queue_lock_file, timeout=self.LOCK_TIMEOUT):
+            try:
+                with open(self.queue_file) as f:
+                    lines = f.readlines()
+                self.queue_file.unlink()
+            except OSError:
+                return []
+        events = []
+        for line in lines:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                continue
+        return events
+    
+    @staticmethod
+    def coalesce(events: List[Dict]) -> List[Dict]:
+        """Keep only the latest event per repository, in the order those events arrived."""
+        latest: Dict[str, Dict] = {}
+        for event in events:
+            key = event.get('git_dir') or event.get('cwd') or ''
+            latest.pop(key, None)
+            latest[key] = event
+        return list(latest.values())
+    
+    def spawn_worker(self) -> bool:
+        """Start a detached 'sidecar process --drain'. Returns False if it could not be started."""
+        command = [sys.executable, str(Path(__file__).resolve()), 'process', '--drain']
+        kwargs = {}
+        if os.name == 'nt':
+            kwargs['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs['start_new_session'] = True
+        try:
+            # No inherited stdio, so git does not wait for the worker to exit
+            subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.DEVNULL, close_fds=True, **kwargs)
+            return True
+        except OSError as e:
+            self.log({}, f"Failed to start hook worker: {e}")
+            return False
+    
+    def worker_running(self) -> bool:
+        """Whether a worker currently holds the worker lock."""
+        try:
+            with FileLock(self.worker_lock_file, timeout=0):
+                return False
+        except TimeoutError:
+            return True
+    
+    def drain(self, handler: Callable[[Dict], Dict]) -> Tuple[int, int]:
+        """
+        Process queued events with handler (e.g. SidecarDaemon.handle_request) until
+        the queue is empty. Returns (processed, failed); (0, 0) when another worker
+        is already draining.
+        """
+        processed = failed = 0
+        while True:
+            lock = FileLock(self.worker_lock_file, timeout=0)
+            try:
+                lock.acquire()
+            except TimeoutError:
+                return processed, failed
+            try:
+                events = self.take()
+                while events:
+                    for event in self.coalesce(events):
+                        try:
+                            reply = handler(event)
+                        except Exception as e:
+                            reply = {'success': False, 'message': f"Hook worker failed: {e}"}
+                        processed += 1
+                        if not reply.get('success'):
+                            failed += 1
+                            self.log(event, reply.get('message', ''))
+                    events = self.take()
+            finally:
+                lock.release()
+            # An event queued just before the lock was released found it busy and spawned no worker
+            if not self.queue_file.exists():
+                return processed, failed
+    
+    def log(self, event: Dict, message: str):
+        """Append a failure to the log, trimming it when it grows too large."""
+        entry = {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'repo': event.get('git_dir') or event.get('cwd') or '',
+            'message': message,
+        }
+        try:
+            self.log_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_file, 'a') as f:
+                f.write(json.dumps(entry) + "\n")
+            if self.log_file.stat().st_size > self.MAX_LOG_BYTES:
+                lines = self.log_file.read_text().splitlines(keepends=True)
+                tmp_file = self.log_file.with_name(f".{self.log_file.name}.{os.getpid()}.tmp")
+                with open(tmp_file, 'w') as f:
+                    f.writelines(lines[len(lines) // 2:])
+                os.replace(tmp_file, self.log_file)
+        except OSError:
+            pass
+    
+    def read_log(self, limit: int = 10) -> List[Dict]:
+        """Return the last limit logged failures, oldest first."""
+        try:
+            with open(self.log_file) as f:
+                lines = collections.deque(f, maxlen=limit) if limit > 0 else []
+        except OSError:
+            return []
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+        return entries
+
+
+class HeadWatcher:
+    """
+    Watches HEAD of many repositories and runs the checkout pipeline when it changes,
+    for repositories that cannot have hooks. Uses inotify on the git directories on
+    Linux (git replaces HEAD by renaming HEAD.lock, so the directory is watched, not
+    the file) and polls HEAD's stat for repositories inotify cannot watch.
+    """
+    
+    POLL_INTERVAL = 5.0
+    # Lets a burst of HEAD writes (e.g. checkout then reset) settle into one run
+    DEBOUNCE_SECONDS = 0.1
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    EVENT_HEADER = struct.Struct('iIII')
+    
+    def __init__(self, work_trees: Iterable[Path], config_file: Optional[Path] = None,
+                 poll_interval: float = POLL_INTERVAL, use_inotify: bool = True):
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        # Warm TicketManagers per repository, as in the daemon
+        self.managers = SidecarDaemon(config_file)
+        self.repos: Dict[Path, Path] = {}
+        self.unsupported: List[Tuple[Path, str]] = []
+        for work_tree in work_trees:
+            reader = GitMetadataReader(work_tree / '.git')
+            if reader.git_dir is None:
+                self.unsupported.append((work_tree, "cannot resolve git directory"))
+            elif (reader.common_dir / 'reftable').is_dir():
+                self.unsupported.append((work_tree, "reftable repositories keep HEAD outside the HEAD file"))
+            else:
+                self.repos[reader.git_dir] = work_tree
+        self._heads: Dict[Path, Optional[str]] = {}
+        self._stamps: Dict[Path, Optional[Tuple[int, int, int]]] = {}
+        self._fd: Optional[int] = None
+        self._watches: Dict[int, Path] = {}
+        self._polled: List[Path] = []
+        self._next_poll = 0.0
+    
+    @staticmethod
+    def _head_stamp(git_dir: Path) -> Optional[Tuple[int, int, int]]:
+        """Identify HEAD's current contents by (mtime_ns, size, inode)."""
+        try:
+            stat = os.stat(git_dir / 'HEAD')
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    
+    def _inotify_init(self) -> Optional[int]:
+        """Open an inotify instance, or None where inotify is unavailable."""
+        if not self.use_inotify or not sys.platform.startswith('linux'):
+            return None
+        # Imported here so hook runs do not pay for ctypes
+        import ctypes
+        import ctypes.util
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        self._libc = libc
+        return fd
+    
+    def start(self) -> Tuple[int, int]:
+        """Record every HEAD and set up watches. Returns (watched, polled) repository counts."""
+        for git_dir in self.repos:
+            self._heads[git_dir] = GitMetadataReader(git_dir).read_head()
+            self._stamps[git_dir] = self._head_stamp(git_dir)
+        
+        self._fd = self._inotify_init()
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        for git_dir in self.repos:
+            wd = -1
+            if self._fd is not None:
+                # Fails past fs.inotify.max_user_watches; those repositories are polled
+                wd = self._libc.inotify_add_watch(self._fd, os.fsencode(git_dir), mask)
+            if wd >= 0:
+                self._watches[wd] = git_dir
+            else:
+                self._polled.append(git_dir)
+        return len(self._watches), len(self._polled)
+    
+    def close(self):
+        """Release the inotify instance."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            self._watches.clear()
+    
+    def _read_events(self) -> set:
+        """Git directories whose HEAD was written, from all pending inotify events."""
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+                offset += self.EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if mask & self.IN_Q_OVERFLOW:
+                    # Events were dropped; check every watched repository
+                    changed.update(self._watches.values())
+                elif name == b'HEAD' and wd in self._watches:
+                    changed.add(self._watches[wd])
+    
+    def _poll(self) -> set:
+        """Polled git directories whose HEAD stat changed."""
+        changed = set()
+        for git_dir in self._polled:
+            stamp = self._head_stamp(git_dir)
+            if stamp != self._stamps.get(git_dir):
+                self._stamps[git_dir] = stamp
+                changed.add(git_dir)
+        return changed
+    
+    def run_once(self, timeout: float = 1.0) -> List[Tuple[Path, bool, str]]:
+        """
+        Wait up to timeout for HEAD changes and process them.
+        Returns (work_tree, success, message) for every repository processed.
+        """
+        changed = set()
+        if self._fd is not None and self._watches:
+            readable, _, _ = select.select([self._fd], [], [], timeout)
+            if readable:
+                time.sleep(self.DEBOUNCE_SECONDS)
+                changed |= self._read_events()
+        else:
+            time.sleep(timeout)
+        if self._polled and time.monotonic() >= self._next_poll:
+            changed |= self._poll()
+            self._next_poll = time.monotonic() + self.poll_interval
+        
+        results = []
+        for git_dir in sorted(changed):
+            head = GitMetadataReader(git_dir).read_head()
+            if head is None or head == self._heads.get(git_dir):
+                continue
+            success, message = self.process(git_dir)
+            # A checkout skipped mid-rebase is processed when HEAD moves again at the end
+            if success and not message.endswith("in progress - no action taken"):
+                self._heads[git_dir] = head
+            results.append((self.repos[git_dir], success, message))
+        return results
+    
+    def process(self, git_dir: Path) -> Tuple[bool, str]:
+        """Run the checkout pipeline for one repository, as the post-checkout hook would."""
+        work_tree = self.repos[git_dir]
+        context = CheckoutContext(environ={'GIT_DIR': str(git_dir), 'GIT_WORK_TREE': str(work_tree)}, cwd=work_tree)
+        operation = context.operation_in_progress()
+        if operation:
+            return True, f"{operation} in progress - no action taken"
+        head = context.read_head()
+        manager = None
+        try:
+            manager = self.managers.get_manager(git_dir, work_tree)
+            with trace_phase('total', command='watch'):
+                success, message = manager.process_checkout()
+        except Exception as e:
+            success, message = False, f"Failed to process checkout: {e}"
+        if success or (manager is not None and manager.last_ticket_dir is not None):
+            context.record_processed(head)
+        return success, message
+    
+    def run(self, stop: Optional[threading.Event] = None,
+            report: Optional[Callable[[Path, bool, str], None]] = None):
+        """Watch until stop is set (or forever), passing every result to report."""
+        stop = stop or threading.Event()
+        self.start()
+        try:
+            while not stop.is_set():
+                # Short waits keep polling on schedule and notice stop promptly
+                for work_tree, success, message in self.run_once(min(1.0, self.poll_interval)):
+                    if report:
+                        report(work_tree, success, message)
+        finally:
+            self.close()
 
 
 def _init_repo_config(config: ConfigManager) -> int:
@@ -930,43 +3357,56 @@ def _init_repo_config(config: ConfigManager) -> int:
     print(f"\nConfiguring repository: {repo_id}")
     print("You can press Enter to use default values or inherit from defaults.\n")
     
-    # Get defaults from config
-    default_workspace_base = config.get_path('paths', 'workspace_base', repo_id=None)
-    repo_name = repo_identifier.get_repo_name_for_path()
-    suggested_workspace_base = default_workspace_base / repo_name
-    
-    # Prompt for workspace_base
-    workspace_input = input(f"Workspace base directory [{suggested_workspace_base}]: ").strip()
-    if workspace_input:
-        workspace_base = workspace_input
-    else:
-        workspace_base = str(suggested_workspace_base)
-    
-    # Save workspace_base
-    config.set('paths', 'workspace_base', workspace_base, repo_id=repo_id)
-    
-    # Ask if user wants to override other settings
-    print("\nThe following settings will inherit from defaults:")
-    print(f"  - Ticket pattern: {config.get('ticket_pattern', 'prefix_pattern', repo_id=None)}")
-    print(f"  - Symlink filename: {config.get('links', 'current_ticket_link_filename', repo_id=None, fallback='CurrentTicket')}")
-    print(f"  - Tools library path: {config.get_path('paths', 'tools_library_path', repo_id=None)}")
-    
-    override = input("\nOverride any of these settings? [y/N]: ").strip().lower()
-    if override == 'y':
-        # Prompt for ticket pattern override
-        prefix_pattern = input(f"Ticket prefix pattern [{config.get('ticket_pattern', 'prefix_pattern', repo_id=None)}]: ").strip()
-        if prefix_pattern:
-            config.set('ticket_pattern', 'prefix_pattern', prefix_pattern, repo_id=repo_id)
+    # Collect all answers into a single config write
+    with config.batch():
+        # Get defaults from config
+        default_workspace_base = config.get_path('paths', 'workspace_base', repo_id=None)
+        repo_name = repo_identifier.get_repo_name_for_path()
+        suggested_workspace_base = default_workspace_base / repo_name
+        
+        # Prompt for workspace_base
+        workspace_input = input(f"Workspace base directory [{suggested_workspace_base}]: ").strip()
+        if workspace_input:
+            workspace_base = workspace_input
+        else:
+            workspace_base = str(suggested_workspace_base)
+        
+        # Save workspace_base
+        config.set('paths', 'workspace_base', workspace_base, repo_id=repo_id)
+        
+        # Ask if user wants to override other settings
+        print("\nThe following settings will inherit from defaults:")
+        print(f"  - Ticket pattern: {config.get('ticket_pattern', 'prefix_pattern', repo_id=None)}")
+        print(f"  - Symlink filename: {config.get('links', 'current_ticket_link_filename', repo_id=None, fallback='CurrentTicket')}")
+        print(f"  - Tools library path: {config.get_path('paths', 'tools_library_path', repo_id=None)}")
         
-        # Prompt for symlink filename
-        symlink_filename = input(f"Symlink filename [{config.get('links', 'current_ticket_link_filename', repo_id=None, fallback='CurrentTicket')}]: ").strip()
-        if symlink_filename:
-            config.set('links', 'current_ticket_link_filename', symlink_filename, repo_id=repo_id)
+        override = input("\nOverride any of these settings? [y/N]: ").strip().lower()
+        if override == 'y':
+            # Prompt for ticket pattern override
+            prefix_pattern = input(f"Ticket prefix pattern [{config.get('ticket_pattern', 'prefix_pattern', repo_id=None)}]: ").strip()
+            if prefix_pattern:
+                config.set('ticket_pattern', 'prefix_pattern', prefix_pattern, repo_id=repo_id)
+        
+            # Prompt for symlink filename
+            symlink_filename = input(f"Symlink filename [{config.get('links', 'current_ticket_link_filename', repo_id=None, fallback='CurrentTicket')}]: ").strip()
+            if symlink_filename:
+                config.set('links', 'current_ticket_link_filename', symlink_filename, repo_id=repo_id)
     
     print(f"\nRepository '{repo_id}' configured successfully!")
     return 0
 
 
+def _non_negative_int(value: str) -> int:
+    """argparse type for counts that may be zero but not negative."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {number}")
+    return number
+
+
 def main():
     """Main CLI entry point."""
     parser = argparse.ArgumentParser(
@@ -982,7 +3422,23 @@ def main():
     hook_subparsers.add_parser('uninstall', help='Uninstall post-checkout hook')
     
     # Process command (called by hook)
-    subparsers.add_parser('process', help='Process current checkout (called by hook)')
+    process_parser = subparsers.add_parser('process', help='Process current checkout (called by hook)')
+    process_parser.add_argument('hook_args', nargs='*', metavar='HOOK_ARG',
+                                help='post-checkout hook arguments: previous HEAD, new HEAD, branch flag')
+    process_parser.add_argument('--all-branches', action='store_true',
+                                help='Set up ticket directories for every local branch, not just the current one')
+    process_parser.add_argument('--timings', action='store_true',
+                                help='Print a JSON timing record per phase to stderr (see also SIDECAR_TRACE)')
+    # Run by the detached worker in asynchronous hook mode
+    process_parser.add_argument('--drain', action='store_true', help=argparse.SUPPRESS)
+    
+    # Scan command
+    scan_parser = subparsers.add_parser('scan', help='Find and register every repository under a directory')
+    scan_parser.add_argument('root', metavar='ROOT', help='Directory to search for git repositories')
+    scan_parser.add_argument('--install-hooks', action='store_true',
+                             help='Install or upgrade the post-checkout hook in every repository found')
+    scan_parser.add_argument('--jobs', '-j', type=int, default=RepoScanner.DEFAULT_WORKERS,
+                             help=f'Repositories processed in parallel (default: {RepoScanner.DEFAULT_WORKERS})')
     
     # Config command
     config_parser = subparsers.add_parser('config', help='View or edit configuration')
@@ -1012,7 +3468,37 @@ def main():
     repos_remove_parser.add_argument('repo_id', help='Repository identifier')
     
     # List command
-    subparsers.add_parser('list', help='List existing ticket directories')
+    list_parser = subparsers.add_parser('list', help='List existing ticket directories')
+    list_parser.add_argument('--prefix', help='Only tickets with this prefix (e.g. JIRA)')
+    list_parser.add_argument('--number', help='Only tickets with this number')
+    list_parser.add_argument('--match', metavar='REGEX', help='Only directory names matching this regular expression')
+    list_parser.add_argument('--sort', choices=['name', 'mtime', 'none'], default='name',
+                             help='Sort by name (default), by modification time (newest first), or not at all')
+    list_parser.add_argument('--limit', type=_non_negative_int, metavar='N', help='Show at most N directories')
+    list_parser.add_argument('--format', choices=['text', 'json'], default='text', help='Output format')
+    list_parser.add_argument('--all-repos', action='store_true',
+                             help='List tickets of every configured repository, grouped per repository')
+    list_parser.add_argument('--jobs', '-j', type=int, default=RepoScanner.DEFAULT_WORKERS,
+                             help=f'Workspaces scanned in parallel with --all-repos (default: {RepoScanner.DEFAULT_WORKERS})')
+    
+    # Daemon command
+    daemon_parser = subparsers.add_parser('daemon', help='Run a background daemon that serves checkout hooks')
+    daemon_parser.add_argument('--socket', metavar='PATH', help='Unix socket path (default: ~/.sidecar/sidecar.sock)')
+    daemon_parser.add_argument('--stop', action='store_true', help='Stop a running daemon')
+    daemon_parser.add_argument('--status', action='store_true', help='Report whether a daemon is running')
+    
+    # Watch command
+    watch_parser = subparsers.add_parser('watch', help='Process checkouts of repositories without hooks by watching HEAD')
+    watch_parser.add_argument('roots', nargs='+', metavar='ROOT', help='Directories to search for git repositories')
+    watch_parser.add_argument('--interval', type=float, default=HeadWatcher.POLL_INTERVAL,
+                              help=f'Seconds between stat checks of repositories without inotify '
+                                   f'(default: {HeadWatcher.POLL_INTERVAL:g})')
+    watch_parser.add_argument('--poll', action='store_true', help='Poll every repository instead of using inotify')
+    
+    # Status command
+    status_parser = subparsers.add_parser('status', help='Show daemon and asynchronous hook status')
+    status_parser.add_argument('--lines', '-n', type=int, default=10,
+                               help='Number of recent hook failures to show (default: 10)')
     
     args = parser.parse_args()
     
@@ -1020,6 +3506,9 @@ def main():
         parser.print_help()
         return 1
     
+    # Tracing is a no-op unless requested with --timings or SIDECAR_TRACE
+    set_tracer(Tracer.from_settings(os.environ.get(Tracer.ENV_VAR), getattr(args, 'timings', False)))
+    
     # Determine script path - only needed if not installed as package
     # GitHookManager will auto-detect if 'sidecar' command is available
     script_path = None if shutil.which('sidecar') else Path(__file__).resolve()
@@ -1087,8 +3576,55 @@ def main():
             return 1
     
     elif args.command == 'process':
-        manager = TicketManager()
-        success, message = manager.process_checkout()
+        if args.all_branches:
+            with trace_phase('total', command='process --all-branches'):
+                success, message = TicketManager().process_all_branches()
+            print(message)
+            return 0 if success else 1
+        
+        if args.drain:
+            processed, failed = HookQueue().drain(SidecarDaemon().handle_request)
+            print(f"Processed {processed} queued checkout(s), {failed} failed")
+            return 0 if failed == 0 else 1
+        
+        with trace_phase('total', command='process'):
+            context = CheckoutContext(args.hook_args)
+            skip_reason = context.skip_reason()
+            if skip_reason:
+                print(skip_reason)
+                return 0
+            
+            config = ConfigManager()
+            if HookQueue.is_enabled(config):
+                queue = HookQueue()
+                try:
+                    queue.enqueue({
+                        'cwd': os.getcwd(),
+                        'git_dir': str(context.git_dir or ''),
+                        'work_tree': str(context.work_tree or ''),
+                        'args': args.hook_args,
+                    })
+                except (OSError, TimeoutError):
+                    # Fall through to processing the checkout in the foreground
+                    pass
+                else:
+                    if not queue.worker_running():
+                        queue.spawn_worker()
+                    print("Checkout queued for background processing")
+                    return 0
+            
+            head = context.read_head()
+            manager = TicketManager(git_dir=context.git_dir, work_tree=context.work_tree, config=config)
+            success, message = manager.process_checkout()
+            if success or manager.last_ticket_dir is not None:
+                # Tool and link errors recur on every run, so they do not force a retry
+                context.record_processed(head)
+        print(message)
+        return 0 if success else 1
+    
+    elif args.command == 'scan':
+        scanner = RepoScanner(ConfigManager(), GitHookManager(script_path), workers=args.jobs)
+        success, message = scanner.scan(Path(args.root), install_hooks=args.install_hooks)
         print(message)
         return 0 if success else 1
     
@@ -1193,22 +3729,149 @@ def main():
             repos_parser.print_help()
             return 1
     
+    elif args.command == 'list' and args.all_repos:
+        # Repo detection is not needed; repo_id '' selects the defaults
+        manager = TicketManager(repo_id='')
+        try:
+            groups = manager.list_all_repos(max(1, args.jobs), prefix=args.prefix, number=args.number,
+                                            pattern=args.match, sort=args.sort, limit=args.limit)
+        except re.error as e:
+            print(f"Error: invalid --match pattern: {e}")
+            return 1
+        
+        total = sum(len(entries) for _, _, entries in groups)
+        if args.format == 'json':
+            repos = []
+            for repo_id, workspace_base, entries in groups:
+                tickets = []
+                for entry in entries:
+                    record = {'name': entry.name, 'path': entry.path}
+                    if args.sort == 'mtime':
+                        record['mtime'] = entry.stat().st_mtime
+                    tickets.append(record)
+                repos.append({'repo_id': repo_id, 'workspace': str(workspace_base),
+                              'count': len(tickets), 'tickets': tickets})
+            print(json.dumps({'total': total, 'repos': repos}, indent=2))
+            return 0
+        
+        if not groups:
+            print("No repositories configured.")
+            return 0
+        
+        for repo_id, workspace_base, entries in groups:
+            print(f"{repo_id} ({len(entries)} ticket{'s' if len(entries) != 1 else ''}) in {workspace_base}")
+            for entry in entries:
+                print(f"  - {entry.name}")
+        print(f"\nTotal: {total} ticket directories in {len(groups)} repositories")
+        return 0
+    
     elif args.command == 'list':
         manager = TicketManager()
-        ticket_dirs = manager.list_ticket_directories()
-        if not ticket_dirs:
-            repo_id = manager.repo_id
-            workspace_base = manager.dir_manager.get_workspace_base(repo_id)
+        workspace_base = manager.dir_manager.get_workspace_base(manager.repo_id, create=False)
+        try:
+            entries = manager.iter_ticket_directories(prefix=args.prefix, number=args.number, pattern=args.match,
+                                                      sort=args.sort, limit=args.limit)
+        except re.error as e:
+            print(f"Error: invalid --match pattern: {e}")
+            return 1
+        
+        if args.format == 'json':
+            # Stream a JSON array one entry at a time
+            print('[')
+            for index, entry in enumerate(entries):
+                record = {'name': entry.name, 'path': entry.path}
+                if args.sort == 'mtime':
+                    record['mtime'] = entry.stat().st_mtime
+                print(('  ' if index == 0 else ', ') + json.dumps(record))
+            print(']')
+            return 0
+        
+        first = next(entries, None)
+        if first is None:
             print(f"No ticket directories found in {workspace_base}.")
             return 0
         
-        repo_id = manager.repo_id
-        workspace_base = manager.dir_manager.get_workspace_base(repo_id)
         print(f"Ticket directories in {workspace_base}:")
-        for ticket_dir in sorted(ticket_dirs):
-            print(f"  - {ticket_dir.name}")
+        for entry in itertools.chain([first], entries):
+            print(f"  - {entry.name}")
+        return 0
+    
+    elif args.command == 'watch':
+        work_trees = []
+        for root in args.roots:
+            root = Path(root).expanduser().resolve()
+            if not root.is_dir():
+                print(f"Not a directory: {root}")
+                return 1
+            work_trees.extend(RepoScanner.find_repos(root))
+        watcher = HeadWatcher(work_trees, poll_interval=max(0.1, args.interval), use_inotify=not args.poll)
+        for work_tree, reason in watcher.unsupported:
+            print(f"Not watching {work_tree}: {reason}")
+        if not watcher.repos:
+            print("No repositories to watch")
+            return 1
+        queue = HookQueue()
+        
+        def report(work_tree: Path, success: bool, message: str):
+            print(f"{work_tree}: {message}", flush=True)
+            if not success:
+                # Shown by 'sidecar status', like failures of asynchronous hooks
+                queue.log({'cwd': str(work_tree)}, message)
+        
+        print(f"Watching {len(watcher.repos)} repositories (Ctrl+C to stop)", flush=True)
+        try:
+            watcher.run(report=report)
+        except KeyboardInterrupt:
+            pass
+        return 0
+    
+    elif args.command == 'status':
+        daemon = SidecarDaemon()
+        queue = HookQueue()
+        if daemon.is_running():
+            print(f"Daemon: running on {daemon.socket_path}")
+        else:
+            print("Daemon: not running")
+        print(f"Asynchronous hooks: {'enabled' if HookQueue.is_enabled(ConfigManager()) else 'disabled'}")
+        worker = 'running' if queue.worker_running() else 'idle'
+        print(f"Queued checkouts: {queue.pending()} (worker {worker})")
+        
+        failures = queue.read_log(args.lines)
+        if not failures:
+            print("No hook failures logged")
+            return 0
+        print(f"\nRecent hook failures ({queue.log_file}):")
+        for entry in failures:
+            message = entry.get('message', '').replace("\n", "\n    ")
+            print(f"  {entry.get('time', '?')} {entry.get('repo', '')}\n    {message}")
         return 0
     
+    elif args.command == 'daemon':
+        daemon = SidecarDaemon(socket_path=Path(args.socket) if args.socket else None)
+        if args.status:
+            if daemon.is_running():
+                print(f"Daemon running on {daemon.socket_path}")
+                return 0
+            print("Daemon not running")
+            return 1
+        if args.stop:
+            reply = daemon.send({'command': 'stop'})
+            if reply is None:
+                print("Daemon not running")
+                return 1
+            print(reply['message'])
+            return 0
+        if daemon.is_running():
+            print(f"Daemon already running on {daemon.socket_path}")
+            return 1
+        print(f"Sidecar daemon listening on {daemon.socket_path}")
+        try:
+            success, message = daemon.serve_forever()
+        except KeyboardInterrupt:
+            success, message = True, "Daemon stopped"
+        print(message)
+        return 0 if success else 1
+    
     else:
         parser.print_help()
         return 1
@@ -3,13 +3,21 @@
 Comprehensive test suite for sidecar using Python standard library.
 """
 
+import contextlib
+import errno
+import importlib.util
 import io
+import json
 import os
 import shutil
 import subprocess
+import sys
 import tempfile
+import threading
+import time
 import unittest
 from pathlib import Path
+from typing import Optional
 from unittest.mock import Mock, patch
 
 # Import the module to test
@@ -313,6 +321,143 @@ paths.workspace_base = ~/tickets/repo-a
         
         self.assertEqual(repo_id, 'github.com/owner/repo-test')
     
+    def _age_config(self):
+        """Move the config.ini mtime out of the racy window."""
+        stat = os.stat(self.config_file)
+        os.utime(self.config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10_000_000_000))
+    
+    def test_snapshot_written_next_to_config(self):
+        """Parsed config is stored as a snapshot beside config.ini."""
+        main.ConfigManager(self.config_file)
+        self.assertFalse((self.config_dir / "config.ini.snapshot").exists())
+        self._age_config()
+        main.ConfigManager(self.config_file)
+        self.assertTrue((self.config_dir / "config.ini.snapshot").exists())
+    
+    def test_snapshot_avoids_reparse(self):
+        """A fresh snapshot is used instead of parsing config.ini."""
+        main.ConfigManager(self.config_file).set('paths', 'workspace_base', '~/snap', repo_id='github.com/o/r')
+        self._age_config()
+        main.ConfigManager(self.config_file)
+        
+        with patch('main.configparser.ConfigParser.read', side_effect=AssertionError("config.ini parsed")):
+            config = main.ConfigManager(self.config_file)
+            self.assertEqual(config.get('paths', 'workspace_base', repo_id='github.com/o/r'), '~/snap')
+            self.assertEqual(config.list_configured_repos(), ['github.com/o/r'])
+            self.assertIn('[default.paths]', config.view(default_only=True))
+    
+    def test_snapshot_rebuilt_when_config_changes(self):
+        """Edits to config.ini invalidate the snapshot."""
+        main.ConfigManager(self.config_file)
+        content = self.config_file.read_text().replace('~/tickets', '~/edited_tickets')
+        self.config_file.write_text(content)
+        
+        config = main.ConfigManager(self.config_file)
+        self.assertEqual(config.get('paths', 'workspace_base'), '~/edited_tickets')
+    
+    def test_snapshot_corrupt_is_ignored(self):
+        """A corrupt snapshot falls back to parsing config.ini."""
+        main.ConfigManager(self.config_file)
+        self._age_config()
+        main.ConfigManager(self.config_file)
+        (self.config_dir / "config.ini.snapshot").write_bytes(b"not marshal data")
+        
+        config = main.ConfigManager(self.config_file)
+        self.assertEqual(config.get('paths', 'workspace_base'), '~/tickets')
+    
+    def test_get_settings_resolved(self):
+        """Settings are resolved with inheritance, expanded and split."""
+        config = main.ConfigManager(self.config_file)
+        repo_id = 'github.com/owner/repo-a'
+        config.set('paths', 'workspace_base', '~/repo_a', repo_id=repo_id)
+        config.set('links', 'current_ticket_link_locations', '~/Desktop, ~/Downloads', repo_id=repo_id)
+        
+        settings = config.get_settings(repo_id)
+        
+        self.assertEqual(settings.repo_id, repo_id)
+        self.assertEqual(settings.workspace_base, Path.home() / 'repo_a')
+        self.assertEqual(settings.tools_library_path, Path.home() / 'tools')
+        self.assertIsInstance(settings.standard_branches, frozenset)
+        self.assertIn('main', settings.standard_branches)
+        self.assertEqual(settings.link_locations, (Path.home() / 'Desktop', Path.home() / 'Downloads'))
+        self.assertEqual(settings.tools_to_link, ('notebooks', 'scripts', 'utils'))
+        self.assertEqual(settings.link_filename, 'CurrentTicket')
+    
+    def test_get_settings_cached_and_invalidated(self):
+        """Settings are computed once and dropped by set() and remove_repo_config()."""
+        config = main.ConfigManager(self.config_file)
+        repo_id = 'github.com/owner/repo-a'
+        first = config.get_settings(repo_id)
+        self.assertIs(config.get_settings(repo_id), first)
+        
+        config.set('paths', 'workspace_base', '~/changed', repo_id=repo_id)
+        changed = config.get_settings(repo_id)
+        self.assertIsNot(changed, first)
+        self.assertEqual(changed.workspace_base, Path.home() / 'changed')
+        
+        config.remove_repo_config(repo_id)
+        self.assertEqual(config.get_settings(repo_id).workspace_base, Path.home() / 'tickets')
+    
+    def test_get_settings_uses_instance_repo_id(self):
+        """Without repo_id, settings follow the instance repo context."""
+        repo_id = 'github.com/owner/repo-a'
+        main.ConfigManager(self.config_file).set('links', 'tools_to_link', 'a, b', repo_id=repo_id)
+        config = main.ConfigManager(self.config_file, repo_id=repo_id)
+        self.assertEqual(config.get_settings().tools_to_link, ('a', 'b'))
+    
+    def test_get_settings_link_workers(self):
+        """link_workers defaults to 8 and ignores invalid values."""
+        config = main.ConfigManager(self.config_file)
+        self.assertEqual(config.get_settings().link_workers, 8)
+        config.set('links', 'link_workers', '3', default=True)
+        self.assertEqual(config.get_settings().link_workers, 3)
+        config.set('links', 'link_workers', 'many', default=True)
+        self.assertEqual(config.get_settings().link_workers, 8)
+    
+    def test_batch_writes_once(self):
+        """A batch of changes is written to disk a single time."""
+        config = main.ConfigManager(self.config_file)
+        repo_id = 'github.com/owner/batch'
+        
+        with patch.object(main.ConfigManager, '_save_config', autospec=True,
+                          side_effect=main.ConfigManager._save_config) as mock_save:
+            with config.batch():
+                config.set('paths', 'workspace_base', '~/batch', repo_id=repo_id)
+                config.set('links', 'tools_to_link', 'a, b', repo_id=repo_id)
+                config.set('paths', 'workspace_base', '~/defaults', default=True)
+                # Pending changes are visible inside the batch
+                self.assertEqual(config.get('paths', 'workspace_base', repo_id=repo_id), '~/batch')
+                self.assertEqual(config.get_settings(repo_id).tools_to_link, ('a', 'b'))
+        
+        self.assertEqual(mock_save.call_count, 1)
+        reloaded = main.ConfigManager(self.config_file)
+        self.assertEqual(reloaded.get('paths', 'workspace_base', repo_id=repo_id), '~/batch')
+        self.assertEqual(reloaded.get('paths', 'workspace_base'), '~/defaults')
+    
+    def test_batch_discarded_on_error(self):
+        """An exception inside a batch leaves config.ini untouched."""
+        config = main.ConfigManager(self.config_file)
+        before = self.config_file.read_text()
+        
+        with self.assertRaises(RuntimeError):
+            with config.batch():
+                config.set('paths', 'workspace_base', '~/lost', default=True)
+                config.remove_repo_config('github.com/owner/none')
+                raise RuntimeError("abort")
+        
+        self.assertEqual(self.config_file.read_text(), before)
+        self.assertEqual(config.get('paths', 'workspace_base'), '~/tickets')
+    
+    def test_save_is_atomic_replace(self):
+        """Writes go through a temp file and os.replace, leaving no temp files behind."""
+        config = main.ConfigManager(self.config_file)
+        with patch('main.os.replace', wraps=os.replace) as mock_replace:
+            config.set('paths', 'workspace_base', '~/atomic', default=True)
+        
+        targets = [Path(call[0][1]) for call in mock_replace.call_args_list]
+        self.assertIn(self.config_file.resolve(), [t.resolve() for t in targets])
+        self.assertEqual([p.name for p in self.config_dir.iterdir() if p.name.endswith('.tmp')], [])
+    
     def test_view_default_only(self):
         """Test view with --default-only flag."""
         config = main.ConfigManager(self.config_file)
@@ -565,6 +710,112 @@ class TestRepoIdentifier(unittest.TestCase):
             self.assertNotEqual(id1, id2)
 
 
+class TestGitMetadataReader(unittest.TestCase):
+    """Test GitMetadataReader class against real git repositories."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.repo_dir = Path(self.temp_dir) / "repo"
+        self.repo_dir.mkdir()
+        if shutil.which('git') is None:
+            self.skipTest("git not installed")
+        self._git('init', '-q', '-b', 'main')
+        self._git('-c', 'user.name=t', '-c', 'user.email=t@t', 'commit', '-q', '--allow-empty', '-m', 'init')
+        self.git_dir = self.repo_dir / ".git"
+    
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _git(self, *args, cwd=None):
+        return subprocess.run(['git', *args], cwd=cwd or self.repo_dir, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    
+    def test_current_branch(self):
+        """Branch name matches 'git rev-parse --abbrev-ref HEAD'."""
+        self._git('checkout', '-q', '-b', 'JIRA-123-feature/x')
+        reader = main.GitMetadataReader(self.git_dir)
+        self.assertEqual(reader.get_current_branch(), self._git('rev-parse', '--abbrev-ref', 'HEAD'))
+    
+    def test_current_branch_packed_refs(self):
+        """Resolve branches that only exist in packed-refs."""
+        self._git('checkout', '-q', '-b', 'JIRA-7-packed')
+        self._git('pack-refs', '--all')
+        self.assertFalse((self.git_dir / 'refs' / 'heads' / 'JIRA-7-packed').exists())
+        self.assertEqual(main.GitMetadataReader(self.git_dir).get_current_branch(), 'JIRA-7-packed')
+    
+    def test_detached_head(self):
+        """Detached HEAD reports 'HEAD' like git does."""
+        self._git('checkout', '-q', '--detach')
+        self.assertEqual(main.GitMetadataReader(self.git_dir).get_current_branch(), 'HEAD')
+    
+    def test_unborn_branch_falls_back(self):
+        """Unborn branches are left to the git CLI."""
+        self._git('checkout', '-q', '--orphan', 'JIRA-9-empty')
+        self.assertIsNone(main.GitMetadataReader(self.git_dir).get_current_branch())
+    
+    def test_remotes_match_git(self):
+        """Remotes and URLs match 'git remote -v', first URL and sorted by name."""
+        self._git('remote', 'add', 'upstream', 'git@github.com:original/repo.git')
+        self._git('remote', 'add', 'origin', 'https://github.com/owner/repo.git')
+        self._git('config', '--add', 'remote.origin.url', 'https://mirror.example.com/repo.git')
+        
+        remotes = main.GitMetadataReader(self.git_dir).get_remotes()
+        
+        self.assertEqual(list(remotes), ['origin', 'upstream'])
+        self.assertEqual(remotes['origin'], self._git('remote', 'get-url', 'origin'))
+        self.assertEqual(remotes['upstream'], 'git@github.com:original/repo.git')
+    
+    def test_worktree_gitfile(self):
+        """Follow .git files and commondir for linked worktrees."""
+        self._git('remote', 'add', 'origin', 'https://github.com/owner/repo.git')
+        worktree = Path(self.temp_dir) / "wt"
+        self._git('worktree', 'add', '-q', '-b', 'PROJ-5-wt', str(worktree))
+        
+        reader = main.GitMetadataReader(worktree / ".git")
+        
+        self.assertEqual(reader.get_current_branch(), 'PROJ-5-wt')
+        self.assertEqual(reader.get_remotes(), {'origin': 'https://github.com/owner/repo.git'})
+    
+    def test_url_rewrites_fall_back(self):
+        """insteadOf rewriting is left to the git CLI."""
+        self._git('remote', 'add', 'origin', 'gh:owner/repo')
+        self._git('config', 'url.https://github.com/.insteadOf', 'gh:')
+        self.assertIsNone(main.GitMetadataReader(self.git_dir).get_remotes())
+    
+    def test_global_url_rewrites_fall_back(self):
+        """insteadOf rules in the global config keep the id git reports."""
+        self._git('remote', 'add', 'origin', 'https://github.com/acme/widgets.git')
+        home = Path(self.temp_dir) / "home"
+        home.mkdir()
+        (home / ".gitconfig").write_text('[url "https://mirror.corp/"]\n\tinsteadOf = https://github.com/\n')
+        env = {'HOME': str(home), 'XDG_CONFIG_HOME': str(home / ".config"), 'GIT_CONFIG_NOSYSTEM': '1'}
+        with patch.dict(os.environ, env):
+            self.assertIsNone(main.GitMetadataReader(self.git_dir).get_remotes())
+            self.assertEqual(main.RepoIdentifier(self.git_dir).get_repo_identifier(),
+                             'mirror.corp/acme/widgets')
+            (home / ".gitconfig").write_text('[user]\n\tname = t\n')
+            self.assertEqual(main.GitMetadataReader(self.git_dir).get_remotes(),
+                             {'origin': 'https://github.com/acme/widgets.git'})
+    
+    def test_not_a_repository(self):
+        """Directories without HEAD are not understood."""
+        empty = Path(self.temp_dir) / "empty"
+        empty.mkdir()
+        reader = main.GitMetadataReader(empty)
+        self.assertIsNone(reader.get_current_branch())
+        self.assertIsNone(reader.get_remotes())
+    
+    def test_repo_identifier_without_subprocess(self):
+        """RepoIdentifier and BranchAnalyzer answer without spawning git."""
+        self._git('remote', 'add', 'origin', 'https://github.com/owner/repo.git')
+        config = main.ConfigManager(Path(self.temp_dir) / "config.ini")
+        with patch('main.subprocess.run', side_effect=AssertionError("git was spawned")):
+            self.assertEqual(main.RepoIdentifier(self.git_dir).get_repo_identifier(), 'github.com/owner/repo')
+            self.assertEqual(main.BranchAnalyzer(config).get_current_branch(self.git_dir), 'main')
+
+
 class TestBranchAnalyzer(unittest.TestCase):
     """Test BranchAnalyzer class."""
     
@@ -597,6 +848,46 @@ class TestBranchAnalyzer(unittest.TestCase):
         self.assertTrue(analyzer.is_standard_branch('custom2'))
         self.assertFalse(analyzer.is_standard_branch('main'))
     
+    def test_default_excluded_branches(self):
+        """Automated and release branches are excluded by default."""
+        self.assertTrue(self.analyzer.is_excluded_branch('release/2.1'))
+        self.assertTrue(self.analyzer.is_excluded_branch('hotfix/JIRA-1'))
+        self.assertTrue(self.analyzer.is_excluded_branch('dependabot/npm_and_yarn/lodash-4.17.21'))
+        self.assertTrue(self.analyzer.is_excluded_branch('renovate/pin-dependencies'))
+        self.assertFalse(self.analyzer.is_excluded_branch('JIRA-123-feature'))
+        self.assertFalse(self.analyzer.is_excluded_branch('main'))
+    
+    def test_exclusion_rules_exact_glob_and_regex(self):
+        """Exclusion rules are exact names, globs or 're:' regexes, one per line."""
+        self.config.set('branches', 'exclude_branches', 'wip\nbot-*\nre:v\\d+\\.\\d+$', default=True)
+        analyzer = main.BranchAnalyzer(self.config)
+        
+        self.assertEqual(analyzer.excluded_names, frozenset({'wip'}))
+        self.assertTrue(analyzer.is_excluded_branch('wip'))
+        self.assertFalse(analyzer.is_excluded_branch('wip-2'))
+        self.assertTrue(analyzer.is_excluded_branch('bot-ABC-1'))
+        self.assertTrue(analyzer.is_excluded_branch('v1.2'))
+        self.assertFalse(analyzer.is_excluded_branch('v1.2-ABC-1'))
+        self.assertFalse(analyzer.is_excluded_branch('release/2.1'))
+    
+    def test_exclusion_rules_repo_specific(self):
+        """Repo sections override the default exclusion rules."""
+        repo_id = 'github.com/owner/repo-test'
+        self.config.set('branches', 'exclude_branches', 'ABC-*', repo_id=repo_id)
+        analyzer = main.BranchAnalyzer(main.ConfigManager(self.config_file, repo_id=repo_id))
+        
+        self.assertTrue(analyzer.is_excluded_branch('ABC-1-x'))
+        self.assertFalse(analyzer.is_excluded_branch('dependabot/x'))
+        self.assertFalse(self.analyzer.is_excluded_branch('ABC-1-x'))
+    
+    def test_no_exclusion_rules(self):
+        """Without rules only the exact set is consulted."""
+        self.config.set('branches', 'exclude_branches', '', default=True)
+        analyzer = main.BranchAnalyzer(self.config)
+        
+        self.assertIsNone(analyzer.exclude_pattern)
+        self.assertFalse(analyzer.is_excluded_branch('release/2.1'))
+    
     def test_branch_analyzer_with_repo_config(self):
         """Test pattern matching with repo-specific ticket patterns."""
         repo_id = 'github.com/owner/repo-test'
@@ -656,8 +947,9 @@ class TestBranchAnalyzer(unittest.TestCase):
         self.assertEqual(ticket_info['prefix'], 'ABC')
         self.assertEqual(ticket_info['number'], '123')
     
+    @patch('main.GitMetadataReader.get_current_branch', return_value=None)
     @patch('main.subprocess.run')
-    def test_get_current_branch_success(self, mock_run):
+    def test_get_current_branch_success(self, mock_run, mock_reader):
         """Mock git command success."""
         mock_result = Mock()
         mock_result.stdout = '  feature-branch  \n'
@@ -673,22 +965,86 @@ class TestBranchAnalyzer(unittest.TestCase):
             check=True
         )
     
+    @patch('main.GitMetadataReader.get_current_branch', return_value=None)
     @patch('main.subprocess.run')
-    def test_get_current_branch_failure(self, mock_run):
+    def test_get_current_branch_failure(self, mock_run, mock_reader):
         """Handle git command failure (not in repo)."""
         mock_run.side_effect = subprocess.CalledProcessError(1, 'git')
         
         branch = self.analyzer.get_current_branch()
         self.assertIsNone(branch)
     
+    @patch('main.GitMetadataReader.get_current_branch', return_value=None)
     @patch('main.subprocess.run')
-    def test_get_current_branch_no_git(self, mock_run):
+    def test_get_current_branch_no_git(self, mock_run, mock_reader):
         """Handle missing git command."""
         mock_run.side_effect = FileNotFoundError()
         
         branch = self.analyzer.get_current_branch()
         self.assertIsNone(branch)
 
+    
+    def test_multiple_ticket_patterns(self):
+        """Configured patterns are tried in order before the default pattern."""
+        self.config.set('ticket_pattern', 'patterns',
+                        "(?P<prefix>INC)-(?P<number>\\d+)\n(?P<prefix>GH)_(?P<number>\\d+)_(?P<description>.*)",
+                        default=True)
+        analyzer = main.BranchAnalyzer(main.ConfigManager(self.config_file))
+        
+        self.assertEqual(len(analyzer.patterns), 3)
+        inc = analyzer.extract_ticket_info('INC-9')
+        self.assertEqual((inc['prefix'], inc['number'], inc['description'], inc['pattern']), ('INC', '9', '', 0))
+        gh = analyzer.extract_ticket_info('GH_45_fix_thing')
+        self.assertEqual((gh['prefix'], gh['number'], gh['description'], gh['pattern']), ('GH', '45', 'fix_thing', 1))
+        jira = analyzer.extract_ticket_info('JIRA-123-x')
+        self.assertEqual((jira['prefix'], jira['number'], jira['pattern']), ('JIRA', '123', 2))
+        self.assertIsNone(analyzer.extract_ticket_info('INC-9x'))
+    
+    def test_ticket_patterns_repo_specific(self):
+        """Patterns are resolved per repo like other settings."""
+        repo_id = 'github.com/owner/incidents'
+        self.config.set('ticket_pattern', 'patterns', '(?P<prefix>INC)(?P<number>\\d+)', repo_id=repo_id)
+        
+        repo_analyzer = main.BranchAnalyzer(main.ConfigManager(self.config_file, repo_id=repo_id))
+        default_analyzer = main.BranchAnalyzer(main.ConfigManager(self.config_file))
+        
+        self.assertEqual(repo_analyzer.extract_ticket_info('INC77')['number'], '77')
+        self.assertIsNone(default_analyzer.extract_ticket_info('INC77'))
+    
+    def test_compile_patterns_requires_groups(self):
+        """Patterns without prefix and number groups are rejected."""
+        with self.assertRaises(ValueError):
+            main.BranchAnalyzer.compile_patterns([r'(?P<prefix>[A-Z]+)-\d+'])
+        # Named backreferences are renamed along with their groups
+        pattern = main.BranchAnalyzer.compile_patterns([r'(?P<prefix>[a-z]+)-(?P<number>\d+)-(?P=prefix)'] * 2)
+        self.assertEqual(pattern.match('ab-1-ab').lastgroup, 't0')
+    
+    def test_compile_patterns_rejects_numbered_backreferences(self):
+        """Numbered group references would point at the wrong group once patterns are combined."""
+        default = r'(?P<prefix>[A-Z]+)-(?P<number>\d+)'
+        for pattern in (r'(?P<prefix>([A-Z])\2)-(?P<number>\d+)', r'(?P<prefix>(X)?(?(2)Y|Z))-(?P<number>\d+)'):
+            with self.assertRaisesRegex(ValueError, 'named backreferences'):
+                main.BranchAnalyzer.compile_patterns([default, pattern])
+        # An escaped backslash followed by a digit is not a reference
+        pattern = main.BranchAnalyzer.compile_patterns([r'(?P<prefix>[A-Z]+)\\1-(?P<number>\d+)'])
+        self.assertTrue(pattern.match('AB\\1-7'))
+    
+    def test_list_local_branches(self):
+        """All local branches come from one git call."""
+        if shutil.which('git') is None:
+            self.skipTest("git not installed")
+        repo_dir = Path(self.temp_dir) / "repo"
+        repo_dir.mkdir()
+        for args in (['init', '-q', '-b', 'main'],
+                     ['-c', 'user.name=t', '-c', 'user.email=t@t', 'commit', '-q', '--allow-empty', '-m', 'init'],
+                     ['branch', 'JIRA-1-a'], ['branch', 'team/PROJ-2-b']):
+            subprocess.run(['git', *args], cwd=repo_dir, capture_output=True, check=True)
+        
+        with patch('main.subprocess.run', wraps=subprocess.run) as mock_run:
+            branches = self.analyzer.list_local_branches(repo_dir / ".git")
+        
+        self.assertEqual(sorted(branches), ['JIRA-1-a', 'main', 'team/PROJ-2-b'])
+        self.assertEqual(mock_run.call_count, 1)
 
 class TestDirectoryManager(unittest.TestCase):
     """Test DirectoryManager class."""
@@ -710,6 +1066,79 @@ class TestDirectoryManager(unittest.TestCase):
         """Clean up test fixtures."""
         shutil.rmtree(self.temp_dir, ignore_errors=True)
     
+    def _make_template(self, name: str) -> Path:
+        template = Path(self.temp_dir) / "templates" / name
+        template.mkdir(parents=True)
+        (template / "README.md").write_text(f"{name}: {{{{ticket}}}} {{{{description}}}} ({{{{branch}}}})\n")
+        return template
+    
+    def test_create_ticket_directory_from_template(self):
+        """New ticket directories start from the prefix template, else the default one."""
+        default_template = self._make_template("default")
+        jira_template = self._make_template("jira")
+        self.config.set('templates', 'default', str(default_template), default=True)
+        self.config.set('templates', 'jira', str(jira_template), default=True)
+        
+        jira_dir = self.dir_manager.create_ticket_directory(
+            'JIRA-5-login', {'prefix': 'JIRA', 'number': '5', 'description': 'login'})
+        other_dir = self.dir_manager.create_ticket_directory(
+            'OPS-9', {'prefix': 'OPS', 'number': '9', 'description': ''})
+        
+        self.assertEqual((jira_dir / "README.md").read_text(), "jira: JIRA-5 login (JIRA-5-login)\n")
+        self.assertEqual((other_dir / "README.md").read_text(), "default: OPS-9  (OPS-9)\n")
+        self.assertEqual(sorted(p.name for p in self.workspace_base.iterdir()), ['JIRA-5-login', 'OPS-9'])
+    
+    def test_template_names_with_slashes(self):
+        """Branch values containing '/' render to a single file name."""
+        template = self._make_template("default")
+        (template / "{{description}}.md").write_text("{{branch}}\n")
+        self.config.set('templates', 'default', str(template), default=True)
+        
+        ticket_dir = self.dir_manager.create_ticket_directory(
+            'JIRA-1-feat/sub', {'prefix': 'JIRA', 'number': '1', 'description': 'feat/sub'})
+        
+        self.assertEqual((ticket_dir / "feat_sub.md").read_text(), "JIRA-1-feat/sub\n")
+    
+    def test_template_is_repo_specific(self):
+        """Repo sections choose their own template."""
+        repo_id = 'github.com/owner/repo'
+        template = self._make_template("repo")
+        self.config.set('templates', 'default', str(template), repo_id=repo_id)
+        
+        self.assertEqual(self.dir_manager.get_template_dir('ABC', repo_id), template)
+        self.assertIsNone(self.dir_manager.get_template_dir('ABC', ''))
+    
+    def test_existing_ticket_directory_skips_template(self):
+        """Templates are only materialized for new ticket directories."""
+        self.config.set('templates', 'default', str(self._make_template("default")), default=True)
+        ticket_info = {'prefix': 'JIRA', 'number': '5', 'description': 'login'}
+        ticket_dir = self.dir_manager.create_ticket_directory('JIRA-5-login', ticket_info)
+        (ticket_dir / "README.md").write_text("edited\n")
+        
+        with patch.object(main.DirectoryManager, 'materialize_template') as mock_materialize:
+            again = self.dir_manager.create_ticket_directory('JIRA-5-login', ticket_info)
+        
+        self.assertEqual(again, ticket_dir)
+        mock_materialize.assert_not_called()
+        self.assertEqual((ticket_dir / "README.md").read_text(), "edited\n")
+    
+    def test_failed_template_leaves_no_directory(self):
+        """An interrupted materialization removes its temporary directory."""
+        self.config.set('templates', 'default', str(self._make_template("default")), default=True)
+        
+        with patch('main.TemplateMaterializer.materialize_file', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                self.dir_manager.create_ticket_directory('JIRA-5', {'prefix': 'JIRA', 'number': '5'})
+        
+        self.assertEqual(list(self.workspace_base.iterdir()), [])
+    
+    def test_missing_template_is_an_error(self):
+        """A configured template that does not exist is reported."""
+        self.config.set('templates', 'default', str(Path(self.temp_dir) / "missing"), default=True)
+        
+        with self.assertRaises(FileNotFoundError):
+            self.dir_manager.create_ticket_directory('JIRA-5', {'prefix': 'JIRA', 'number': '5'})
+    
     def test_directory_name_sanitization_linux(self):
         """Replace invalid chars on Linux."""
         with patch('platform.system', return_value='Linux'):
@@ -944,6 +1373,290 @@ class TestDirectoryManager(unittest.TestCase):
                 self.workspace_base.chmod(0o755)  # Restore
 
 
+class TestTemplateMaterializer(unittest.TestCase):
+    """Test TemplateMaterializer class."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.template = Path(self.temp_dir) / "template"
+        (self.template / "notebooks").mkdir(parents=True)
+        (self.template / "notebooks" / "analysis.ipynb").write_text('{"title": "{{ticket}}: {{description}}"}')
+        (self.template / "notes-{{number}}.md").write_text("# {{ ticket }}\n{{unknown}}\n")
+        (self.template / "data.bin").write_bytes(b"\x00\x01{{ticket}}\xff" * 10)
+        (self.template / "fixture.csv").write_text("a,b\n1,2\n")
+        os.chmod(self.template / "fixture.csv", 0o444)
+        (self.template / "skeleton.cfg").write_text("[settings]\n")
+        os.symlink("fixture.csv", self.template / "link.csv")
+        self.target = Path(self.temp_dir) / "JIRA-7-fix"
+        self.materializer = main.TemplateMaterializer({'ticket': 'JIRA-7', 'number': '7', 'description': 'fix'})
+    
+    def tearDown(self):
+        """Clean up test fixtures."""
+        os.chmod(self.template / "fixture.csv", 0o644)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    @patch('main.fcntl.ioctl', side_effect=OSError(errno.EOPNOTSUPP, 'Operation not supported'))
+    def test_materialize_renders_and_falls_back(self, mock_ioctl):
+        """Placeholders are filled in; other files are hardlinked when read-only, else copied."""
+        counts = self.materializer.materialize(self.template, self.target)
+        
+        self.assertEqual((self.target / "notebooks" / "analysis.ipynb").read_text(), '{"title": "JIRA-7: fix"}')
+        self.assertEqual((self.target / "notes-7.md").read_text(), "# JIRA-7\n{{unknown}}\n")
+        self.assertEqual((self.target / "data.bin").read_bytes(), (self.template / "data.bin").read_bytes())
+        self.assertTrue(os.path.samefile(self.target / "fixture.csv", self.template / "fixture.csv"))
+        self.assertFalse(os.path.samefile(self.target / "skeleton.cfg", self.template / "skeleton.cfg"))
+        self.assertEqual(os.readlink(self.target / "link.csv"), "fixture.csv")
+        self.assertEqual(counts, {'reflink': 0, 'hardlink': 1, 'copy': 2, 'rendered': 2, 'symlink': 1})
+        # Unsupported reflinks are only attempted once
+        mock_ioctl.assert_called_once()
+    
+    @patch('main.fcntl.ioctl')
+    def test_materialize_prefers_reflinks(self, mock_ioctl):
+        """Files without placeholders are cloned when the filesystem supports it."""
+        counts = self.materializer.materialize(self.template, self.target)
+        
+        self.assertEqual(counts['reflink'], 3)
+        self.assertEqual(counts['hardlink'] + counts['copy'], 0)
+        self.assertEqual(mock_ioctl.call_args[0][1], main.TemplateMaterializer.FICLONE)
+    
+    def test_rendered_names_stay_inside_target(self):
+        """Rendered names never add path components or climb out of the target."""
+        (self.template / "{{description}}").mkdir()
+        (self.template / "{{description}}" / "{{branch}}.txt").write_text("x\n")
+        materializer = main.TemplateMaterializer({'description': '..', 'branch': '../../escape'})
+        
+        materializer.materialize(self.template, self.target)
+        
+        self.assertTrue((self.target / "{{description}}" / ".._.._escape.txt").is_file())
+        self.assertFalse((Path(self.temp_dir) / "escape.txt").exists())
+    
+    def test_large_files_are_not_rendered(self):
+        """Files above RENDER_MAX_BYTES are cloned as they are, without being read."""
+        with patch.object(main.TemplateMaterializer, 'RENDER_MAX_BYTES', 10):
+            counts = self.materializer.materialize(self.template, self.target)
+        
+        self.assertEqual(counts['rendered'], 0)
+        self.assertIn('{{ticket}}', (self.target / "notebooks" / "analysis.ipynb").read_text())
+    
+    def test_hardlinks_fall_back_to_copies(self):
+        """A cross-device hardlink error switches to copies."""
+        with patch('main.os.link', side_effect=OSError(errno.EXDEV, 'Invalid cross-device link')):
+            counts = main.TemplateMaterializer({}).materialize(self.template, self.target)
+        
+        self.assertEqual(counts['hardlink'], 0)
+        self.assertEqual((self.target / "fixture.csv").read_text(), "a,b\n1,2\n")
+
+
+class TestTicketIndex(unittest.TestCase):
+    """Test TicketIndex class."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.workspace_base = Path(self.temp_dir) / "workspace"
+        self.workspace_base.mkdir()
+        self.index_dir = Path(self.temp_dir) / "index"
+        self.index = main.TicketIndex(self.workspace_base, self.index_dir)
+    
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _age_workspace(self):
+        """Move the workspace mtime out of the racy window."""
+        stat = os.stat(self.workspace_base)
+        os.utime(self.workspace_base, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10_000_000_123))
+    
+    def test_key_for_name(self):
+        """Each name is indexed under its first two segments only."""
+        self.assertEqual(main.TicketIndex.key_for_name('JIRA-123-fix_bug'), 'jira/123')
+        self.assertEqual(main.TicketIndex.key_for_name('jira_123'), 'jira/123')
+        self.assertIsNone(main.TicketIndex.key_for_name('-123'))
+        self.assertIsNone(main.TicketIndex.key_for_name('JIRA--123'))
+        self.assertIsNone(main.TicketIndex.key_for_name('JIRA123'))
+    
+    def test_lookup_with_separators_scans(self):
+        """Prefixes or numbers containing separators are matched by a scan, like the old regex."""
+        (self.workspace_base / "my-proj-12-x").mkdir()
+        self._age_workspace()
+        
+        self.assertEqual(self.index.lookup('MY-PROJ', '12'), 'my-proj-12-x')
+        self.assertEqual(self.index.lookup('my', 'proj'), 'my-proj-12-x')
+        self.assertIsNone(self.index.lookup('my', 'proj-1'))
+    
+    def test_index_stores_one_row_per_ticket(self):
+        """Long names do not multiply index rows."""
+        for name in ("PROJ-1-a-b-c-d-e-f", "PROJ-1-other", "PROJ-2"):
+            (self.workspace_base / name).mkdir()
+        self._age_workspace()
+        self.index.lookup('PROJ', '1')
+        
+        with contextlib.closing(main.sqlite3.connect(str(self.index.index_file))) as db:
+            rows = db.execute("SELECT key, name FROM tickets ORDER BY key").fetchall()
+        self.assertEqual(rows, [('proj/1', 'PROJ-1-a-b-c-d-e-f'), ('proj/2', 'PROJ-2')])
+    
+    def test_lookup_matches_regex_semantics(self):
+        """Lookups are case-insensitive and require a separator after the number."""
+        (self.workspace_base / "jira-123-feature").mkdir()
+        (self.workspace_base / "PROJ-1234").mkdir()
+        (self.workspace_base / "TICKET-5.txt").touch()
+        
+        self.assertEqual(self.index.lookup('JIRA', '123'), 'jira-123-feature')
+        self.assertIsNone(self.index.lookup('PROJ', '123'))
+        self.assertEqual(self.index.lookup('proj', '1234'), 'PROJ-1234')
+        self.assertIsNone(self.index.lookup('TICKET', '5'))
+    
+    def test_lookup_uses_index_when_workspace_unchanged(self):
+        """An up-to-date index answers without scanning the workspace."""
+        (self.workspace_base / "JIRA-1-a").mkdir()
+        self._age_workspace()
+        self.index.lookup('JIRA', '1')
+        
+        with patch('main.os.scandir', side_effect=AssertionError("workspace scanned")):
+            fresh = main.TicketIndex(self.workspace_base, self.index_dir)
+            self.assertEqual(fresh.lookup('JIRA', '1'), 'JIRA-1-a')
+            self.assertIsNone(fresh.lookup('JIRA', '2'))
+    
+    def test_lookup_reconciles_external_changes(self):
+        """Directories created outside sidecar are picked up through the mtime check."""
+        self._age_workspace()
+        self.assertIsNone(self.index.lookup('JIRA', '7'))
+        
+        (self.workspace_base / "JIRA-7-manual").mkdir()
+        self.assertEqual(self.index.lookup('JIRA', '7'), 'JIRA-7-manual')
+    
+    def test_add_keeps_index_current(self):
+        """Directories created through add() do not force a rescan."""
+        self._age_workspace()
+        self.assertIsNone(self.index.lookup('JIRA', '8'))
+        (self.workspace_base / "JIRA-8-new").mkdir()
+        self.index.add('JIRA-8-new')
+        
+        with patch('main.os.scandir', side_effect=AssertionError("workspace scanned")):
+            with patch.object(main.TicketIndex, '_workspace_stamp', return_value=self.index._known_stamp):
+                fresh = main.TicketIndex(self.workspace_base, self.index_dir)
+                self.assertEqual(fresh.lookup('JIRA', '8'), 'JIRA-8-new')
+    
+    def test_writes_skipped_while_another_process_holds_lock(self):
+        """A busy workspace lock makes index writes a no-op instead of a wait."""
+        (self.workspace_base / "JIRA-9-a").mkdir()
+        self._age_workspace()
+        with main.FileLock(self.index.lock_file):
+            self.assertEqual(self.index.lookup('JIRA', '9'), 'JIRA-9-a')
+            self.assertIsNone(self.index._known_stamp)
+        self.assertEqual(self.index.lookup('JIRA', '9'), 'JIRA-9-a')
+        self.assertIsNotNone(self.index._known_stamp)
+
+
+class TestFileLock(unittest.TestCase):
+    """Test FileLock class."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.lock_file = Path(self.temp_dir) / "sub" / "test.lock"
+    
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_lock_times_out_while_held(self):
+        """A second holder gives up after the timeout."""
+        with main.FileLock(self.lock_file):
+            start = time.monotonic()
+            with self.assertRaises(TimeoutError):
+                main.FileLock(self.lock_file, timeout=0.1).acquire()
+            self.assertLess(time.monotonic() - start, 2)
+        
+        with main.FileLock(self.lock_file, timeout=0):
+            self.assertTrue(self.lock_file.exists())
+    
+    def test_lock_waits_for_release(self):
+        """A waiting holder gets the lock once it is released."""
+        held = main.FileLock(self.lock_file)
+        held.acquire()
+        timer = threading.Timer(0.1, held.release)
+        timer.start()
+        with main.FileLock(self.lock_file, timeout=5):
+            pass
+        timer.join()
+
+
+class TestTracer(unittest.TestCase):
+    """Test Tracer and trace_phase."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.stream = io.StringIO()
+        self.previous = main.set_tracer(main.Tracer(self.stream))
+    
+    def tearDown(self):
+        """Clean up test fixtures."""
+        main.set_tracer(self.previous)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _records(self):
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+    
+    def test_disabled_tracing_is_shared_noop(self):
+        """With no tracer, trace_phase returns the same no-op and writes nothing."""
+        main.set_tracer(None)
+        self.assertIs(main.trace_phase('a'), main.trace_phase('b', x=1))
+        with main.trace_phase('a'):
+            pass
+        self.assertEqual(self.stream.getvalue(), '')
+    
+    def test_from_settings(self):
+        """SIDECAR_TRACE and --timings select the destination."""
+        self.assertIsNone(main.Tracer.from_settings(None))
+        self.assertIsNone(main.Tracer.from_settings('0'))
+        self.assertIs(main.Tracer.from_settings('1').stream, main.sys.stderr)
+        self.assertIs(main.Tracer.from_settings(None, timings=True).stream, main.sys.stderr)
+        
+        with patch('main.Path.home', return_value=Path(self.temp_dir)):
+            tracer = main.Tracer.from_settings('file')
+        tracer.emit('total', 1.5, {})
+        tracer.stream.close()
+        trace_file = Path(self.temp_dir) / ".sidecar" / "trace.jsonl"
+        self.assertEqual(json.loads(trace_file.read_text())['phase'], 'total')
+    
+    def test_phase_records_duration_and_error(self):
+        """Each phase emits one record, marking exceptions."""
+        with main.trace_phase('ok', tool='scripts'):
+            pass
+        with self.assertRaises(ValueError):
+            with main.trace_phase('broken'):
+                raise ValueError("boom")
+        
+        ok, broken = self._records()
+        self.assertEqual((ok['phase'], ok['tool']), ('ok', 'scripts'))
+        self.assertGreaterEqual(ok['ms'], 0)
+        self.assertEqual(broken['error'], 'ValueError')
+    
+    @patch('main.BranchAnalyzer.get_current_branch', return_value='JIRA-5-traced')
+    def test_process_checkout_phases(self, mock_branch):
+        """A checkout reports config, lookup, branch and every link operation."""
+        config_file = Path(self.temp_dir) / "config.ini"
+        tools = Path(self.temp_dir) / "tools"
+        for name in ('notebooks', 'scripts'):
+            (tools / name).mkdir(parents=True)
+        config = main.ConfigManager(config_file)
+        config.set('paths', 'workspace_base', str(Path(self.temp_dir) / "workspace"), default=True)
+        config.set('paths', 'tools_library_path', str(tools), default=True)
+        config.set('links', 'tools_to_link', 'notebooks, scripts', default=True)
+        config.set('links', 'current_ticket_link_locations', str(Path(self.temp_dir) / "links"), default=True)
+        
+        success, _ = main.TicketManager(config_file, repo_id='').process_checkout()
+        
+        self.assertTrue(success)
+        phases = [record['phase'] for record in self._records()]
+        for phase in ('config_load', 'current_branch', 'ticket_dir', 'link_tools', 'current_ticket_links'):
+            self.assertIn(phase, phases)
+        self.assertEqual(phases.count('link_tool'), 2)
+        self.assertEqual(phases.count('current_ticket_link'), 1)
+
 class TestToolsLinker(unittest.TestCase):
     """Test ToolsLinker class."""
     
@@ -969,6 +1682,114 @@ class TestToolsLinker(unittest.TestCase):
         """Clean up test fixtures."""
         shutil.rmtree(self.temp_dir, ignore_errors=True)
     
+    def _make_tools(self):
+        for name in ('notebooks', 'scripts', 'utils'):
+            (self.tools_lib / name).mkdir()
+            (self.tools_lib / name / "run.sh").write_text(f"echo {name}\n")
+    
+    def _linker(self, **links) -> 'main.ToolsLinker':
+        config = main.ConfigManager(self.config_file)
+        for key, value in links.items():
+            config.set('links', key, value, default=True)
+        return main.ToolsLinker(config)
+    
+    def test_link_mode_per_tool(self):
+        """Tools can be hardlink trees or copies while others stay symlinks."""
+        self._make_tools()
+        linker = self._linker(tool_link_modes='scripts:hardlink, utils:copy')
+        
+        self.assertEqual(linker.link_tools(self.ticket_dir), [])
+        
+        self.assertTrue((self.ticket_dir / "notebooks").is_symlink())
+        scripts = self.ticket_dir / "scripts"
+        self.assertFalse(scripts.is_symlink())
+        self.assertTrue(os.path.samefile(scripts / "run.sh", self.tools_lib / "scripts" / "run.sh"))
+        utils = self.ticket_dir / "utils"
+        self.assertFalse(utils.is_symlink())
+        self.assertEqual((utils / "run.sh").read_text(), "echo utils\n")
+        self.assertFalse(os.path.samefile(utils / "run.sh", self.tools_lib / "utils" / "run.sh"))
+        self.assertEqual(linker.counts, {'created': 3, 'kept': 0, 'replaced': 0})
+        
+        linker.link_tools(self.ticket_dir)
+        self.assertEqual(linker.counts, {'created': 0, 'kept': 3, 'replaced': 0})
+    
+    def test_link_mode_replaces_symlink(self):
+        """Switching a tool from symlink to copy replaces the old link."""
+        self._make_tools()
+        self.tools_linker.link_tools(self.ticket_dir)
+        linker = self._linker(link_mode='copy')
+        
+        self.assertEqual(linker.link_tools(self.ticket_dir), [])
+        
+        self.assertEqual(linker.counts['replaced'], 3)
+        self.assertFalse((self.ticket_dir / "scripts").is_symlink())
+        self.assertTrue((self.ticket_dir / "scripts" / "run.sh").exists())
+    
+    def test_link_mode_single_file_tool(self):
+        """File tools are hardlinked directly."""
+        (self.tools_lib / "tool.cfg").write_text("x = 1\n")
+        linker = self._linker(tools_to_link='tool.cfg', link_mode='hardlink')
+        
+        self.assertEqual(linker.link_tools(self.ticket_dir), [])
+        self.assertTrue(os.path.samefile(self.ticket_dir / "tool.cfg", self.tools_lib / "tool.cfg"))
+    
+    def test_unknown_link_mode(self):
+        """An unknown mode is reported for its tool only."""
+        self._make_tools()
+        linker = self._linker(tool_link_modes='scripts:junction')
+        
+        errors = linker.link_tools(self.ticket_dir)
+        
+        self.assertEqual(errors, ["Unknown link mode 'junction' for scripts"])
+        self.assertTrue((self.ticket_dir / "notebooks").is_symlink())
+    
+    def test_aggregate_mode_single_link(self):
+        """All tools are reached through one 'tools' link to a shared directory of links."""
+        self._make_tools()
+        linker = self._linker(link_mode='aggregate')
+        
+        self.assertEqual(linker.link_tools(self.ticket_dir), [])
+        
+        self.assertEqual([p.name for p in self.ticket_dir.iterdir()], ['tools'])
+        aggregate = self.ticket_dir / "tools"
+        self.assertTrue(aggregate.is_symlink())
+        self.assertEqual((aggregate / "scripts" / "run.sh").read_text(), "echo scripts\n")
+        self.assertEqual(linker.counts, {'created': 1, 'kept': 0, 'replaced': 0})
+        
+        other_ticket = Path(self.temp_dir) / "other"
+        other_ticket.mkdir()
+        with patch('main.os.symlink', wraps=os.symlink) as mock_symlink:
+            linker.link_tools(other_ticket)
+        # The aggregate directory is reused; only the ticket's own link is created
+        mock_symlink.assert_called_once()
+        self.assertEqual(os.readlink(other_ticket / "tools"), os.readlink(aggregate))
+        
+        linker.link_tools(self.ticket_dir)
+        self.assertEqual(linker.counts, {'created': 0, 'kept': 1, 'replaced': 0})
+    
+    def test_aggregate_mode_reports_missing_tool(self):
+        """A missing tool is reported when the aggregate directory is built."""
+        (self.tools_lib / "notebooks").mkdir()
+        linker = self._linker(link_mode='aggregate')
+        
+        errors = linker.link_tools(self.ticket_dir)
+        
+        self.assertEqual(len(errors), 1)
+        self.assertIn('Tool item not found', errors[0])
+        self.assertFalse((self.ticket_dir / "tools").exists())
+    
+    def test_aggregate_mode_keeps_real_directory(self):
+        """A real 'tools' directory in the ticket is not deleted."""
+        self._make_tools()
+        (self.ticket_dir / "tools").mkdir()
+        (self.ticket_dir / "tools" / "mine.txt").write_text("keep\n")
+        linker = self._linker(link_mode='aggregate')
+        
+        errors = linker.link_tools(self.ticket_dir)
+        
+        self.assertEqual(len(errors), 1)
+        self.assertTrue((self.ticket_dir / "tools" / "mine.txt").exists())
+    
     def test_link_tools_success(self):
         """Create symlinks for all configured tools."""
         # Create tool directories
@@ -1037,8 +1858,8 @@ class TestToolsLinker(unittest.TestCase):
         # Verify it points to the correct location
         self.assertEqual((self.ticket_dir / 'notebooks').readlink(), self.tools_lib / 'notebooks')
     
-    def test_link_tools_overwrite_existing_directory(self):
-        """Remove existing directory before linking."""
+    def test_link_tools_reports_existing_directory(self):
+        """A real directory in place of a tool is reported, not deleted."""
         (self.ticket_dir / 'notebooks').mkdir()
         (self.ticket_dir / 'notebooks' / 'file.txt').touch()
         
@@ -1049,9 +1870,12 @@ class TestToolsLinker(unittest.TestCase):
         
         errors = self.tools_linker.link_tools(self.ticket_dir)
         
-        self.assertEqual(len(errors), 0)
-        self.assertTrue((self.ticket_dir / 'notebooks').is_symlink())
-        self.assertFalse((self.ticket_dir / 'notebooks' / 'file.txt').exists())
+        self.assertEqual(len(errors), 1)
+        self.assertIn('Failed to link notebooks', errors[0])
+        self.assertIn('not a link', errors[0])
+        self.assertFalse((self.ticket_dir / 'notebooks').is_symlink())
+        self.assertTrue((self.ticket_dir / 'notebooks' / 'file.txt').exists())
+        self.assertTrue((self.ticket_dir / 'scripts').is_symlink())
     
     def test_link_tools_overwrite_existing_file(self):
         """Remove existing file before linking."""
@@ -1094,6 +1918,54 @@ class TestToolsLinker(unittest.TestCase):
         self.assertEqual(len(errors), 0)
         self.assertTrue((self.ticket_dir / 'custom_tool').is_symlink())
 
+    
+    def test_link_tools_keeps_links_in_place(self):
+        """A second run keeps every link without touching it."""
+        for name in ('notebooks', 'scripts', 'utils'):
+            (self.tools_lib / name).mkdir()
+        self.tools_linker.link_tools(self.ticket_dir)
+        self.assertEqual(self.tools_linker.counts, {'created': 3, 'kept': 0, 'replaced': 0})
+        
+        with patch('main.os.symlink', side_effect=AssertionError("link recreated")), \
+             patch('main.shutil.rmtree', side_effect=AssertionError("target removed")):
+            errors = self.tools_linker.link_tools(self.ticket_dir)
+        
+        self.assertEqual(errors, [])
+        self.assertEqual(self.tools_linker.counts, {'created': 0, 'kept': 3, 'replaced': 0})
+        self.assertEqual(self.tools_linker.describe_counts(), "0 created, 3 kept, 0 replaced")
+    
+    def test_link_tools_counts_replacements(self):
+        """Only entries that differ are replaced."""
+        for name in ('notebooks', 'scripts', 'utils'):
+            (self.tools_lib / name).mkdir()
+        self.tools_linker.link_tools(self.ticket_dir)
+        other_target = Path(self.temp_dir) / "other"
+        other_target.mkdir()
+        (self.ticket_dir / 'scripts').unlink()
+        (self.ticket_dir / 'scripts').symlink_to(other_target)
+        (self.ticket_dir / 'utils').unlink()
+        
+        errors = self.tools_linker.link_tools(self.ticket_dir)
+        
+        self.assertEqual(errors, [])
+        self.assertEqual(self.tools_linker.counts, {'created': 1, 'kept': 1, 'replaced': 1})
+        self.assertEqual(os.readlink(self.ticket_dir / 'scripts'), str(self.tools_lib / 'scripts'))
+    
+    def test_link_tools_in_parallel(self):
+        """Many tools are linked on the pool with errors collected in order."""
+        names = [f"tool{i}" for i in range(20)]
+        for name in names[::2]:
+            (self.tools_lib / name).mkdir()
+        self.config.set('links', 'tools_to_link', ', '.join(names), default=True)
+        self.config.set('links', 'link_workers', '4', default=True)
+        linker = main.ToolsLinker(self.config)
+        
+        errors = linker.link_tools(self.ticket_dir)
+        
+        self.assertEqual(errors, [f"Tool item not found: {self.tools_lib / name}" for name in names[1::2]])
+        self.assertEqual(linker.counts['created'], 10)
+        for name in names[::2]:
+            self.assertTrue((self.ticket_dir / name).is_symlink())
 
 class TestCurrentTicketLinker(unittest.TestCase):
     """Test CurrentTicketLinker class."""
@@ -1281,6 +2153,77 @@ class TestCurrentTicketLinker(unittest.TestCase):
         self.assertTrue(link.is_symlink())
         self.assertEqual(link.readlink().resolve(), self.ticket_dir.resolve())
 
+    
+    def test_update_current_ticket_link_noop_when_current(self):
+        """A link that already points at the ticket is not touched."""
+        self.current_ticket_linker.update_current_ticket_link(self.ticket_dir)
+        link = self.link_location / "CurrentTicket"
+        before = os.lstat(link)
+        
+        with patch('main.os.replace', side_effect=AssertionError("link replaced")):
+            errors = self.current_ticket_linker.update_current_ticket_link(self.ticket_dir)
+        
+        self.assertEqual(errors, [])
+        self.assertEqual(os.lstat(link).st_ino, before.st_ino)
+    
+    def test_update_current_ticket_link_is_atomic(self):
+        """Existing links are swapped by rename, never unlinked first."""
+        other_ticket = self.workspace_base / "JIRA-999-other"
+        other_ticket.mkdir()
+        (self.link_location / "CurrentTicket").symlink_to(other_ticket)
+        
+        real_unlink = main.Path.unlink
+        
+        def guarded_unlink(path, *args, **kwargs):
+            self.assertNotEqual(path.name, "CurrentTicket", "link removed")
+            return real_unlink(path, *args, **kwargs)
+        
+        with patch.object(main.Path, 'unlink', guarded_unlink):
+            errors = self.current_ticket_linker.update_current_ticket_link(self.ticket_dir)
+        
+        self.assertEqual(errors, [])
+        self.assertEqual(os.readlink(self.link_location / "CurrentTicket"), str(self.ticket_dir))
+        self.assertEqual(sorted(os.listdir(self.link_location)), ["CurrentTicket"])
+    
+    def test_update_current_ticket_link_location_is_file(self):
+        """A location that is a regular file is reported, not replaced."""
+        file_location = Path(self.temp_dir) / "a_file"
+        file_location.touch()
+        self.config.set('links', 'current_ticket_link_locations', str(file_location), default=True)
+        
+        errors = main.CurrentTicketLinker(self.config).update_current_ticket_link(self.ticket_dir)
+        
+        self.assertEqual(len(errors), 1)
+        self.assertIn("not a directory", errors[0])
+    
+    def test_update_current_ticket_link_locations_in_parallel(self):
+        """Slow locations are updated concurrently and errors keep location order."""
+        locations = [Path(self.temp_dir) / f"loc{i}" for i in range(4)]
+        self.config.set('links', 'current_ticket_link_locations', ', '.join(map(str, locations)), default=True)
+        
+        def slow_update(location, link_name, ticket_dir):
+            time.sleep(0.3)
+            return f"error {location.name}"
+        
+        start = time.monotonic()
+        with patch.object(main.CurrentTicketLinker, '_update_location', staticmethod(slow_update)):
+            errors = main.CurrentTicketLinker(self.config).update_current_ticket_link(self.ticket_dir)
+        
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(errors, [f"error loc{i}" for i in range(4)])
+    
+    def test_update_current_ticket_link_single_worker(self):
+        """link_workers = 1 updates locations one at a time on the calling thread."""
+        locations = [Path(self.temp_dir) / f"loc{i}" for i in range(3)]
+        self.config.set('links', 'current_ticket_link_locations', ', '.join(map(str, locations)), default=True)
+        self.config.set('links', 'link_workers', '1', default=True)
+        
+        with patch('main.ThreadPoolExecutor', side_effect=AssertionError("pool used")):
+            errors = main.CurrentTicketLinker(self.config).update_current_ticket_link(self.ticket_dir)
+        
+        self.assertEqual(errors, [])
+        for location in locations:
+            self.assertEqual(os.readlink(location / "CurrentTicket"), str(self.ticket_dir))
 
 class TestGitHookManager(unittest.TestCase):
     """Test GitHookManager class."""
@@ -1348,6 +2291,62 @@ class TestGitHookManager(unittest.TestCase):
             self.assertIn('process', content)
             self.assertIn(str(self.script_path.resolve()), content)
     
+    def test_install_hook_daemon_client(self):
+        """Hook tries the daemon socket before falling back to a full process run."""
+        with patch('pathlib.Path.cwd', return_value=Path(self.temp_dir)):
+            self.hook_manager.install_hook()
+        
+        content = (self.hooks_dir / "post-checkout").read_text()
+        self.assertIn(str(main.SidecarDaemon.DEFAULT_SOCKET_PATH), content)
+        self.assertIn('-S -c', content)
+        self.assertNotIn("'", main.HOOK_CLIENT_SOURCE)
+        # Fallback comes after the daemon attempt
+        self.assertLess(content.index('-S -c'), content.index(str(self.script_path.resolve())))
+    
+    def test_install_hook_post_rewrite(self):
+        """A post-rewrite hook processes the branch once a rebase finishes."""
+        with patch('pathlib.Path.cwd', return_value=Path(self.temp_dir)):
+            success, message = self.hook_manager.install_hook()
+        
+        self.assertTrue(success)
+        content = (self.hooks_dir / "post-rewrite").read_text()
+        self.assertIn('[ "$1" = "rebase" ] || exit 0', content)
+        self.assertIn(f'{self.script_path.resolve()}" process\n', content)
+    
+    def test_install_hook_keeps_foreign_post_rewrite(self):
+        """Another tool's post-rewrite hook is not replaced."""
+        (self.hooks_dir / "post-rewrite").write_text("#!/bin/sh\necho custom\n")
+        
+        with patch('pathlib.Path.cwd', return_value=Path(self.temp_dir)):
+            success, message = self.hook_manager.install_hook()
+        
+        self.assertTrue(success)
+        self.assertIn('post-rewrite hook not installed', message)
+        self.assertIn('echo custom', (self.hooks_dir / "post-rewrite").read_text())
+    
+    @unittest.skipIf(os.name == 'nt', "POSIX shell hooks")
+    def test_hooks_skip_operations_without_python(self):
+        """The hooks exit in the shell during a rebase and only run for finished rebases."""
+        self.script_path.write_text("print('processed')\n")
+        with patch('pathlib.Path.cwd', return_value=Path(self.temp_dir)):
+            self.hook_manager.install_hook()
+        
+        def run(hook, *args):
+            env = {k: v for k, v in os.environ.items() if k not in ('GIT_DIR', 'GIT_WORK_TREE')}
+            return subprocess.run(['sh', str(self.hooks_dir / hook), *args], cwd=self.temp_dir,
+                                  capture_output=True, text=True, env=env).stdout
+        
+        (self.git_dir / "HEAD").write_text("ref: refs/heads/JIRA-1-feature\n")
+        self.assertEqual(run('post-checkout', 'aaa', 'bbb', '1'), 'processed\n')
+        (self.git_dir / "rebase-merge").mkdir()
+        (self.git_dir / "HEAD").write_text("b" * 40 + "\n")
+        self.assertEqual(run('post-checkout', 'aaa', 'bbb', '1'), '')
+        self.assertEqual(run('post-rewrite', 'amend'), '')
+        self.assertEqual(run('post-rewrite', 'rebase'), 'processed\n')
+        # 'git rebase --abort' reattaches HEAD before removing rebase-merge
+        (self.git_dir / "HEAD").write_text("ref: refs/heads/JIRA-1-feature\n")
+        self.assertEqual(run('post-checkout', 'bbb', 'aaa', '1'), 'processed\n')
+    
     def test_install_hook_makes_executable(self):
         """Verify hook is executable (Unix)."""
         if os.name != 'nt':
@@ -1400,6 +2399,15 @@ class TestGitHookManager(unittest.TestCase):
             self.assertTrue(success)
             self.assertFalse(hook_file.exists())
     
+    def test_uninstall_hook_removes_post_rewrite(self):
+        """Uninstall removes sidecar's post-rewrite hook too."""
+        with patch('pathlib.Path.cwd', return_value=Path(self.temp_dir)):
+            self.hook_manager.install_hook()
+            success, message = self.hook_manager.uninstall_hook()
+        
+        self.assertTrue(success)
+        self.assertFalse((self.hooks_dir / "post-rewrite").exists())
+    
     def test_uninstall_hook_not_installed(self):
         """Error when hook doesn't exist."""
         with patch('pathlib.Path.cwd', return_value=Path(self.temp_dir)):
@@ -1421,6 +2429,113 @@ class TestGitHookManager(unittest.TestCase):
             self.assertTrue(hook_file.exists())  # Should not be deleted
 
 
+class TestRepoScanner(unittest.TestCase):
+    """Test RepoScanner class."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.root = Path(self.temp_dir) / "src"
+        self.config_file = Path(self.temp_dir) / "config.ini"
+        self.config = main.ConfigManager(self.config_file)
+        self.config.set('paths', 'workspace_base', str(Path(self.temp_dir) / "tickets"), default=True)
+        
+        script_path = Path(self.temp_dir) / "main.py"
+        script_path.touch()
+        with patch('main.shutil.which', return_value=None):
+            self.hook_manager = main.GitHookManager(script_path)
+        self.scanner = main.RepoScanner(self.config, self.hook_manager, workers=4)
+    
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _make_repo(self, relative: str, url: Optional[str] = None) -> Path:
+        """Create a minimal repository with an optional origin remote."""
+        git_dir = self.root / relative / ".git"
+        git_dir.mkdir(parents=True)
+        (git_dir / "HEAD").write_text("ref: refs/heads/main\n")
+        config = "[core]\n\tbare = false\n"
+        if url:
+            config += f'[remote "origin"]\n\turl = {url}\n'
+        (git_dir / "config").write_text(config)
+        return git_dir
+    
+    def test_find_repos_prunes_repositories(self):
+        """Repositories are found at any depth without descending into them."""
+        self._make_repo("a")
+        self._make_repo("group/b")
+        self._make_repo("a/vendor/nested")
+        (self.root / "group" / "empty").mkdir()
+        worktree = self.root / "group" / "wt"
+        worktree.mkdir()
+        (worktree / ".git").write_text(f"gitdir: {self.root / 'a' / '.git'}\n")
+        (self.root / "link").symlink_to(self.root / "group")
+        
+        with patch('main.os.scandir', wraps=os.scandir) as mock_scandir:
+            repos = main.RepoScanner.find_repos(self.root)
+        
+        self.assertEqual(repos, [self.root / "a", self.root / "group" / "b", worktree])
+        scanned = {Path(call.args[0]) for call in mock_scandir.call_args_list}
+        self.assertNotIn(self.root / "a" / "vendor", scanned)
+    
+    def test_scan_registers_and_installs_hooks(self):
+        """New repositories are configured in one write and hooked in parallel."""
+        self._make_repo("one", "git@github.com:acme/one.git")
+        self._make_repo("two", "https://github.com/acme/two.git")
+        self._make_repo("two-copy", "https://github.com/acme/two.git")
+        self.config.set('paths', 'workspace_base', '/custom', repo_id='github.com/acme/one')
+        
+        with patch.object(main.ConfigManager, '_save_config', autospec=True,
+                          side_effect=main.ConfigManager._save_config) as mock_save:
+            success, summary = self.scanner.scan(self.root, install_hooks=True)
+        
+        self.assertTrue(success, summary)
+        self.assertEqual(mock_save.call_count, 1)
+        self.assertEqual(self.config.get('paths', 'workspace_base', repo_id='github.com/acme/two'),
+                         str(Path(self.temp_dir) / "tickets" / "two"))
+        self.assertEqual(self.config.get('paths', 'workspace_base', repo_id='github.com/acme/one'), '/custom')
+        self.assertIn("Found 3 repositories", summary)
+        self.assertIn("Repositories: 1 newly configured, 1 already configured", summary)
+        self.assertIn("Hooks: 3 installed, 0 upgraded, 0 unchanged, 0 skipped, 0 failed", summary)
+        for name in ("one", "two", "two-copy"):
+            self.assertTrue(os.access(self.root / name / ".git" / "hooks" / "post-checkout", os.X_OK))
+        
+        success, summary = self.scanner.scan(self.root, install_hooks=True)
+        self.assertIn("Hooks: 0 installed, 0 upgraded, 3 unchanged", summary)
+    
+    def test_sync_hook_statuses(self):
+        """Old sidecar hooks are upgraded; foreign hooks and hooksPath are left alone."""
+        old = self._make_repo("old")
+        (old / "hooks").mkdir()
+        (old / "hooks" / "post-checkout").write_text("#!/bin/sh\nsidecar process\n")
+        foreign = self._make_repo("foreign")
+        (foreign / "hooks").mkdir()
+        (foreign / "hooks" / "post-checkout").write_text("#!/bin/sh\necho custom\n")
+        managed = self._make_repo("managed")
+        (managed / "config").write_text("[core]\n\thooksPath = /etc/hooks\n")
+        
+        self.assertEqual(self.hook_manager.sync_hook(old)[0], 'upgraded')
+        self.assertEqual(self.hook_manager.sync_hook(foreign)[0], 'skipped')
+        self.assertIn('echo custom', (foreign / "hooks" / "post-checkout").read_text())
+        self.assertEqual(self.hook_manager.sync_hook(managed), ('skipped', 'core.hooksPath is set'))
+    
+    def test_sync_hook_adds_post_rewrite(self):
+        """A repo hooked before post-rewrite support is upgraded."""
+        repo = self._make_repo("repo")
+        self.assertEqual(self.hook_manager.sync_hook(repo)[0], 'installed')
+        (repo / "hooks" / "post-rewrite").unlink()
+        
+        self.assertEqual(self.hook_manager.sync_hook(repo)[0], 'upgraded')
+        self.assertTrue((repo / "hooks" / "post-rewrite").exists())
+        self.assertEqual(self.hook_manager.sync_hook(repo)[0], 'unchanged')
+    
+    def test_scan_not_a_directory(self):
+        """A missing root is reported."""
+        success, summary = self.scanner.scan(Path(self.temp_dir) / "missing")
+        self.assertFalse(success)
+        self.assertIn('Not a directory', summary)
+
 class TestTicketManager(unittest.TestCase):
     """Test TicketManager class."""
     
@@ -1453,6 +2568,18 @@ class TestTicketManager(unittest.TestCase):
         self.assertTrue(success)
         self.assertIn('Standard branch', message)
     
+    @patch('main.BranchAnalyzer.get_current_branch')
+    def test_process_checkout_excluded_branch(self, mock_branch):
+        """Excluded branches are skipped before ticket matching, even if a pattern matches."""
+        mock_branch.return_value = 'dependabot/ABC-1'
+        self.manager.branch_analyzer.extract_ticket_info = Mock()
+        
+        success, message = self.manager.process_checkout()
+        
+        self.assertTrue(success)
+        self.assertIn('Excluded branch', message)
+        self.manager.branch_analyzer.extract_ticket_info.assert_not_called()
+    
     def test_ticket_manager_with_repo_id(self):
         """Test initialization with explicit repo_id."""
         repo_id = 'github.com/owner/test-repo'
@@ -1549,6 +2676,62 @@ class TestTicketManager(unittest.TestCase):
         self.assertEqual(len(call_args[0]), 2)  # ticket_dir and repo_id as positional
         self.assertEqual(call_args[0][1], repo_id)  # Second positional arg is repo_id
     
+    @patch('main.BranchAnalyzer.get_current_branch', return_value='JIRA-321-single-parse')
+    @patch('main.ToolsLinker.link_tools', return_value=[])
+    @patch('main.CurrentTicketLinker.update_current_ticket_link', return_value=[])
+    def test_process_checkout_loads_config_once(self, mock_link, mock_tools, mock_branch):
+        """One invocation loads the configuration a single time."""
+        with patch('main.ConfigManager._load_config', autospec=True,
+                   side_effect=main.ConfigManager._load_config) as mock_load:
+            with patch('main.ConfigManager.get_current_repo_id', return_value='github.com/owner/repo'):
+                manager = main.TicketManager(self.config_file)
+            success, message = manager.process_checkout()
+        
+        self.assertTrue(success, message)
+        self.assertEqual(mock_load.call_count, 1)
+        self.assertEqual(manager.config.get_settings().repo_id, 'github.com/owner/repo')
+    
+    @patch('main.BranchAnalyzer.list_local_branches')
+    def test_process_all_branches(self, mock_branches):
+        """Every ticket branch gets one directory, scanning the workspace once."""
+        mock_branches.return_value = ['JIRA-1-a', 'JIRA-1-b', 'main', 'feature-x', 'PROJ-2-c']
+        tools = Path(self.temp_dir) / "tools"
+        for name in ('notebooks', 'scripts', 'utils'):
+            (tools / name).mkdir(parents=True)
+        
+        with patch('main.os.scandir', wraps=os.scandir) as mock_scandir:
+            success, message = self.manager.process_all_branches()
+        
+        self.assertTrue(success, message)
+        workspace = self.manager.dir_manager.get_workspace_base(self.manager.repo_id)
+        self.assertEqual(sorted(p.name for p in workspace.iterdir()), ['JIRA-1-a', 'PROJ-2-c'])
+        self.assertIn('Processed 5 branches: 2 ticket directories set up, 2 branches without a ticket skipped',
+                      message)
+        self.assertLessEqual(mock_scandir.call_count, 1)
+        self.assertTrue((workspace / 'PROJ-2-c' / 'scripts').is_symlink())
+        self.assertFalse((Path(self.temp_dir) / "links").exists())
+    
+    @patch('main.BranchAnalyzer.list_local_branches', return_value=None)
+    def test_process_all_branches_not_in_repo(self, mock_branches):
+        """Fail cleanly outside a repository."""
+        success, message = self.manager.process_all_branches()
+        self.assertFalse(success)
+        self.assertIn('cannot list branches', message)
+    
+    def test_workspace_base_memoized(self):
+        """Workspace base is computed and created once per repo."""
+        repo_id = 'github.com/owner/repo-test'
+        manager = main.TicketManager(self.config_file, repo_id=repo_id)
+        first = manager.dir_manager.get_workspace_base(repo_id)
+        
+        with patch('pathlib.Path.mkdir', side_effect=AssertionError("mkdir repeated")):
+            self.assertEqual(manager.dir_manager.get_workspace_base(repo_id), first)
+        
+        # A configuration change is picked up
+        custom = Path(self.temp_dir) / "custom"
+        manager.config.set('paths', 'workspace_base', str(custom), repo_id=repo_id)
+        self.assertEqual(manager.dir_manager.get_workspace_base(repo_id), custom)
+    
     def test_list_ticket_directories_empty(self):
         """Return empty list when no directories."""
         dirs = self.manager.list_ticket_directories()
@@ -1586,6 +2769,70 @@ class TestTicketManager(unittest.TestCase):
         for dir_path in dirs:
             self.assertIn('github.com_owner_repo-test', str(dir_path.parent))
     
+    def test_iter_ticket_directories_filters(self):
+        """Prefix, number and regex filters match ticket keys and names."""
+        workspace_base = self.manager.dir_manager.get_workspace_base(repo_id=self.manager.repo_id)
+        for name in ("JIRA-123-login", "JIRA-45", "jira_123_other", "PROJ-123-x", "notes"):
+            (workspace_base / name).mkdir()
+        
+        def names(**kwargs):
+            return [entry.name for entry in self.manager.iter_ticket_directories(**kwargs)]
+        
+        self.assertEqual(names(), ["JIRA-123-login", "JIRA-45", "PROJ-123-x", "jira_123_other", "notes"])
+        self.assertEqual(names(prefix='jira'), ["JIRA-123-login", "JIRA-45", "jira_123_other"])
+        self.assertEqual(names(number='123'), ["JIRA-123-login", "PROJ-123-x", "jira_123_other"])
+        self.assertEqual(names(prefix='JIRA', number='123'), ["JIRA-123-login", "jira_123_other"])
+        self.assertEqual(names(pattern='login|other'), ["JIRA-123-login", "jira_123_other"])
+        self.assertEqual(names(limit=2), ["JIRA-123-login", "JIRA-45"])
+        self.assertEqual(len(names(sort='none', limit=3)), 3)
+        with self.assertRaises(main.re.error):
+            names(pattern='(')
+    
+    def test_iter_ticket_directories_sort_mtime(self):
+        """mtime sorting lists the most recently modified first."""
+        workspace_base = self.manager.dir_manager.get_workspace_base(repo_id=self.manager.repo_id)
+        for age, name in enumerate(("newest", "middle", "oldest")):
+            (workspace_base / name).mkdir()
+            os.utime(workspace_base / name, (1_000_000 - age, 1_000_000 - age))
+        
+        entries = self.manager.iter_ticket_directories(sort='mtime', limit=2)
+        self.assertEqual([entry.name for entry in entries], ["newest", "middle"])
+    
+    def test_iter_ticket_directories_sort_mtime_skips_removed(self):
+        """A directory removed between scanning and stat'ing is left out."""
+        workspace_base = self.manager.dir_manager.get_workspace_base(repo_id=self.manager.repo_id)
+        for name in ("JIRA-1-a", "JIRA-2-b"):
+            (workspace_base / name).mkdir()
+        real_scandir = os.scandir
+        
+        @contextlib.contextmanager
+        def scandir_then_remove(path):
+            with real_scandir(path) as scan:
+                entries = list(scan)
+            (workspace_base / "JIRA-2-b").rmdir()
+            yield iter(entries)
+        
+        with patch('main.os.scandir', scandir_then_remove):
+            entries = self.manager.iter_ticket_directories(sort='mtime')
+            self.assertEqual([entry.name for entry in entries], ["JIRA-1-a"])
+    
+    def test_list_all_repos(self):
+        """Every configured repo is listed with its own workspace, without creating any."""
+        config = main.ConfigManager(self.config_file)
+        for repo in ('a', 'b', 'c'):
+            config.set('paths', 'workspace_base', str(Path(self.temp_dir) / f"ws-{repo}"), repo_id=f"host/o/{repo}")
+        (Path(self.temp_dir) / "ws-a" / "JIRA-1-x").mkdir(parents=True)
+        (Path(self.temp_dir) / "ws-a" / "JIRA-2-y").mkdir()
+        (Path(self.temp_dir) / "ws-b" / "PROJ-3-z").mkdir(parents=True)
+        manager = main.TicketManager(self.config_file, repo_id='')
+        
+        groups = manager.list_all_repos(workers=3, prefix='jira')
+        
+        self.assertEqual([(repo_id, [e.name for e in entries]) for repo_id, _, entries in groups],
+                         [('host/o/a', ['JIRA-1-x', 'JIRA-2-y']), ('host/o/b', []), ('host/o/c', [])])
+        self.assertEqual(groups[2][1], Path(self.temp_dir) / "ws-c")
+        self.assertFalse((Path(self.temp_dir) / "ws-c").exists())
+    
     def test_list_ticket_directories_skip_files(self):
         """Only return directories, not files."""
         workspace_base = self.manager.dir_manager.get_workspace_base(repo_id=self.manager.repo_id)
@@ -1600,6 +2847,653 @@ class TestTicketManager(unittest.TestCase):
         self.assertEqual(dirs[0].name, 'JIRA-123')
 
 
+class TestCheckoutContext(unittest.TestCase):
+    """Test CheckoutContext class."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.repo_dir = Path(self.temp_dir)
+        self.git_dir = self.repo_dir / ".git"
+        self.git_dir.mkdir()
+        (self.git_dir / "HEAD").write_text("ref: refs/heads/JIRA-1-feature\n")
+    
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_file_checkout_skipped(self):
+        """Skip 'git checkout -- file' (branch flag 0)."""
+        context = main.CheckoutContext(['aaa', 'bbb', '0'], environ={}, cwd=self.repo_dir)
+        self.assertIn('File checkout', context.skip_reason())
+    
+    def test_branch_switch_not_skipped(self):
+        """Process a checkout that moves HEAD."""
+        context = main.CheckoutContext(['aaa', 'bbb', '1'], environ={}, cwd=self.repo_dir)
+        self.assertIsNone(context.skip_reason())
+    
+    def test_same_head_new_branch_not_skipped(self):
+        """'git checkout -b' keeps the commit but still needs processing."""
+        context = main.CheckoutContext(['aaa', 'aaa', '1'], environ={}, cwd=self.repo_dir)
+        self.assertIsNone(context.skip_reason())
+    
+    def test_same_head_after_processing_skipped(self):
+        """Skip a same-HEAD checkout of the branch processed last."""
+        context = main.CheckoutContext(['aaa', 'aaa', '1'], environ={}, cwd=self.repo_dir)
+        context.record_processed(context.read_head())
+        self.assertIn('HEAD unchanged', context.skip_reason())
+        
+        (self.git_dir / "HEAD").write_text("ref: refs/heads/JIRA-2-other\n")
+        self.assertIsNone(context.skip_reason())
+    
+    def test_head_moved_during_processing_not_recorded(self):
+        """A HEAD git moves to while a background worker runs is not marked processed."""
+        context = main.CheckoutContext(['aaa', 'aaa', '1'], environ={}, cwd=self.repo_dir)
+        head = context.read_head()
+        manager = Mock()
+        
+        def checkout_during_processing():
+            # 'git checkout -b' in the script that queued the event
+            (self.git_dir / "HEAD").write_text("ref: refs/heads/JIRA-2-next\n")
+            return True, "ok"
+        
+        manager.process_checkout.side_effect = checkout_during_processing
+        with patch('main.TicketManager', return_value=manager), \
+             patch('main.ConfigManager.DEFAULT_CONFIG_FILE', Path(self.temp_dir) / "config.ini"), \
+             patch('sys.argv', ['main.py', 'process', 'aaa', 'aaa', '1']), \
+             patch('main.Path.cwd', return_value=self.repo_dir), \
+             patch('sys.stdout', new_callable=io.StringIO):
+            main.main()
+        
+        self.assertEqual((self.git_dir / main.CheckoutContext.MARKER_FILE).read_text(), head + "\n")
+        self.assertIsNone(main.CheckoutContext(['aaa', 'aaa', '1'], environ={}, cwd=self.repo_dir).skip_reason())
+    
+    def test_git_dir_from_environment(self):
+        """Trust GIT_DIR / GIT_WORK_TREE instead of searching."""
+        context = main.CheckoutContext([], environ={'GIT_DIR': '.git', 'GIT_WORK_TREE': '/work'},
+                                       cwd=self.repo_dir)
+        self.assertEqual(context.git_dir, self.git_dir)
+        self.assertEqual(context.work_tree, Path('/work'))
+    
+    def test_git_dir_from_hook_cwd(self):
+        """Hooks run at the top of the work tree, so .git is taken from cwd."""
+        context = main.CheckoutContext(['aaa', 'bbb', '1'], environ={}, cwd=self.repo_dir)
+        self.assertEqual(context.git_dir, self.git_dir)
+    
+    def test_manual_run_has_no_context(self):
+        """Without hook arguments nothing is skipped or assumed."""
+        context = main.CheckoutContext([], environ={}, cwd=self.repo_dir)
+        self.assertIsNone(context.git_dir)
+        self.assertIsNone(context.skip_reason())
+    
+    def test_operation_in_progress_skipped(self):
+        """Checkouts made by a rebase or bisect are skipped."""
+        context = main.CheckoutContext(['aaa', 'bbb', '1'], environ={}, cwd=self.repo_dir)
+        (self.git_dir / "HEAD").write_text("b" * 40 + "\n")
+        (self.git_dir / "rebase-merge").mkdir()
+        self.assertEqual(context.skip_reason(), "Rebase in progress - no action taken")
+        
+        (self.git_dir / "rebase-merge").rmdir()
+        (self.git_dir / "BISECT_LOG").write_text("git bisect start\n")
+        self.assertEqual(context.operation_in_progress(), 'Bisect')
+    
+    def test_operation_in_progress_follows_git_file(self):
+        """Worktree and submodule .git files point at the directory holding the markers."""
+        worktree = self.repo_dir / "worktree"
+        worktree.mkdir()
+        worktree_git_dir = self.git_dir / "worktrees" / "wt"
+        worktree_git_dir.mkdir(parents=True)
+        (worktree_git_dir / "HEAD").write_text("b" * 40 + "\n")
+        (worktree_git_dir / "sequencer").mkdir()
+        (worktree / ".git").write_text(f"gitdir: {worktree_git_dir}\n")
+        
+        context = main.CheckoutContext(['aaa', 'bbb', '1'], environ={}, cwd=worktree)
+        self.assertEqual(context.operation_in_progress(), 'Cherry-pick')
+    
+    def test_abort_checkout_processed(self):
+        """'git rebase --abort' and 'git bisect reset' reattach HEAD while the markers still exist."""
+        (self.git_dir / "rebase-merge").mkdir()
+        (self.git_dir / "BISECT_LOG").write_text("git bisect start\n")
+        context = main.CheckoutContext(['bbb', 'aaa', '1'], environ={}, cwd=self.repo_dir)
+        self.assertIsNone(context.operation_in_progress())
+        self.assertIsNone(context.skip_reason())
+    
+    @unittest.skipIf(shutil.which('git') is None, "git not installed")
+    def test_rebase_abort_with_git(self):
+        """A conflicting rebase is skipped while detached and processed again after --abort."""
+        def git(*args):
+            subprocess.run(['git', '-c', 'user.name=t', '-c', 'user.email=t@t', *args], cwd=self.repo_dir,
+                           capture_output=True, text=True)
+        
+        shutil.rmtree(self.git_dir)
+        git('init', '-q', '-b', 'main')
+        (self.repo_dir / "f").write_text("base\n")
+        git('add', 'f')
+        git('commit', '-q', '-m', 'base')
+        git('checkout', '-q', '-b', 'JIRA-5-x')
+        (self.repo_dir / "f").write_text("branch\n")
+        git('commit', '-q', '-am', 'branch')
+        git('checkout', '-q', 'main')
+        (self.repo_dir / "f").write_text("main\n")
+        git('commit', '-q', '-am', 'main')
+        git('rebase', 'main', 'JIRA-5-x')
+        context = main.CheckoutContext(['aaa', 'bbb', '1'], environ={}, cwd=self.repo_dir)
+        self.assertEqual(context.operation_in_progress(), 'Rebase')
+        
+        git('rebase', '--abort')
+        self.assertEqual((self.git_dir / "HEAD").read_text(), "ref: refs/heads/JIRA-5-x\n")
+        self.assertIsNone(context.skip_reason())
+    
+    @unittest.skipIf(shutil.which('git') is None, "git not installed")
+    def test_linked_worktree_without_remote(self):
+        """Git gives linked worktree hooks GIT_DIR only; the work tree is the hook's cwd."""
+        main_repo = Path(self.temp_dir) / "lr"
+        worktree = Path(self.temp_dir) / "lr-wt"
+        subprocess.run(['git', 'init', '-q', str(main_repo)], check=True)
+        subprocess.run(['git', '-c', 'user.name=t', '-c', 'user.email=t@t', 'commit', '-q', '--allow-empty',
+                        '-m', 'init'], cwd=main_repo, check=True)
+        subprocess.run(['git', 'worktree', 'add', '-q', '-b', 'JIRA-1-wt', str(worktree)], cwd=main_repo, check=True)
+        
+        environ = {'GIT_DIR': str(main_repo / ".git" / "worktrees" / "lr-wt")}
+        context = main.CheckoutContext(['aaa', 'bbb', '1'], environ=environ, cwd=worktree)
+        
+        self.assertEqual(context.work_tree, worktree)
+        repo_id = main.RepoIdentifier(context.git_dir, context.work_tree).get_repo_identifier()
+        self.assertTrue(repo_id.startswith('local/lr-wt-'), repo_id)
+    
+    def test_run_without_hook_arguments_ignores_operations(self):
+        """The post-rewrite run at the end of a rebase is not skipped."""
+        (self.git_dir / "rebase-merge").mkdir()
+        context = main.CheckoutContext([], environ={'GIT_DIR': '.git'}, cwd=self.repo_dir)
+        self.assertIsNone(context.skip_reason())
+
+
+class TestSidecarDaemon(unittest.TestCase):
+    """Test SidecarDaemon class."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_file = Path(self.temp_dir) / "config.ini"
+        self.socket_path = Path(self.temp_dir) / "sidecar.sock"
+        self.repo_dir = Path(self.temp_dir) / "repo"
+        self.git_dir = self.repo_dir / ".git"
+        self.git_dir.mkdir(parents=True)
+        
+        config = main.ConfigManager(self.config_file)
+        config.set('paths', 'workspace_base', str(Path(self.temp_dir) / "workspace"), default=True)
+        config.set('paths', 'tools_library_path', self.temp_dir, default=True)
+        config.set('links', 'current_ticket_link_locations', '', default=True)
+        config.set('links', 'tools_to_link', '', default=True)
+        
+        self.daemon = main.SidecarDaemon(self.config_file, self.socket_path)
+    
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    @patch('main.RepoIdentifier.get_repo_identifier', return_value='github.com/owner/repo')
+    def test_get_manager_is_cached(self, mock_repo_id):
+        """Reuse the same manager and repo identifier across requests."""
+        first = self.daemon.get_manager(self.git_dir)
+        second = self.daemon.get_manager(self.git_dir)
+        
+        self.assertIs(first, second)
+        self.assertEqual(first.repo_id, 'github.com/owner/repo')
+        self.assertEqual(first.git_dir, self.git_dir)
+        mock_repo_id.assert_called_once()
+    
+    @patch('main.RepoIdentifier.get_repo_identifier', return_value='github.com/owner/repo')
+    def test_get_manager_reloads_on_config_change(self, mock_repo_id):
+        """Rebuild managers when config.ini changes on disk."""
+        first = self.daemon.get_manager(self.git_dir)
+        main.ConfigManager(self.config_file).set('links', 'tools_to_link', 'notebooks', default=True)
+        os.utime(self.config_file, ns=(0, 0))
+        second = self.daemon.get_manager(self.git_dir)
+        
+        self.assertIsNot(first, second)
+        self.assertEqual(second.tools_linker.tools_to_link, ['notebooks'])
+    
+    def test_handle_request_resolves_relative_git_dir(self):
+        """GIT_DIR from the hook environment is resolved against cwd."""
+        with patch.object(self.daemon, 'get_manager') as mock_get_manager:
+            mock_get_manager.return_value.process_checkout.return_value = (True, "ok")
+            reply = self.daemon.handle_request({'cwd': str(self.repo_dir), 'git_dir': '.git'})
+        
+        self.assertEqual(reply, {'success': True, 'message': 'ok'})
+        mock_get_manager.assert_called_once_with(self.git_dir, None)
+    
+    @patch('main.RepoIdentifier.get_repo_identifier', return_value='github.com/owner/repo')
+    def test_tool_errors_still_record_head(self, mock_repo_id):
+        """A resolved ticket directory is recorded even if tool links fail, so same-HEAD checkouts skip."""
+        main.ConfigManager(self.config_file).set('links', 'tools_to_link', 'missing', default=True)
+        (self.git_dir / "HEAD").write_text("ref: refs/heads/JIRA-3-tools\n")
+        (self.git_dir / "refs" / "heads").mkdir(parents=True)
+        (self.git_dir / "refs" / "heads" / "JIRA-3-tools").write_text("a" * 40 + "\n")
+        request = {'cwd': str(self.repo_dir), 'git_dir': '', 'args': ['a' * 40, 'a' * 40, '1']}
+        
+        first = self.daemon.handle_request(request)
+        second = self.daemon.handle_request(request)
+        
+        self.assertFalse(first['success'])
+        self.assertIn('Tool item not found', first['message'])
+        self.assertEqual(second, {'success': True, 'message': 'HEAD unchanged - no action taken'})
+    
+    def test_handle_request_not_in_repo(self):
+        """Report an error when cwd is not inside a repository."""
+        outside = Path(self.temp_dir) / "outside"
+        outside.mkdir()
+        with patch('main.RepoIdentifier._find_git_repo', return_value=None):
+            reply = self.daemon.handle_request({'cwd': str(outside), 'git_dir': ''})
+        
+        self.assertFalse(reply['success'])
+        self.assertIn('Not in a git repository', reply['message'])
+    
+    @unittest.skipUnless(hasattr(main.socket, 'AF_UNIX'), "requires Unix domain sockets")
+    @patch('main.RepoIdentifier.get_repo_identifier', return_value='github.com/owner/repo')
+    @patch('main.BranchAnalyzer.get_current_branch', return_value='JIRA-42-daemon')
+    def test_socket_round_trip(self, mock_branch, mock_repo_id):
+        """Serve a hook request over the socket, then stop the daemon."""
+        server = threading.Thread(target=self.daemon.serve_forever)
+        server.start()
+        try:
+            for _ in range(100):
+                if self.daemon.is_running():
+                    break
+                time.sleep(0.01)
+            reply = self.daemon.send({'cwd': str(self.repo_dir), 'git_dir': str(self.git_dir), 'args': []})
+        finally:
+            self.daemon.send({'command': 'stop'})
+            server.join(timeout=5)
+        
+        self.assertTrue(reply['success'], reply['message'])
+        self.assertTrue((Path(self.temp_dir) / "workspace" / "github.com_owner_repo" / "JIRA-42-daemon").is_dir())
+        self.assertFalse(server.is_alive())
+        self.assertFalse(self.socket_path.exists())
+    
+    @unittest.skipUnless(hasattr(main.socket, 'AF_UNIX'), "requires Unix domain sockets")
+    def test_hook_client_falls_back_only_without_connection(self):
+        """The hook client waits for a slow daemon and never falls back once connected."""
+        def run_client():
+            return subprocess.run([sys.executable, '-S', '-c', main.HOOK_CLIENT_SOURCE, str(self.socket_path)],
+                                  cwd=self.repo_dir, capture_output=True, text=True)
+        
+        self.assertNotEqual(run_client().returncode, 0)
+        
+        listener = main.socket.socket(main.socket.AF_UNIX, main.socket.SOCK_STREAM)
+        listener.bind(str(self.socket_path))
+        listener.listen()
+        
+        def serve(replies):
+            for reply in replies:
+                conn, _ = listener.accept()
+                with conn:
+                    conn.makefile().readline()
+                    time.sleep(0.2)
+                    if reply:
+                        conn.sendall((json.dumps({'success': True, 'message': reply}) + "\n").encode())
+        
+        server = threading.Thread(target=serve, args=(['processed', None],))
+        server.start()
+        try:
+            slow = run_client()
+            dropped = run_client()
+        finally:
+            server.join(timeout=5)
+            listener.close()
+        
+        self.assertEqual((slow.returncode, slow.stdout), (0, "processed\n"))
+        self.assertEqual((dropped.returncode, dropped.stdout), (0, "sidecar daemon did not reply\n"))
+    
+    def test_send_without_daemon(self):
+        """Return None when no daemon is listening."""
+        self.assertFalse(self.daemon.is_running())
+        self.assertIsNone(self.daemon.send({'command': 'stop'}))
+
+
+class TestHookQueue(unittest.TestCase):
+    """Test HookQueue class."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.queue = main.HookQueue(Path(self.temp_dir))
+    
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _event(self, repo: str, new_head: str) -> dict:
+        return {'cwd': repo, 'git_dir': f"{repo}/.git", 'work_tree': '', 'args': ['a' * 40, new_head, '1']}
+    
+    def test_enqueue_and_take(self):
+        """Queued events are returned once, in order, and the queue is emptied."""
+        self.queue.enqueue(self._event('/repo-a', 'b' * 40))
+        self.queue.enqueue(self._event('/repo-b', 'c' * 40))
+        
+        self.assertEqual(self.queue.pending(), 2)
+        events = self.queue.take()
+        self.assertEqual([e['cwd'] for e in events], ['/repo-a', '/repo-b'])
+        self.assertIn('time', events[0])
+        self.assertEqual(self.queue.pending(), 0)
+        self.assertEqual(self.queue.take(), [])
+    
+    def test_take_skips_malformed_lines(self):
+        """A truncated line does not lose the other events."""
+        self.queue.enqueue(self._event('/repo-a', 'b' * 40))
+        with open(self.queue.queue_file, 'a') as f:
+            f.write('{"cwd": "/repo\n')
+        
+        self.assertEqual(len(self.queue.take()), 1)
+    
+    def test_coalesce_keeps_latest_per_repo(self):
+        """A burst of checkouts collapses to the last event of each repository."""
+        events = [self._event('/repo-a', '1'), self._event('/repo-b', '2'),
+                  self._event('/repo-a', '3'), self._event('/repo-a', '4')]
+        
+        coalesced = main.HookQueue.coalesce(events)
+        
+        self.assertEqual([(e['cwd'], e['args'][1]) for e in coalesced], [('/repo-b', '2'), ('/repo-a', '4')])
+    
+    def test_drain_processes_latest_per_repo_and_logs_failures(self):
+        """The worker handles one event per repo and logs the failures."""
+        for head in ('1', '2', '3'):
+            self.queue.enqueue(self._event('/repo-a', head))
+        self.queue.enqueue(self._event('/repo-b', '4'))
+        handled = []
+        
+        def handler(event):
+            handled.append(event['args'][1])
+            if event['cwd'] == '/repo-b':
+                return {'success': False, 'message': 'Failed to create ticket directory: boom'}
+            return {'success': True, 'message': 'ok'}
+        
+        self.assertEqual(self.queue.drain(handler), (2, 1))
+        self.assertEqual(handled, ['3', '4'])
+        self.assertFalse(self.queue.queue_file.exists())
+        log = self.queue.read_log()
+        self.assertEqual(len(log), 1)
+        self.assertEqual(log[0]['repo'], '/repo-b/.git')
+        self.assertIn('boom', log[0]['message'])
+    
+    def test_drain_logs_handler_exceptions(self):
+        """An exception in one event is logged and does not stop the worker."""
+        self.queue.enqueue(self._event('/repo-a', '1'))
+        self.queue.enqueue(self._event('/repo-b', '2'))
+        
+        def handler(event):
+            if event['cwd'] == '/repo-a':
+                raise RuntimeError('kaboom')
+            return {'success': True, 'message': 'ok'}
+        
+        self.assertEqual(self.queue.drain(handler), (2, 1))
+        self.assertIn('kaboom', self.queue.read_log()[0]['message'])
+    
+    def test_drain_includes_events_queued_while_processing(self):
+        """Events queued during a drain are processed before the worker exits."""
+        self.queue.enqueue(self._event('/repo-a', '1'))
+        handled = []
+        
+        def handler(event):
+            handled.append(event['args'][1])
+            if len(handled) == 1:
+                self.queue.enqueue(self._event('/repo-a', '2'))
+            return {'success': True, 'message': 'ok'}
+        
+        self.assertEqual(self.queue.drain(handler), (2, 0))
+        self.assertEqual(handled, ['1', '2'])
+    
+    def test_drain_leaves_queue_to_running_worker(self):
+        """A second worker exits at once while another holds the worker lock."""
+        self.queue.enqueue(self._event('/repo-a', '1'))
+        handler = Mock()
+        
+        with main.FileLock(self.queue.worker_lock_file):
+            self.assertTrue(self.queue.worker_running())
+            self.assertEqual(self.queue.drain(handler), (0, 0))
+        
+        handler.assert_not_called()
+        self.assertEqual(self.queue.pending(), 1)
+        self.assertFalse(self.queue.worker_running())
+    
+    def test_log_is_trimmed(self):
+        """The failure log keeps its newest entries when it grows past the limit."""
+        with patch.object(main.HookQueue, 'MAX_LOG_BYTES', 2000):
+            for i in range(100):
+                self.queue.log({'cwd': '/repo'}, f"failure {i}")
+        
+        self.assertLess(self.queue.log_file.stat().st_size, 2000)
+        self.assertEqual(self.queue.read_log(1)[0]['message'], 'failure 99')
+        self.assertEqual(len(self.queue.read_log(3)), 3)
+    
+    @patch('main.subprocess.Popen')
+    def test_spawn_worker_is_detached(self, mock_popen):
+        """The worker runs 'process --drain' without the hook's stdio."""
+        self.assertTrue(self.queue.spawn_worker())
+        
+        command = mock_popen.call_args[0][0]
+        self.assertEqual(command[-2:], ['process', '--drain'])
+        self.assertEqual(mock_popen.call_args[1]['stdout'], main.subprocess.DEVNULL)
+    
+    @patch('main.subprocess.Popen', side_effect=OSError('no python'))
+    def test_spawn_worker_failure_is_logged(self, mock_popen):
+        """A worker that cannot be started is reported in the log."""
+        self.assertFalse(self.queue.spawn_worker())
+        self.assertIn('no python', self.queue.read_log()[0]['message'])
+    
+    def test_is_enabled(self):
+        """Asynchronous mode is off unless hooks.async_hooks is set in the defaults."""
+        config = main.ConfigManager(Path(self.temp_dir) / "config.ini")
+        self.assertFalse(main.HookQueue.is_enabled(config))
+        
+        config.set('hooks', 'async_hooks', 'true', default=True)
+        self.assertTrue(main.HookQueue.is_enabled(config))
+
+
+class TestHeadWatcher(unittest.TestCase):
+    """Test HeadWatcher class."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_file = Path(self.temp_dir) / "config.ini"
+        config = main.ConfigManager(self.config_file)
+        config.set('paths', 'workspace_base', str(Path(self.temp_dir) / "workspace"), default=True)
+        config.set('paths', 'tools_library_path', self.temp_dir, default=True)
+        config.set('links', 'current_ticket_link_locations', '', default=True)
+        config.set('links', 'tools_to_link', '', default=True)
+        self.repos = []
+        for name in ("one", "two"):
+            git_dir = Path(self.temp_dir) / "repos" / name / ".git"
+            (git_dir / "refs" / "heads").mkdir(parents=True)
+            (git_dir / "HEAD").write_text("ref: refs/heads/main\n")
+            self.repos.append(git_dir.parent)
+    
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _checkout(self, work_tree: Path, branch: str):
+        """Replace HEAD the way git does, through a renamed lock file."""
+        git_dir = work_tree / ".git"
+        (git_dir / "refs" / "heads" / branch).write_text("0" * 40 + "\n")
+        (git_dir / "HEAD.lock").write_text(f"ref: refs/heads/{branch}\n")
+        os.replace(git_dir / "HEAD.lock", git_dir / "HEAD")
+    
+    def _watcher(self, **kwargs) -> 'main.HeadWatcher':
+        watcher = main.HeadWatcher(self.repos, self.config_file, **kwargs)
+        self.addCleanup(watcher.close)
+        return watcher
+    
+    @patch('main.RepoIdentifier.get_repo_identifier', return_value='github.com/owner/repo')
+    def test_polling_processes_changed_head(self, mock_repo_id):
+        """Polling notices a new HEAD and runs the checkout pipeline once."""
+        watcher = self._watcher(use_inotify=False, poll_interval=0.01)
+        self.assertEqual(watcher.start(), (0, 2))
+        self.assertEqual(watcher.run_once(0), [])
+        
+        self._checkout(self.repos[0], 'JIRA-1-login')
+        results = watcher.run_once(0.02)
+        
+        self.assertEqual(len(results), 1)
+        work_tree, success, message = results[0]
+        self.assertEqual(work_tree, self.repos[0])
+        self.assertTrue(success, message)
+        self.assertEqual([p.name for p in (Path(self.temp_dir) / "workspace").glob("*/*")], ['JIRA-1-login'])
+        self.assertEqual(watcher.run_once(0.02), [])
+    
+    def test_rewritten_same_head_is_ignored(self):
+        """HEAD rewritten with the same branch does not run the pipeline."""
+        watcher = self._watcher(use_inotify=False, poll_interval=0.01)
+        watcher.start()
+        self._checkout(self.repos[0], 'main')
+        
+        with patch.object(main.HeadWatcher, 'process') as mock_process:
+            watcher.run_once(0.02)
+        
+        mock_process.assert_not_called()
+    
+    @unittest.skipUnless(sys.platform.startswith('linux'), "inotify is Linux-only")
+    def test_inotify_coalesces_burst(self):
+        """A burst of checkouts in one repository is processed once, for the final HEAD."""
+        watcher = self._watcher()
+        watched, polled = watcher.start()
+        if watched == 0:
+            self.skipTest("inotify unavailable")
+        
+        self._checkout(self.repos[1], 'JIRA-2-a')
+        self._checkout(self.repos[1], 'JIRA-3-b')
+        with patch.object(main.HeadWatcher, 'process', return_value=(True, 'ok')) as mock_process:
+            results = watcher.run_once(2)
+        
+        mock_process.assert_called_once_with(self.repos[1] / ".git")
+        self.assertEqual(results, [(self.repos[1], True, 'ok')])
+        self.assertEqual(watcher._heads[self.repos[1] / ".git"], 'ref: refs/heads/JIRA-3-b')
+    
+    def test_operation_in_progress_is_retried(self):
+        """HEAD moves during a rebase are skipped and picked up when it ends."""
+        watcher = self._watcher(use_inotify=False, poll_interval=0.01)
+        watcher.start()
+        rebase_dir = self.repos[0] / ".git" / "rebase-merge"
+        rebase_dir.mkdir()
+        (self.repos[0] / ".git" / "HEAD").write_text("0" * 40 + "\n")
+        
+        results = watcher.run_once(0.02)
+        self.assertEqual(results[0][2], "Rebase in progress - no action taken")
+        
+        rebase_dir.rmdir()
+        self._checkout(self.repos[0], 'JIRA-1-login')
+        os.utime(self.repos[0] / ".git" / "HEAD", ns=(0, 10 ** 9))
+        with patch.object(main.HeadWatcher, 'process', return_value=(True, 'ok')) as mock_process:
+            watcher.run_once(0.02)
+        mock_process.assert_called_once()
+    
+    def test_unsupported_repositories(self):
+        """Reftable repositories are reported instead of watched."""
+        (self.repos[1] / ".git" / "reftable").mkdir()
+        
+        watcher = main.HeadWatcher(self.repos, self.config_file)
+        
+        self.assertEqual(list(watcher.repos.values()), [self.repos[0]])
+        self.assertEqual(watcher.unsupported[0][0], self.repos[1])
+
+
+class TestConcurrentHooks(unittest.TestCase):
+    """Run many sidecar processes at once against one config and workspace."""
+    
+    WORKTREES = 16
+    TICKETS = 4
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        if shutil.which('git') is None:
+            self.skipTest("git not installed")
+        self.temp_dir = tempfile.mkdtemp()
+        self.home = Path(self.temp_dir) / "home"
+        self.home.mkdir()
+        self.repo_dir = Path(self.temp_dir) / "repo"
+        self.repo_dir.mkdir()
+        self._git('init', '-q', '-b', 'main')
+        self._git('remote', 'add', 'origin', 'git@github.com:acme/widgets.git')
+        self._git('-c', 'user.name=t', '-c', 'user.email=t@t', 'commit', '-q', '--allow-empty', '-m', 'init')
+        self.worktrees = []
+        for i in range(self.WORKTREES):
+            worktree = Path(self.temp_dir) / f"wt{i}"
+            self._git('worktree', 'add', '-q', '-b', f"JIRA-{i % self.TICKETS}-variant{i}", str(worktree))
+            self.worktrees.append(worktree)
+        self.env = dict(os.environ, HOME=str(self.home))
+        self.script = str(Path(main.__file__).resolve())
+    
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _git(self, *args):
+        subprocess.run(['git', *args], cwd=self.repo_dir, capture_output=True, check=True)
+    
+    def _spawn(self, args, cwd):
+        return subprocess.Popen([sys.executable, self.script, *args], cwd=cwd, env=self.env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    
+    def test_parallel_checkouts_and_config_writes(self):
+        """One directory per ticket and no lost config updates."""
+        # Create the default config up front, as the first checkout after 'sidecar install' would
+        subprocess.run([sys.executable, self.script, 'config', '--view'], cwd=self.repo_dir,
+                       env=self.env, capture_output=True, check=True)
+        
+        procs = [self._spawn(['process'], worktree) for worktree in self.worktrees]
+        procs += [self._spawn(['config', '--set', 'links', 'tools_to_link', f"tool{i}", '--repo', f"x/{i}"],
+                              self.repo_dir) for i in range(8)]
+        for proc in procs:
+            _, stderr = proc.communicate(timeout=120)
+            self.assertNotIn(b'Traceback', stderr, stderr.decode())
+        
+        ticket_dirs = [p for p in (self.home / "tickets").rglob("JIRA-*") if p.is_dir()]
+        self.assertEqual(sorted(p.name.split('-')[1] for p in ticket_dirs),
+                         sorted(str(t) for t in range(self.TICKETS)), ticket_dirs)
+        
+        config = main.ConfigManager(self.home / ".sidecar" / "config.ini")
+        for i in range(8):
+            self.assertEqual(config.get('links', 'tools_to_link', repo_id=f"x/{i}"), f"tool{i}")
+        self.assertEqual(config.get('paths', 'workspace_base'), '~/tickets')
+
+
+class TestBenchmarks(unittest.TestCase):
+    """Smoke-test the benchmark suite on tiny fixtures."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        bench_path = Path(__file__).resolve().parent.parent / "benchmarks" / "bench_checkout.py"
+        spec = importlib.util.spec_from_file_location("bench_checkout", bench_path)
+        self.bench = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.bench)
+    
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_run_benchmarks_reports_every_stage(self):
+        """Every fixture combination reports timings for every stage."""
+        report = self.bench.run_benchmarks([5], [1, 3], repeat=1, root=Path(self.temp_dir), pattern_counts=[1, 3])
+        
+        self.assertEqual([(r['ticket_dirs'], r['repo_sections']) for r in report['results']], [(5, 1), (5, 3)])
+        self.assertEqual([r['patterns'] for r in report['pattern_scaling']], [1, 3])
+        self.assertIn('last_combined_ns_per_call', report['pattern_scaling'][0])
+        for result in report['results']:
+            self.assertIn('process_checkout_new_ticket', result['stages'])
+            self.assertIn('find_existing_ticket_dir_indexed', result['stages'])
+            self.assertEqual(result['stages']['repo_detection']['runs'], 1)
+        json.dumps(report)
+    
+    def test_cli_writes_json(self):
+        """--output writes the JSON report to a file."""
+        output = Path(self.temp_dir) / "results.json"
+        self.bench.main_cli(['--dirs', '2', '--repos', '1', '--repeat', '1', '--output', str(output)])
+        report = json.loads(output.read_text())
+        self.assertEqual(report['results'][0]['ticket_dirs'], 2)
+
+
 class TestCLI(unittest.TestCase):
     """Test CLI interface."""
     
@@ -1924,11 +3818,128 @@ class TestCLI(unittest.TestCase):
                 result = main.main()
                 self.assertEqual(result, 0)
     
+    @patch('main.TicketManager')
+    def test_cli_process_file_checkout(self, mock_manager_class):
+        """File checkouts exit before any processing."""
+        with patch('sys.argv', ['main.py', 'process', 'aaa', 'bbb', '0']):
+            with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+                result = main.main()
+                self.assertEqual(result, 0)
+                self.assertIn('File checkout', mock_stdout.getvalue())
+        mock_manager_class.assert_not_called()
+    
+    @patch('main.TicketManager')
+    def test_cli_process_timings(self, mock_manager_class):
+        """--timings writes a total record to stderr."""
+        mock_manager_class.return_value.process_checkout.return_value = (True, "Success")
+        
+        with patch('sys.argv', ['main.py', 'process', '--timings']), \
+             patch.dict(os.environ, {'SIDECAR_TRACE': ''}):
+            with patch('sys.stdout', new_callable=io.StringIO), \
+                 patch('sys.stderr', new_callable=io.StringIO) as mock_stderr:
+                result = main.main()
+        main.set_tracer(None)
+        
+        self.assertEqual(result, 0)
+        records = [json.loads(line) for line in mock_stderr.getvalue().splitlines()]
+        self.assertEqual(records[-1]['phase'], 'total')
+        self.assertEqual(records[-1]['command'], 'process')
+    
+    @patch('main.TicketManager')
+    def test_cli_process_all_branches(self, mock_manager_class):
+        """--all-branches runs the backfill instead of a checkout."""
+        mock_manager_class.return_value.process_all_branches.return_value = (True, "Processed 3 branches")
+        
+        with patch('sys.argv', ['main.py', 'process', '--all-branches']):
+            with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+                result = main.main()
+        
+        self.assertEqual(result, 0)
+        self.assertIn('Processed 3 branches', mock_stdout.getvalue())
+        mock_manager_class.return_value.process_checkout.assert_not_called()
+    
+    @patch('main.HookQueue.spawn_worker', return_value=True)
+    @patch('main.TicketManager')
+    def test_cli_process_async_queues_checkout(self, mock_manager_class, mock_spawn):
+        """With async hooks enabled the checkout is queued and a worker started."""
+        config_dir = Path(self.temp_dir) / "sidecar"
+        main.ConfigManager(config_dir / "config.ini").set('hooks', 'async_hooks', 'true', default=True)
+        
+        with patch.object(main.ConfigManager, 'DEFAULT_CONFIG_DIR', config_dir), \
+             patch.object(main.ConfigManager, 'DEFAULT_CONFIG_FILE', config_dir / "config.ini"), \
+             patch('sys.argv', ['main.py', 'process', 'a' * 40, 'b' * 40, '1']):
+            with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+                result = main.main()
+        
+        self.assertEqual(result, 0)
+        self.assertIn('queued', mock_stdout.getvalue())
+        mock_manager_class.assert_not_called()
+        mock_spawn.assert_called_once()
+        events = main.HookQueue(config_dir).take()
+        self.assertEqual(events[0]['args'], ['a' * 40, 'b' * 40, '1'])
+    
+    def test_cli_watch(self):
+        """watch finds repositories under the roots and runs the watcher."""
+        (Path(self.temp_dir) / "repo" / ".git").mkdir(parents=True)
+        (Path(self.temp_dir) / "repo" / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+        
+        with patch('main.HeadWatcher.run', side_effect=KeyboardInterrupt) as mock_run, \
+             patch('sys.argv', ['main.py', 'watch', self.temp_dir, '--poll']):
+            with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+                result = main.main()
+        
+        self.assertEqual(result, 0)
+        self.assertIn('Watching 1 repositories', mock_stdout.getvalue())
+        mock_run.assert_called_once()
+    
+    def test_cli_watch_without_repositories(self):
+        """watch fails when no repository is found."""
+        with patch('sys.argv', ['main.py', 'watch', self.temp_dir]):
+            with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+                result = main.main()
+        
+        self.assertEqual(result, 1)
+        self.assertIn('No repositories to watch', mock_stdout.getvalue())
+    
+    def test_cli_status_shows_queue_and_failures(self):
+        """status reports queued checkouts and recent hook failures."""
+        config_dir = Path(self.temp_dir) / "sidecar"
+        queue = main.HookQueue(config_dir)
+        queue.enqueue({'cwd': '/repo-a', 'git_dir': '', 'work_tree': '', 'args': []})
+        queue.log({'git_dir': '/repo-b/.git'}, 'Failed to create ticket directory: boom')
+        
+        with patch.object(main.ConfigManager, 'DEFAULT_CONFIG_DIR', config_dir), \
+             patch.object(main.ConfigManager, 'DEFAULT_CONFIG_FILE', config_dir / "config.ini"), \
+             patch('main.SidecarDaemon.is_running', return_value=False), \
+             patch('sys.argv', ['main.py', 'status']):
+            with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+                result = main.main()
+        
+        self.assertEqual(result, 0)
+        output = mock_stdout.getvalue()
+        self.assertIn('Daemon: not running', output)
+        self.assertIn('Asynchronous hooks: disabled', output)
+        self.assertIn('Queued checkouts: 1 (worker idle)', output)
+        self.assertIn('/repo-b/.git', output)
+        self.assertIn('boom', output)
+    
+    @patch('main.RepoScanner.scan', return_value=(True, "Found 2 repositories"))
+    def test_cli_scan(self, mock_scan):
+        """scan passes the root and flags to RepoScanner."""
+        with patch('sys.argv', ['main.py', 'scan', self.temp_dir, '--install-hooks', '--jobs', '2']):
+            with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout, \
+                 patch('main.ConfigManager', return_value=Mock()):
+                result = main.main()
+        
+        self.assertEqual(result, 0)
+        self.assertIn('Found 2 repositories', mock_stdout.getvalue())
+        mock_scan.assert_called_once_with(Path(self.temp_dir), install_hooks=True)
+    
     @patch('main.TicketManager')
     def test_cli_list_empty(self, mock_manager_class):
         """List command with no directories."""
         mock_manager = Mock()
-        mock_manager.list_ticket_directories.return_value = []
+        mock_manager.iter_ticket_directories.return_value = iter([])
         mock_manager.repo_id = None
         mock_manager.dir_manager.get_workspace_base.return_value = Path('/workspace')
         mock_manager_class.return_value = mock_manager
@@ -1940,6 +3951,76 @@ class TestCLI(unittest.TestCase):
                 output = mock_stdout.getvalue()
                 self.assertIn('No ticket directories', output)
     
+    def test_cli_list_negative_limit(self):
+        """--limit rejects negative values with a usage error."""
+        with patch('sys.argv', ['main.py', 'list', '--sort', 'none', '--limit', '-1']), \
+             patch('sys.stderr', new_callable=io.StringIO) as mock_stderr:
+            with self.assertRaises(SystemExit) as exit_context:
+                main.main()
+        
+        self.assertEqual(exit_context.exception.code, 2)
+        self.assertIn('must be 0 or more', mock_stderr.getvalue())
+    
+    def test_cli_list_json(self):
+        """--format json prints a JSON array of the filtered directories."""
+        workspace = Path(self.temp_dir) / "workspace"
+        for name in ("JIRA-1-a", "JIRA-2-b", "PROJ-3-c"):
+            (workspace / name).mkdir(parents=True)
+        config = main.ConfigManager(self.config_file)
+        config.set('paths', 'workspace_base', str(workspace), default=True)
+        
+        with patch('main.ConfigManager.DEFAULT_CONFIG_FILE', self.config_file), \
+             patch('main.ConfigManager.get_current_repo_id', return_value=None), \
+             patch('sys.argv', ['main.py', 'list', '--prefix', 'jira', '--format', 'json']):
+            with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+                result = main.main()
+        
+        self.assertEqual(result, 0)
+        records = json.loads(mock_stdout.getvalue())
+        self.assertEqual([record['name'] for record in records], ["JIRA-1-a", "JIRA-2-b"])
+        self.assertEqual(records[0]['path'], str(workspace / "JIRA-1-a"))
+    
+    def test_cli_list_does_not_create_workspace(self):
+        """Listing a repo that has no workspace yet leaves the filesystem alone."""
+        workspace = Path(self.temp_dir) / "missing-workspace"
+        main.ConfigManager(self.config_file).set('paths', 'workspace_base', str(workspace), default=True)
+        
+        with patch('main.ConfigManager.DEFAULT_CONFIG_FILE', self.config_file), \
+             patch('main.ConfigManager.get_current_repo_id', return_value=None), \
+             patch('sys.argv', ['main.py', 'list']), \
+             patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            result = main.main()
+        
+        self.assertEqual(result, 0)
+        self.assertIn('No ticket directories', mock_stdout.getvalue())
+        self.assertFalse(workspace.exists())
+    
+    def test_cli_list_all_repos(self):
+        """--all-repos groups tickets per repository with counts."""
+        config = main.ConfigManager(self.config_file)
+        for repo in ('a', 'b'):
+            workspace = Path(self.temp_dir) / f"ws-{repo}"
+            (workspace / f"JIRA-1-{repo}").mkdir(parents=True)
+            config.set('paths', 'workspace_base', str(workspace), repo_id=f"host/o/{repo}")
+        (Path(self.temp_dir) / "ws-b" / "JIRA-2-b").mkdir()
+        
+        with patch('main.ConfigManager.DEFAULT_CONFIG_FILE', self.config_file), \
+             patch('main.ConfigManager.get_current_repo_id', side_effect=AssertionError("repo detected")):
+            with patch('sys.argv', ['main.py', 'list', '--all-repos']), \
+                 patch('sys.stdout', new_callable=io.StringIO) as text_stdout:
+                self.assertEqual(main.main(), 0)
+            with patch('sys.argv', ['main.py', 'list', '--all-repos', '--format', 'json']), \
+                 patch('sys.stdout', new_callable=io.StringIO) as json_stdout:
+                self.assertEqual(main.main(), 0)
+        
+        output = text_stdout.getvalue()
+        self.assertIn('host/o/a (1 ticket) in', output)
+        self.assertIn('host/o/b (2 tickets) in', output)
+        self.assertIn('Total: 3 ticket directories in 2 repositories', output)
+        report = json.loads(json_stdout.getvalue())
+        self.assertEqual(report['total'], 3)
+        self.assertEqual([repo['count'] for repo in report['repos']], [1, 2])
+    
     @patch('main.ConfigManager')
     def test_cli_repos_list(self, mock_config_class):
         """List all configured repositories."""